@@ -0,0 +1,90 @@
+"""Microbenchmark: component-cluster queries, pandas masks vs the CSR index.
+
+For every kanji of a workbook, runs the three lookups the rules make
+(rule 4: char/component2 == component2; rule 6: component1-3 == char) once
+with string DataFrame masks and once with the dictionary-encoded CSR index,
+checks both return the same rows and prints the per-query timings.
+
+    python benchmarks/bench_cluster_queries.py [WORKBOOK] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from model import ExcelColumn
+from core import find_cluster_1_2_3_components
+from data_loader import read_excel, get_source_index
+
+DEFAULT_WORKBOOK = os.path.join(os.path.dirname(__file__), '..', 'excel', '2250 KANJI COMPONENTS - ver. 1.0.xlsx')
+
+
+def mask_queries(df, chars, components2):
+    res = []
+    for char, component2 in zip(chars, components2):
+        res.append(find_cluster_1_2_3_components(char, char, df, ExcelColumn.char, ExcelColumn.component1,
+                                                 ExcelColumn.component2, ExcelColumn.component3).index)
+        res.append(df[((df[ExcelColumn.char] == component2) | (df[ExcelColumn.component2] == component2))
+                      & (df[ExcelColumn.char] != char)].index)
+    return res
+
+
+def csr_queries(index, chars, components2):
+    res = []
+    for char, component2 in zip(chars, components2):
+        code = index.codes.get(char, -1)
+        rows = index.component_rows.get(char, [])
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        res.append(rows[index.char_codes[rows] != code])
+        rows = numpy.union1d(index.char_rows.get(component2, []), index.component2_rows.get(component2, []))
+        rows = rows.astype(numpy.intp)
+        res.append(rows[index.char_codes[rows] != code])
+    return res
+
+
+def best_of(repeat, fn, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workbook", nargs="?", default=DEFAULT_WORKBOOK)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = read_excel(args.workbook)
+    df = source.df_kanji
+    chars = df[ExcelColumn.char].tolist()
+    components2 = df[ExcelColumn.component2].tolist()
+
+    start = time.perf_counter()
+    source.index = None
+    index = get_source_index(source)
+    build = time.perf_counter() - start
+
+    mask_time, mask_rows = best_of(args.repeat, mask_queries, df, chars, components2)
+    csr_time, csr_rows = best_of(args.repeat, csr_queries, index, chars, components2)
+    positions = [df.index.get_indexer(rows).tolist() for rows in mask_rows]
+    assert positions == [rows.tolist() for rows in csr_rows], "CSR rows differ from pandas masks"
+
+    queries = len(mask_rows)
+    print("{} kanji, {} queries".format(len(chars), queries))
+    print("index build:   {:8.1f} ms".format(build * 1000))
+    print("pandas masks:  {:8.1f} ms  ({:.1f} us/query)".format(mask_time * 1000, mask_time / queries * 1e6))
+    print("CSR index:     {:8.1f} ms  ({:.1f} us/query)".format(csr_time * 1000, csr_time / queries * 1e6))
+    print("speedup:       {:8.1f}x".format(mask_time / csr_time))
+
+
+if __name__ == "__main__":
+    main()
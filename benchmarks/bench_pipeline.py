@@ -0,0 +1,253 @@
+"""Benchmark: every pipeline stage across dataset sizes, with JSON baselines.
+
+Runs each stage on the shipped workbooks and on synthetic datasets
+generated from the 2250 workbook by ``synthetic.py``, and reports wall
+time (best of ``--repeat``) and peak traced memory (``tracemalloc``, one
+extra run per stage):
+
+- ``read_excel``: parse the workbook (cache off) and build the source
+  index. Synthetic datasets are stored as Parquet when pyarrow is
+  installed, and the stage is ``read_parquet`` instead
+- ``read_kanji_dataframe``: build a Kanji per row
+- ``categorize_kanji``: the rules over every kanji, with the time spent in
+  ``decide`` broken down by the rule that fired
+- ``categorize_queue``: resolve the deferred kanji
+- ``freq_pipeline``: the frequency grouping over the same rows
+- ``site``: ``generate_site.build_groups_data``, ``build_site_data`` (group
+  shards and the gzipped search index) and ``generate_html``
+- ``anki_export``: ``anki_export.export_categorization`` to a temp file
+
+    python benchmarks/bench_pipeline.py [--datasets 1500 2250 5k 10k 50k]
+                                        [--save results.json] [--baseline results.json]
+
+``--save`` writes the results as JSON; ``--baseline`` compares against a
+saved file (``benchmarks/baselines/pipeline.json`` is the last committed
+run) and exits with status 1 if any stage got slower than ``--threshold``
+times its baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List, Tuple
+
+import pandas
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import algorithm
+import freq_algorithm
+from data_loader import read_excel, read_parquet, read_kanji_dataframe, get_source_index
+from model import Source
+from synthetic import learn_profile, generate, freq_frame, write_workbook, write_parquet
+
+EXCEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'excel')
+WORKBOOKS = {
+    "1500": os.path.join(EXCEL_DIR, "1500 KANJI COMPONENTS - ver. 1.3.xlsx"),
+    "2250": os.path.join(EXCEL_DIR, "2250 KANJI COMPONENTS - ver. 1.0.xlsx"),
+}
+SYNTHETIC = {"5k": 5000, "10k": 10000, "50k": 50000}
+
+
+def fresh_index(source: Source) -> Source:
+    source.index = None
+    get_source_index(source)
+    return source
+
+
+def categorize(source: Source, queue: bool = True):
+    categorization = algorithm.init_categorization(source)
+    for kanji in read_kanji_dataframe(source.df_kanji):
+        algorithm.categorize_kanji(kanji, categorization, source)
+    if queue:
+        algorithm.categorize_queue(categorization)
+    return categorization
+
+
+def run_freq(df: pandas.DataFrame):
+    list_kanji = freq_algorithm.read_kanji_dataframe(df)
+    result = []
+    index = freq_algorithm.build_index(list_kanji)
+    for kanji in list_kanji:
+        freq_algorithm.categorize_kanji(kanji, result, list_kanji, index)
+    return freq_algorithm.rank_groups(list_kanji, result)
+
+
+def run_site(categorization):
+    from generate_site import build_groups_data, build_site_data, generate_html
+    manifest, assets = build_site_data(build_groups_data(categorization), "data/benchmark/")
+    return generate_html(manifest, "benchmark", "benchmark.xlsx"), assets
+
+
+def run_anki(categorization, path):
+    from anki_export import export_categorization
+    return export_categorization(categorization, path)
+
+
+def rule_breakdown(source: Source) -> Dict[str, Dict]:
+    """Time spent in ``algorithm.decide`` per kanji, grouped by the rule that fired."""
+    fresh_index(source)
+    categorization = algorithm.init_categorization(source)
+    totals: Dict[str, List[float]] = {}
+    for kanji in read_kanji_dataframe(source.df_kanji):
+        start = time.perf_counter()
+        decision = algorithm.decide(kanji, source)
+        elapsed = time.perf_counter() - start
+        algorithm.apply_decision(kanji, decision, categorization)
+        totals.setdefault(decision.rule, []).append(elapsed)
+    return {rule: {"kanji": len(times), "seconds": round(sum(times), 6),
+                   "us_per_kanji": round(sum(times) / len(times) * 1e6, 2)}
+            for rule, times in sorted(totals.items())}
+
+
+def measure(setup: Callable[[], Tuple], run: Callable, repeat: int, memory: bool) -> Dict:
+    """Best-of-``repeat`` wall time of ``run(*setup())``, plus its peak traced memory."""
+    best = None
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        run(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    res = {"seconds": round(best, 6)}
+    if memory:
+        args = setup()
+        tracemalloc.start()
+        try:
+            run(*args)
+            res["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        finally:
+            tracemalloc.stop()
+    return res
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def bench_dataset(workbook: str, source: Source, repeat: int, memory: bool, tmp: str) -> Dict:
+    results = {"rows": len(source.df_kanji)}
+    if os.path.isdir(workbook):
+        results["read_parquet"] = measure(lambda: (workbook,), read_parquet, repeat, memory)
+    else:
+        results["read_excel"] = measure(lambda: (workbook,), lambda path: read_excel(path, use_cache=False),
+                                        repeat, memory)
+    results["read_kanji_dataframe"] = measure(lambda: (source.df_kanji,), read_kanji_dataframe, repeat, memory)
+    results["categorize_kanji"] = measure(lambda: (fresh_index(source), False), categorize, repeat, memory)
+    results["categorize_kanji"]["rules"] = rule_breakdown(source)
+    results["categorize_queue"] = measure(lambda: (categorize(fresh_index(source), queue=False),),
+                                          algorithm.categorize_queue, repeat, memory)
+    df_freq = freq_frame(source)
+    results["freq_pipeline"] = measure(lambda: (df_freq,), run_freq, repeat, memory)
+    categorization = categorize(fresh_index(source))
+    results["site"] = measure(lambda: (categorization,), run_site, repeat, memory)
+    results["anki_export"] = measure(lambda: (categorization, os.path.join(tmp, "bench.apkg")), run_anki,
+                                     repeat, memory)
+    return results
+
+
+def load_dataset(name: str, tmp: str) -> Tuple[str, Source]:
+    if name in WORKBOOKS:
+        return WORKBOOKS[name], read_excel(WORKBOOKS[name], use_cache=False)
+    source = generate(SYNTHETIC[name], learn_profile(read_excel(WORKBOOKS["2250"])))
+    # Benchmark the frames as read back, so dtypes match a real workbook
+    if _has_pyarrow():
+        directory = os.path.join(tmp, name)
+        write_parquet(source, directory)
+        return directory, read_parquet(directory)
+    workbook = os.path.join(tmp, "{}.xlsx".format(name))
+    write_workbook(source, workbook)
+    return workbook, read_excel(workbook, use_cache=False)
+
+
+def _stage_times(results: Dict) -> Dict[Tuple[str, str], float]:
+    return {(dataset, stage): values["seconds"]
+            for dataset, stages in results["datasets"].items()
+            for stage, values in stages.items() if isinstance(values, dict)}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print each stage against the baseline; return the stages slower than ``threshold``."""
+    old = _stage_times(baseline)
+    regressions = []
+    print("\n{:<8} {:<22} {:>10} {:>10} {:>7}".format("dataset", "stage", "baseline", "now", "ratio"))
+    for key, seconds in _stage_times(results).items():
+        if key not in old:
+            continue
+        ratio = seconds / old[key] if old[key] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print("{:<8} {:<22} {:>9.1f}ms {:>9.1f}ms {:>6.2f}x{}".format(
+            key[0], key[1], old[key] * 1000, seconds * 1000, ratio, flag))
+        if flag:
+            regressions.append("{} {}".format(*key))
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", nargs="+", default=list(WORKBOOKS) + list(SYNTHETIC),
+                        choices=list(WORKBOOKS) + list(SYNTHETIC))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default: 1.25)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {"revision": _git_revision(), "python": platform.python_version(),
+                 "machine": platform.machine(), "processor": platform.processor(),
+                 "repeat": args.repeat},
+        "datasets": {},
+    }
+    print("{:<8} {:>6} {:<22} {:>10} {:>9}".format("dataset", "rows", "stage", "time", "peak"))
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for name in args.datasets:
+            # The rules print diagnostics for some kanji on every run
+            with redirect_stdout(devnull):
+                workbook, source = load_dataset(name, tmp)
+                stages = bench_dataset(workbook, source, args.repeat, not args.no_memory, tmp)
+            results["datasets"][name] = stages
+            for stage, values in stages.items():
+                if isinstance(values, dict):
+                    peak = "{:8.1f}M".format(values["peak_mb"]) if "peak_mb" in values else ""
+                    print("{:<8} {:>6} {:<22} {:>8.1f}ms {:>9}".format(
+                        name, stages["rows"], stage, values["seconds"] * 1000, peak))
+                    for rule, counts in values.get("rules", {}).items():
+                        print("{:<8} {:>6}   decide, rule {:<9} {:>8.1f}ms  {} kanji, {:.1f} us each".format(
+                            "", "", rule, counts["seconds"] * 1000, counts["kanji"], counts["us_per_kanji"]))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\n{} stage(s) slower than {}x baseline".format(len(regressions), args.threshold))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
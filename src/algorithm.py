@@ -1,14 +1,21 @@
-from typing import Optional, List
+from dataclasses import asdict, replace
+from typing import Dict, Iterable, Iterator, Optional, List
 
+import numpy
 import pandas
-from disjoint_set import DisjointSet
 
-from model import Source, Categorization, Constants, Kanji, ExcelColumn, Stem
-from data_loader import read_kanji, read_kanji_dataframe, read_kanji_char, read_excel
+from columnar import EMPTY_ROWS
+from model import Source, Categorization, Constants, Decision, Kanji, KanjiGroup, ExcelColumn, Rule, Stem, TagSet
+import profiling
+import tracing
+from union_find import UnionFind
+from data_loader import (
+    read_kanji, read_kanji_dataframe, read_kanji_char, read_kanji_chars, read_excel, get_source_index,
+    read_source_kanji,
+)
 from core import (
     is_empty_string, set_logging_level, logger,
     find_kanji_on_reading as _find_kanji_on_reading,
-    find_cluster_1_2_3_components as _find_cluster_1_2_3_components,
 )
 
 
@@ -16,13 +23,13 @@ def init_categorization(source: Source) -> Categorization:
     cat = Categorization()
 
     for grp in source.df_keyword[ExcelColumn.group].unique():
-        cat.result.setdefault(grp, [])
+        cat.result.setdefault(grp, KanjiGroup())
 
     for grp in source.df_stem[ExcelColumn.group].unique():
-        cat.result.setdefault(grp, [])
+        cat.result.setdefault(grp, KanjiGroup())
 
-    cat.result.setdefault(Constants.other_grp, [])
-    cat.result.setdefault(Constants.special_grp, [])
+    cat.result.setdefault(Constants.other_grp, KanjiGroup())
+    cat.result.setdefault(Constants.special_grp, KanjiGroup())
 
     for kanji, key in source.df_special[[ExcelColumn.kanji, ExcelColumn.key]].values:
         cat.queue[key].append(read_kanji_char(kanji, source))
@@ -31,61 +38,87 @@ def init_categorization(source: Source) -> Categorization:
 
 
 def find_keyword(kanji: Kanji, source: Source) -> Optional[str]:
-    group = source.df_keyword[source.df_keyword[ExcelColumn.keyword] == kanji.keyword][ExcelColumn.group]
-    if group.empty:
-        return None
-    else:
-        return group.iloc[0]
+    return get_source_index(source).keyword_group.get(kanji.keyword)
 
 
 def find_stem(kanji: Kanji, source: Source) -> Optional[str]:
-    group = source.df_stem[source.df_stem[ExcelColumn.stem_kanji] == kanji.char][ExcelColumn.group]
-    if group.empty:
-        return None
-    else:
-        return group.iloc[0]
+    return get_source_index(source).stem_group.get(kanji.char)
 
 
 def find_special(kanji: Kanji, source: Source) -> Optional[str]:
-    group = source.df_special[source.df_special[ExcelColumn.kanji] == kanji.char]
-    if group.empty:
-        return None
-    else:
+    if kanji.char in get_source_index(source).special:
         return Constants.special_grp
+    else:
+        return None
+
+
+def get_group(groups: Dict[str, KanjiGroup], key: str) -> KanjiGroup:
+    """Return ``groups[key]``, upgrading a plain list to a KanjiGroup in place."""
+    group = groups[key]
+    if not isinstance(group, KanjiGroup):
+        group = groups[key] = KanjiGroup(group)
+    return group
+
+
+def _kanji_key(kanji: Kanji) -> tuple:
+    return tuple(tuple(value) if isinstance(value, (list, TagSet)) else value
+                 for value in (getattr(kanji, name) for name in Kanji.__slots__))
+
+
+def unique_kanji(kanji_list: Iterable[Kanji]) -> Iterator[Kanji]:
+    """Yield each Kanji once, in order, dropping later ones equal by value as ``drop_duplicates`` did."""
+    seen = set()
+    for kanji in kanji_list:
+        key = _kanji_key(kanji)
+        if key not in seen:
+            seen.add(key)
+            yield kanji
 
 
 def append_categorization(category: str, kanji: Kanji, is_first: bool, categorization: Categorization):
+    group = get_group(categorization.result, category)
+    queued = categorization.queue.pop(kanji.char, None)
+    if not is_first:
+        group.append(kanji)
+    if queued is not None:
+        for ch in unique_kanji(queued):
+            ch.ref = kanji.char
+            group.appendleft(ch)
     if is_first:
-        if kanji.char in categorization.queue:
-            for ch in pandas.Series(categorization.queue[kanji.char]).drop_duplicates().tolist():
-                ch.ref = kanji.char
-                categorization.result[category].insert(0, ch)
-            categorization.result[category].insert(0, kanji)
-            del categorization.queue[kanji.char]
-        else:
-            categorization.result[category].insert(0, kanji)
-    else:
-        if kanji.char in categorization.queue:
-            categorization.result[category].append(kanji)
-            for ch in pandas.Series(categorization.queue[kanji.char]).drop_duplicates().tolist():
-                ch.ref = kanji.char
-                categorization.result[category].insert(0, ch)
-            del categorization.queue[kanji.char]
-        else:
-            categorization.result[category].append(kanji)
+        group.appendleft(kanji)
 
 
 def add_to_queue(kanji: Kanji, ref_char: str, categorization: Categorization):
     kanji.ref = ref_char
-    categorization.queue.setdefault(ref_char, []).append(kanji)
+    group = categorization.queue.get(ref_char)
+    if group is None:
+        group = categorization.queue[ref_char] = KanjiGroup()
+    group.append(kanji)
+
+
+def find_row_positions(source: Source, kanji_char: str, *row_lists) -> numpy.ndarray:
+    """Merge ``row_lists`` into df_kanji positions in source order, excluding ``kanji_char`` itself."""
+    index = get_source_index(source)
+    if len(row_lists) == 1:
+        rows = numpy.asarray(row_lists[0], dtype=numpy.intp)
+    else:
+        rows = numpy.unique(numpy.concatenate([numpy.asarray(r, dtype=numpy.intp) for r in row_lists]))
+    if profiling.enabled:
+        profiling.scan(len(rows))
+    return rows[index.char_codes[rows] != index.codes.get(kanji_char, -1)]
+
+
+def find_rows(source: Source, kanji_char: str, *row_lists) -> pandas.DataFrame:
+    return source.df_kanji.iloc[find_row_positions(source, kanji_char, *row_lists)]
 
 
 def find_cluster_1_2_3_components(component: str, kanji: Kanji, source: Source) -> pandas.DataFrame:
-    return _find_cluster_1_2_3_components(
-        component, kanji.char, source.df_kanji,
-        ExcelColumn.char, ExcelColumn.component1,
-        ExcelColumn.component2, ExcelColumn.component3
-    )
+    return find_rows(source, kanji.char, get_source_index(source).component_rows.get(component, []))
+
+
+def find_max_srl_row(rows: numpy.ndarray, source: Source) -> int:
+    """First of ``rows`` with the highest SRL, as ``find_max_srl`` picks it from ``df_kanji.iloc[rows]``."""
+    return int(rows[numpy.argmax(get_source_index(source).srl[rows])])
 
 
 def find_max_srl(dataframe: pandas.DataFrame):
@@ -108,91 +141,106 @@ def find_kanji_on_reading(vr_cluster_kanji: List[Kanji], kanji: Kanji) -> List[K
     return _find_kanji_on_reading(vr_cluster_kanji, kanji, lambda k: k.on_reading)
 
 
-def find_onyomi(kanji: Kanji, vr_cluster: pandas.DataFrame, categorization: Categorization,
-                source: Source):
-    vr_cluster_kanji = read_kanji_dataframe(vr_cluster)
+def _trace_onyomi(rule: str, kanji: Kanji, onyomi: List[Kanji], max_srl_kanji: Kanji):
+    tracing.event("onyomi", char=kanji.char, rule=rule, matches=len(onyomi), srl=kanji.srl,
+                  max_srl_char=max_srl_kanji.char, max_srl=max_srl_kanji.srl)
+
+
+def decide_onyomi(kanji: Kanji, vr_cluster_kanji: List[Kanji], source: Source) -> Decision:
     onyomi = find_kanji_on_reading(vr_cluster_kanji, kanji)
     if len(onyomi) == 0:
-        fifth_rule(kanji, categorization, source, False)
-        return
+        return decide_fifth(kanji, source, False)
 
     if len(onyomi) > 1:
-        logger.info("kanji > 1")
         max_srl_kanji = find_max_srl_kanji(onyomi)
+        if tracing.enabled:
+            _trace_onyomi(Rule.onyomi, kanji, onyomi, max_srl_kanji)
         if kanji.srl > max_srl_kanji.srl:
-            fifth_rule(kanji, categorization, source, True)
-            return
-        logger.info("max srl kanji: {}".format(max_srl_kanji.char))
+            return decide_fifth(kanji, source, True)
     else:
-        logger.info("kanji = 1")
-        logger.info("kanji srl: {}".format(kanji.srl))
         max_srl_kanji = onyomi[0]
-        logger.info("max_srl_kanji srl: {}".format(max_srl_kanji.srl))
+        if tracing.enabled:
+            _trace_onyomi(Rule.onyomi, kanji, onyomi, max_srl_kanji)
         if kanji.srl > max_srl_kanji.srl:
-            fifth_rule(kanji, categorization, source, kanji.srl > 2)
-            return
+            return decide_fifth(kanji, source, kanji.srl > 2)
+
+    return Decision(kanji.char, Rule.onyomi, type=Constants.vr, ref=max_srl_kanji.char)
+
 
-    kanji.type = Constants.vr
-    add_to_queue(kanji, max_srl_kanji.char, categorization)
+def find_onyomi(kanji: Kanji, vr_cluster_kanji: List[Kanji], categorization: Categorization,
+                source: Source):
+    apply_decision(kanji, decide_onyomi(kanji, vr_cluster_kanji, source), categorization)
+
+
+def decide_seventh(kanji: Kanji) -> Decision:
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule=Rule.other)
+    if profiling.enabled:
+        profiling.visit(Rule.other)
+    return Decision(kanji.char, Rule.other, group=Constants.other_grp)
 
 
 def seventh_rule(kanji: Kanji, categorization: Categorization):
-    logger.info("7. rule")
-    append_categorization(Constants.other_grp, kanji, False, categorization)
+    apply_decision(kanji, decide_seventh(kanji), categorization)
 
 
-def categorize_srl(dataframe: pandas.DataFrame, kanji: Kanji, categorization: Categorization, source: Source, type: str):
+def decide_srl(dataframe: pandas.DataFrame, kanji: Kanji, type: str) -> Decision:
     if len(dataframe.index) > 1:
         max_srl_kanji = find_max_srl(dataframe)
     else:
         max_srl_kanji = dataframe.iloc[0]
-    kanji.type = type
-    add_to_queue(kanji, max_srl_kanji[ExcelColumn.char], categorization)
+    return Decision(kanji.char, Rule.visual, type=type, ref=max_srl_kanji[ExcelColumn.char])
 
 
-def sixth_rule(kanji: Kanji, categorization: Categorization, source: Source):
-    logger.info("6. rule - first condition")
+def categorize_srl(dataframe: pandas.DataFrame, kanji: Kanji, categorization: Categorization, source: Source, type: str):
+    apply_decision(kanji, decide_srl(dataframe, kanji, type), categorization)
+
+
+def decide_srl_rows(rows: numpy.ndarray, kanji: Kanji, source: Source, type: str) -> Decision:
+    ref = get_source_index(source).chars[find_max_srl_row(rows, source)]
+    return Decision(kanji.char, Rule.visual, type=type, ref=ref)
+
+
+def decide_sixth(kanji: Kanji, source: Source) -> Decision:
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule=Rule.visual, condition=1)
+    if profiling.enabled:
+        profiling.visit(Rule.visual)
     # rewrite rule
-    vr_cluster_1_2_3 = find_cluster_1_2_3_components(kanji.char, kanji, source)
-    if vr_cluster_1_2_3 is None or vr_cluster_1_2_3.empty:
-        logger.info("6. rule - second condition")
+    index = get_source_index(source)
+    vr_cluster_1_2_3 = find_row_positions(source, kanji.char, index.component_rows.get(kanji.char, []))
+    if len(vr_cluster_1_2_3) == 0:
+        if tracing.enabled:
+            tracing.event("rule", char=kanji.char, rule=Rule.visual, condition=2)
         component2 = is_empty_string(kanji.component2)
         if component2 is not None:
-            vr_component2 = source.df_kanji[
-                (source.df_kanji[ExcelColumn.component2] == kanji.component2)
-                & (source.df_kanji[ExcelColumn.char] != kanji.char)
-            ]
+            vr_component2 = find_row_positions(source, kanji.char, index.component2_rows.get(component2, []))
         else:
-            vr_component2 = None
-        if vr_component2 is None or vr_component2.empty:
-            logger.info("6. rule - third condition")
-            vr_component3 = source.df_kanji[
-                (source.df_kanji[ExcelColumn.char] == kanji.component1)
-                & (source.df_kanji[ExcelColumn.char] != kanji.char)
-            ]
-            if vr_component3 is None or vr_component3.empty:
-                seventh_rule(kanji, categorization)
+            vr_component2 = EMPTY_ROWS
+        if len(vr_component2) == 0:
+            if tracing.enabled:
+                tracing.event("rule", char=kanji.char, rule=Rule.visual, condition=3)
+            vr_component3 = find_row_positions(source, kanji.char, index.char_rows.get(kanji.component1, []))
+            if len(vr_component3) == 0:
+                return decide_seventh(kanji)
             else:
-                categorize_srl(vr_component3, kanji, categorization, source, Constants.visual)
+                return decide_srl_rows(vr_component3, kanji, source, Constants.visual)
         else:
-            categorize_srl(vr_component2, kanji, categorization, source, Constants.visual)
+            return decide_srl_rows(vr_component2, kanji, source, Constants.visual)
     else:
-        categorize_srl(vr_cluster_1_2_3, kanji, categorization, source, Constants.visual)
+        return decide_srl_rows(vr_cluster_1_2_3, kanji, source, Constants.visual)
+
+
+def sixth_rule(kanji: Kanji, categorization: Categorization, source: Source):
+    apply_decision(kanji, decide_sixth(kanji, source), categorization)
 
 
 def find_stem_variations(opt_component: str, source: Source, priority: int) -> Optional[Stem]:
     component = is_empty_string(opt_component)
     if component:
-        group = source.df_stem[
-            (source.df_stem[ExcelColumn.stem_component1] == component) |
-            (source.df_stem[ExcelColumn.stem_component2] == component) |
-            (source.df_stem[ExcelColumn.stem_component3] == component) |
-            (source.df_stem[ExcelColumn.stem_component4] == component) |
-            (source.df_stem[ExcelColumn.stem_component5] == component) |
-            (source.df_stem[ExcelColumn.stem_component6] == component)
-            ][ExcelColumn.group]
+        group = get_source_index(source).stem_variation_groups.get(component, [])
         if len(group) == 1:
-            return Stem(group.iloc[0], priority)
+            return Stem(group[0], priority)
         elif len(group) == 0:
             return None
         else:
@@ -212,8 +260,11 @@ def find_max_stem(stems: List[Stem]) -> Optional[Stem]:
     return max_stem
 
 
-def fifth_rule(kanji: Kanji, categorization: Categorization, source: Source, ignore_srl: bool):
-    logger.info("5. rule")
+def decide_fifth(kanji: Kanji, source: Source, ignore_srl: bool) -> Decision:
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule=Rule.stem_variation, ignore_srl=ignore_srl)
+    if profiling.enabled:
+        profiling.visit(Rule.stem_variation)
 
     max_stem = find_max_stem(
         [
@@ -224,112 +275,184 @@ def fifth_rule(kanji: Kanji, categorization: Categorization, source: Source, ign
     )
 
     if max_stem is None:
-        sixth_rule(kanji, categorization, source)
+        return decide_sixth(kanji, source)
+    if ignore_srl or kanji.srl != 1:
+        kanji_type = Constants.mean
     else:
-        if ignore_srl:
-            kanji.type = Constants.mean
-        else:
-            if kanji.srl == 1:
-                kanji.type = Constants.form
-            else:
-                kanji.type = Constants.mean
-        append_categorization(max_stem.group, kanji, False, categorization)
+        kanji_type = Constants.form
+    return Decision(kanji.char, Rule.stem_variation, type=kanji_type, group=max_stem.group)
 
 
-def fourth_rule(kanji: Kanji, categorization: Categorization, source: Source):
-    logger.info("4. rule")
+def fifth_rule(kanji: Kanji, categorization: Categorization, source: Source, ignore_srl: bool):
+    apply_decision(kanji, decide_fifth(kanji, source, ignore_srl), categorization)
+
+
+def decide_fourth(kanji: Kanji, source: Source) -> Decision:
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule=Rule.onyomi)
+    if profiling.enabled:
+        profiling.visit(Rule.onyomi)
     kanji_comp2 = is_empty_string(kanji.component2)
     if kanji_comp2 is not None:
-        vr_cluster = source.df_kanji[
-            ((source.df_kanji[ExcelColumn.char] == kanji.component2)
-             | (source.df_kanji[ExcelColumn.component2] == kanji.component2))
-            & (source.df_kanji[ExcelColumn.char] != kanji.char)
-        ]
-        if vr_cluster is None:
-            logger.info("empty vr_cluster")
-            fifth_rule(kanji, categorization, source, False)
-        else:
-            logger.info("vr clusters: {} components".format(len(vr_cluster)))
-            find_onyomi(kanji, vr_cluster, categorization, source)
+        index = get_source_index(source)
+        vr_cluster = read_source_kanji(find_row_positions(source, kanji.char,
+                                                          index.char_rows.get(kanji_comp2, []),
+                                                          index.component2_rows.get(kanji_comp2, [])), source)
+        if tracing.enabled:
+            tracing.event("vr_cluster", char=kanji.char, size=len(vr_cluster))
+        return decide_onyomi(kanji, vr_cluster, source)
     else:
-        fifth_rule(kanji, categorization, source, False)
+        return decide_fifth(kanji, source, False)
+
+
+def fourth_rule(kanji: Kanji, categorization: Categorization, source: Source):
+    apply_decision(kanji, decide_fourth(kanji, source), categorization)
 
 
 def categorize_queue(categorization: Categorization):
     del categorization.result[Constants.special_grp]
 
-    ds = DisjointSet()
-    for key in categorization.result:
-        for kanji in categorization.result[key]:
-            ds.union(kanji.char, key)
-    for key in categorization.queue:
-        for kanji in categorization.queue[key]:
-            ds.union(kanji.char, key)
+    uf = UnionFind()
+    uf.union_many((kanji.char, key) for key, group in categorization.result.items() for kanji in group)
+    uf.union_many((kanji.char, key) for key, group in categorization.queue.items() for kanji in group)
 
-    logger.info(ds)
+    if tracing.enabled:
+        tracing.event("queue", keys=len(uf), queued=sum(len(group) for group in categorization.queue.values()))
     for key in categorization.queue:
         for kanji in categorization.queue[key]:
-            categorization.result[ds.find(kanji.char)].append(kanji)
+            categorization.result[uf.find(kanji.char)].append(kanji)
 
 
-def categorize_kanji(kanji: Kanji, categorization: Categorization, source: Source):
+def decide(kanji: Kanji, source: Source) -> Decision:
+    """Evaluate the rule chain for one kanji without touching it or any categorization."""
+    if profiling.enabled:
+        return profiling.decide(_decide, kanji, source)
+    return _decide(kanji, source)
+
+
+def _decide(kanji: Kanji, source: Source) -> Decision:
     first_rule = find_keyword(kanji, source)
     second_rule = find_stem(kanji, source)
     special_rule = find_special(kanji, source)
 
     if first_rule is not None:
-        logger.info("1. rule")
+        if tracing.enabled:
+            tracing.event("rule", char=kanji.char, rule=Rule.keyword)
+        if profiling.enabled:
+            profiling.visit(Rule.keyword)
         if kanji.type == Constants.mean:
-            append_categorization(first_rule, kanji, False, categorization)
+            return Decision(kanji.char, Rule.keyword, group=first_rule)
         elif kanji.type == Constants.other:
-            append_categorization(Constants.other_grp, kanji, False, categorization)
+            return Decision(kanji.char, Rule.keyword, group=Constants.other_grp)
         else:
             print("ERROR: missing grp")
+            return Decision(kanji.char, Rule.missing)
     elif second_rule is not None:
-        logger.info("2. rule")
+        if tracing.enabled:
+            tracing.event("rule", char=kanji.char, rule=Rule.stem)
+        if profiling.enabled:
+            profiling.visit(Rule.stem)
         if kanji.type == Constants.stem:
-            append_categorization(second_rule, kanji, True, categorization)
+            return Decision(kanji.char, Rule.stem, group=second_rule, is_first=True)
         else:
             print("ERROR: missing rule")
+            return Decision(kanji.char, Rule.missing)
     elif special_rule is not None:
-        logger.info("special")
-        append_categorization(special_rule, kanji, False, categorization)
+        if tracing.enabled:
+            tracing.event("rule", char=kanji.char, rule=Rule.special)
+        if profiling.enabled:
+            profiling.visit(Rule.special)
+        return Decision(kanji.char, Rule.special, group=special_rule)
+
+    components_kanji = read_source_kanji(get_source_index(source).component2_rows.get(kanji.char, []), source)
+    if profiling.enabled:
+        profiling.scan(len(components_kanji))
+    if tracing.enabled:
+        tracing.event("components", char=kanji.char, count=len(components_kanji))
+    if not components_kanji:
+        return decide_fourth(kanji, source)
+
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule=Rule.crown)
+    if profiling.enabled:
+        profiling.visit(Rule.crown)
+    onyomi = find_kanji_on_reading(components_kanji, kanji)
+    if len(onyomi) == 0:
+        return decide_fourth(kanji, source)
+
+    if len(onyomi) > 1:
+        max_srl_kanji = find_max_srl_kanji(onyomi)
     else:
-        components = source.df_kanji[source.df_kanji[ExcelColumn.component2] == kanji.char]
-        logger.info("components count: " + str(len(components.index)))
-        if components.empty:
-            fourth_rule(kanji, categorization, source)
-        else:
-            logger.info("3. rule")
-            components_kanji = read_kanji_dataframe(components)
-            onyomi = find_kanji_on_reading(components_kanji, kanji)
-            if len(onyomi) == 0:
-                logger.info("onyomi empty")
-                fourth_rule(kanji, categorization, source)
-            else:
-                logger.info("3. rule a) b)")
-                if len(onyomi) > 1:
-                    logger.info("kanji > 1")
-                    max_srl_kanji = find_max_srl_kanji(onyomi)
-                else:
-                    logger.info("kanji = 1")
-                    max_srl_kanji = onyomi[0]
-
-                kanji.tags.append(Constants.crown_tag)
-                kanji.type = Constants.vr
-                if kanji.srl > max_srl_kanji.srl:
-                    fourth_rule(kanji, categorization, source)
-                else:
-                    add_to_queue(kanji, max_srl_kanji.char, categorization)
-
-
-def run_pipeline(filepath: str, log_level=None) -> tuple:
-    """Run the full categorization pipeline. Returns (categorization, source)."""
-    import logging
-    set_logging_level(log_level or logging.WARNING)
-    source = read_excel(filepath)
+        max_srl_kanji = onyomi[0]
+    if tracing.enabled:
+        _trace_onyomi(Rule.crown, kanji, onyomi, max_srl_kanji)
+
+    if kanji.srl > max_srl_kanji.srl:
+        # The crown tag and VR type stick even when rule 4 and later place the kanji
+        decision = decide_fourth(kanji, source)
+        return replace(decision, type=decision.type if decision.type is not None else Constants.vr, crown=True)
+    return Decision(kanji.char, Rule.crown, type=Constants.vr, ref=max_srl_kanji.char, crown=True)
+
+
+def apply_decision(kanji: Kanji, decision: Decision, categorization: Categorization):
+    """Fold one decision into the categorization, updating the kanji's type, tags and ref."""
+    if tracing.enabled:
+        tracing.event("decision", **asdict(decision))
+    if decision.type is not None:
+        kanji.type = decision.type
+    if decision.crown:
+        kanji.tags.append(Constants.crown_tag)
+    if decision.ref is not None:
+        add_to_queue(kanji, decision.ref, categorization)
+    elif decision.group is not None:
+        append_categorization(decision.group, kanji, decision.is_first, categorization)
+
+
+def apply_decisions(source: Source, kanji_list: List[Kanji], decisions: Iterable[Decision]) -> Categorization:
+    """Build a categorization from decisions aligned with ``kanji_list``, then resolve the queue."""
     categorization = init_categorization(source)
-    for kanji in read_kanji_dataframe(source.df_kanji):
-        categorize_kanji(kanji, categorization, source)
+    for kanji, decision in zip(kanji_list, decisions):
+        apply_decision(kanji, decision, categorization)
     categorize_queue(categorization)
+    return categorization
+
+
+def categorize_kanji(kanji: Kanji, categorization: Categorization, source: Source):
+    apply_decision(kanji, decide(kanji, source), categorization)
+
+
+def run_pipeline(filepath: str, log_level=None, use_cache: bool = True,
+                 snapshot_path: Optional[str] = None, use_result_store: bool = False) -> tuple:
+    """Run the full categorization pipeline. Returns (categorization, source).
+
+    With ``snapshot_path``, only kanji affected by workbook edits since the
+    snapshot was written are re-evaluated, and the snapshot is updated.
+
+    With ``use_result_store`` (and caching enabled), a categorization stored
+    for the same workbook contents and ``result_store.ALGORITHM_VERSION`` is
+    returned without running the rules, and a fresh one is stored.
+    """
+    import logging
+    set_logging_level(log_level or logging.WARNING)
+    source = read_excel(filepath, use_cache)
+    use_result_store = use_result_store and use_cache
+    if use_result_store:
+        import result_store
+        categorization = result_store.load(filepath)
+        if categorization is not None:
+            return categorization, source
+
+    if snapshot_path is not None:
+        import incremental
+        categorization, snapshot = incremental.categorize_incremental(
+            source, incremental.load_snapshot(snapshot_path))
+        incremental.save_snapshot(snapshot, snapshot_path)
+    else:
+        categorization = init_categorization(source)
+        for kanji in read_kanji_dataframe(source.df_kanji):
+            categorize_kanji(kanji, categorization, source)
+        categorize_queue(categorization)
+
+    if use_result_store:
+        result_store.store(filepath, categorization)
     return categorization, source
@@ -0,0 +1,78 @@
+"""Annotate Japanese text with the MBO group of each kanji.
+
+Text is read one line at a time and kanji are found with a single regular
+expression per line, so memory stays constant however large the corpus
+is: only the char table (one entry per categorized kanji) and the
+per-group coverage counters are kept.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Set, Tuple
+
+from model import Categorization
+
+# CJK unified ideographs (with extension A and the supplementary planes) and compatibility ideographs
+KANJI_PATTERN = re.compile("[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f]")
+
+
+@dataclass(frozen=True)
+class Annotation:
+    group: str
+    ref: str
+    type: str
+    srl: int
+    freq: int
+
+
+@dataclass
+class Coverage:
+    """Kanji token counts over an annotated corpus."""
+    tokens: int = 0
+    annotated: int = 0
+    groups: Counter = field(default_factory=Counter)
+    group_chars: Dict[str, Set[str]] = field(default_factory=dict)
+    unknown: Counter = field(default_factory=Counter)
+
+    def to_dict(self) -> Dict:
+        return {
+            "kanji_tokens": self.tokens,
+            "annotated_tokens": self.annotated,
+            "unknown_tokens": self.tokens - self.annotated,
+            "coverage": self.annotated / self.tokens if self.tokens else 0.0,
+            "groups": {group: {"tokens": count, "distinct": len(self.group_chars[group])}
+                       for group, count in sorted(self.groups.items())},
+            "unknown": dict(self.unknown.most_common()),
+        }
+
+
+def build_table(categorization: Categorization) -> Dict[str, Annotation]:
+    """char -> Annotation for every categorized kanji (its first placement)."""
+    table = {}
+    for group, kanji_list in categorization.result.items():
+        for k in kanji_list:
+            if k.char not in table:
+                table[k.char] = Annotation(group, k.ref, k.type, k.srl, k.freq)
+    return table
+
+
+def annotate_lines(lines: Iterable[str], table: Dict[str, Annotation],
+                   coverage: Coverage) -> Iterator[Tuple[int, int, str, Annotation]]:
+    """Yield ``(line, column, char, annotation)`` for each categorized kanji, 1-based.
+
+    Every kanji token, categorized or not, is counted in ``coverage``.
+    """
+    groups, group_chars, unknown = coverage.groups, coverage.group_chars, coverage.unknown
+    for line_no, line in enumerate(lines, 1):
+        for match in KANJI_PATTERN.finditer(line):
+            coverage.tokens += 1
+            char = match.group()
+            annotation = table.get(char)
+            if annotation is None:
+                unknown[char] += 1
+                continue
+            coverage.annotated += 1
+            groups[annotation.group] += 1
+            group_chars.setdefault(annotation.group, set()).add(char)
+            yield line_no, match.start() + 1, char, annotation
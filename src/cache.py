@@ -0,0 +1,112 @@
+"""On-disk cache of parsed workbooks.
+
+Entries are keyed by the workbook's absolute path and validated against its
+size, mtime and SHA-256 content hash, so an edited workbook is always
+re-parsed while a merely touched one still hits the cache.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Any, Optional
+
+from core import logger
+
+CACHE_VERSION = 1
+CACHE_DIR_ENV = "KANJI_MBO_CACHE_DIR"
+NO_CACHE_ENV = "KANJI_MBO_NO_CACHE"
+
+
+def cache_dir() -> str:
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "kanji-mbo")
+
+
+def cache_enabled() -> bool:
+    return os.environ.get(NO_CACHE_ENV, "") in ("", "0")
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_path(filename: str, kind: str, extension: str = "pickle") -> str:
+    key = hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir(), "{}.{}.{}".format(key, kind, extension))
+
+
+def workbook_header(filename: str, digest: Optional[str] = None) -> dict:
+    stat = os.stat(filename)
+    return {
+        "version": CACHE_VERSION,
+        "path": os.path.abspath(filename),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "digest": digest or file_digest(filename),
+    }
+
+
+def header_matches(header: dict, filename: str) -> bool:
+    """True if ``header`` (from ``workbook_header``) still describes ``filename``."""
+    stat = os.stat(filename)
+    if header.get("version") != CACHE_VERSION or header.get("size") != stat.st_size:
+        return False
+    return header.get("mtime") == stat.st_mtime_ns or header.get("digest") == file_digest(filename)
+
+
+def load(filename: str, kind: str) -> Optional[Any]:
+    """Return the cached payload for ``filename``, or None on a miss or stale entry."""
+    path = entry_path(filename, kind)
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if not header_matches(header, filename):
+                return None
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning("ignoring unreadable cache entry %s: %s", path, e)
+        return None
+    if header["mtime"] != mtime:
+        # Touched but not edited: record the new mtime so the next load skips the hash.
+        # The mtime is the one seen before hashing, so an edit since then still misses.
+        _write(path, dict(header, mtime=mtime), payload)
+    return payload
+
+
+def store(filename: str, kind: str, payload: Any):
+    _write(entry_path(filename, kind), workbook_header(filename), payload)
+
+
+def _write(path: str, header: dict, payload: Any):
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("could not write cache entry %s: %s", path, e)
+
+
+def clear() -> int:
+    """Delete all cache entries. Returns the number of files removed."""
+    directory = cache_dir()
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for name in os.listdir(directory):
+        if name.endswith((".pickle", ".sqlite")):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
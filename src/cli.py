@@ -5,120 +5,224 @@ import json
 import logging
 import sys
 from collections import defaultdict
-from dataclasses import asdict
+from contextlib import contextmanager, redirect_stdout
 
-import algorithm
+import writers
+
+# Heavy modules (algorithm -> pandas, genanki, ...) are imported inside the
+# commands that need them, so --help and cached lookups start fast.
 
 
 def _kanji_to_dict(kanji):
-    d = asdict(kanji)
-    d["on_reading"] = kanji.on_reading_str
-    d["components"] = kanji.components_str
-    return d
+    return writers.kanji_record(kanji)
 
 
 def _format_categorize_json(categorization):
-    output = {}
-    for key in sorted(categorization.result):
-        output[key] = [
-            _kanji_to_dict(k)
-            for k in sorted(categorization.result[key], key=lambda x: x.ref, reverse=True)
-        ]
-    return json.dumps(output, ensure_ascii=False, indent=2)
+    buf = io.StringIO()
+    writers.write_categorize_json(categorization, buf)
+    return buf.getvalue().rstrip("\n")
 
 
 def _format_categorize_csv(categorization):
     buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["group", "char", "ref", "keyword", "on_reading", "srl", "type", "freq"])
-    for key in sorted(categorization.result):
-        for k in sorted(categorization.result[key], key=lambda x: x.ref, reverse=True):
-            writer.writerow([key, k.char, k.ref, k.keyword,
-                             k.on_reading_str, k.srl, k.type, k.freq])
+    writers.write_categorize_csv(categorization, buf)
     return buf.getvalue()
 
 
 def _format_lookup_json(kanji_list):
-    return json.dumps([_kanji_to_dict(k) for k in kanji_list], ensure_ascii=False, indent=2)
+    buf = io.StringIO()
+    writers.write_lookup_json(kanji_list, buf)
+    return buf.getvalue().rstrip("\n")
 
 
 def _format_lookup_csv(kanji_list):
     buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["char", "keyword", "on_reading", "kun_reading", "components", "srl", "type", "freq", "group"])
-    for k in kanji_list:
-        writer.writerow([k.char, k.keyword, k.on_reading_str, k.kun_reading,
-                         k.components_str, k.srl, k.type, k.freq, k.group])
+    writers.write_lookup_csv(kanji_list, buf)
     return buf.getvalue()
 
 
-def run_categorize(args):
-    algorithm.set_logging_level(getattr(logging, args.log_level))
-    source = algorithm.read_excel(args.file)
-    categorization = algorithm.init_categorization(source)
+@contextmanager
+def _open_output(args):
+    """Yield the stream command output goes to: ``--output FILE`` or stdout."""
+    path = getattr(args, "output_path", None)
+    if not path or path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        yield f
 
-    if args.kanji:
-        for char in args.kanji:
-            kanji = algorithm.read_kanji_char(char, source)
-            algorithm.categorize_kanji(kanji, categorization, source)
-            print("-----------------")
-    else:
-        for kanji in algorithm.read_kanji_dataframe(source.df_kanji):
+
+def _json_indent(args):
+    return None if getattr(args, "compact", False) else 2
+
+
+def _use_cache(args):
+    return not getattr(args, "no_cache", False)
+
+
+def _categorize(args, algorithm, profiling):
+    with profiling.phase("read_excel"):
+        source = algorithm.read_excel(args.file, _use_cache(args))
+
+    if getattr(args, "snapshot", None) and not args.kanji:
+        import incremental
+        with profiling.phase("incremental"):
+            categorization, snapshot = incremental.categorize_incremental(
+                source, incremental.load_snapshot(args.snapshot))
+            incremental.save_snapshot(snapshot, args.snapshot)
+        return categorization
+
+    with profiling.phase("read_kanji"):
+        if args.kanji:
+            kanji_list = [algorithm.read_kanji_char(char, source) for char in args.kanji]
+        else:
+            kanji_list = algorithm.read_kanji_dataframe(source.df_kanji)
+
+    jobs = getattr(args, "jobs", 1) or 1
+    if jobs > 1:
+        import parallel
+        results = parallel.evaluate_parallel(source, kanji_list, jobs)
+        for _, output in results:
+            sys.stdout.write(output)
+        return algorithm.apply_decisions(source, kanji_list, [decision for decision, _ in results])
+
+    categorization = algorithm.init_categorization(source)
+    with profiling.phase("rules"):
+        for kanji in kanji_list:
             algorithm.categorize_kanji(kanji, categorization, source)
-            print("-----------------")
+    with profiling.phase("queue"):
+        algorithm.categorize_queue(categorization)
+    return categorization
+
+
+def _write_profile(args, profile):
+    if getattr(args, "profile", False):
+        print(profile.format_table(), file=sys.stderr)
+    if getattr(args, "profile_json", None):
+        with open(args.profile_json, "w", encoding="utf-8") as f:
+            json.dump(profile.to_dict(), f, ensure_ascii=False, indent=_json_indent(args))
+            f.write("\n")
+
+
+def run_categorize(args):
+    import algorithm
+    import profiling
 
-    algorithm.categorize_queue(categorization)
+    algorithm.set_logging_level(getattr(logging, args.log_level))
+    profile = None
+    if getattr(args, "profile", False) or getattr(args, "profile_json", None):
+        profile = profiling.enable()
+    try:
+        categorization = _categorize(args, algorithm, profiling)
+    finally:
+        profiling.disable()
+    if profile is not None:
+        _write_profile(args, profile)
+
+    if not args.kanji and _use_cache(args):
+        # Let anki, the site generator and the web app reuse this run
+        import result_store
+        result_store.store(args.file, categorization)
 
     fmt = getattr(args, "format", "text")
-    if fmt == "json":
-        print(_format_categorize_json(categorization))
-    elif fmt == "csv":
-        print(_format_categorize_csv(categorization), end="")
-    elif args.subgroups:
-        print("subgroup categorization")
-        for key in sorted(categorization.result):
-            print(key)
-            res = defaultdict(list)
-            for kanji in sorted(categorization.result[key], key=lambda x: x.ref, reverse=True):
-                kanji_group = kanji.group if kanji.group != '' else "companion"
-                res[kanji_group].append(kanji.char)
-            print(dict(sorted(res.items())))
-    else:
-        print("categorization")
-        for key in categorization.result:
-            print(key)
-            for kanji in sorted(categorization.result[key], key=lambda x: x.ref, reverse=True):
-                print(kanji.char, " (", kanji.ref, ")")
+    with _open_output(args) as out:
+        if fmt == "json":
+            writers.write_categorize_json(categorization, out, _json_indent(args))
+        elif fmt == "ndjson":
+            writers.write_categorize_ndjson(categorization, out)
+        elif fmt == "csv":
+            writers.write_categorize_csv(categorization, out)
+        elif args.subgroups:
+            print("subgroup categorization", file=out)
+            for key, group in writers.sorted_groups(categorization):
+                print(key, file=out)
+                res = defaultdict(list)
+                for kanji in group:
+                    kanji_group = kanji.group if kanji.group != '' else "companion"
+                    res[kanji_group].append(kanji.char)
+                print(dict(sorted(res.items())), file=out)
+        else:
+            print("categorization", file=out)
+            for key in categorization.result:
+                print(key, file=out)
+                for kanji in sorted(categorization.result[key], key=lambda x: x.ref, reverse=True):
+                    print(kanji.char, " (", kanji.ref, ")", file=out)
+
+
+def _db_path(args):
+    if getattr(args, "db", None):
+        return args.db
+    import kanji_db
+    return kanji_db.default_path(args.file)
+
+
+def _stdin_kanji(stream):
+    """Distinct kanji in ``stream``, in first-seen order; kana, punctuation and other text are skipped."""
+    from annotate import KANJI_PATTERN
+
+    seen = {}
+    for line in stream:
+        seen.update(dict.fromkeys(KANJI_PATTERN.findall(line)))
+    return list(seen)
 
 
 def run_lookup(args):
-    algorithm.set_logging_level(logging.WARNING)
-    source = algorithm.read_excel(args.file)
+    import kanji_db
+    import lookup_index
+
+    use_stdin = getattr(args, "stdin", False)
+    chars = list(args.kanji)
+    if use_stdin:
+        chars.extend(_stdin_kanji(sys.stdin))
+
+    use_cache = _use_cache(args)
+    conn = kanji_db.connect(_db_path(args), args.file) if use_cache or getattr(args, "db", None) else None
+    index = lookup_index.load(args.file) if use_cache and conn is None else None
+    if conn is not None:
+        try:
+            found, missing = kanji_db.lookup_many(conn, chars)
+        finally:
+            conn.close()
+    elif index is not None:
+        found, missing = lookup_index.find_many(index, chars)
+    else:
+        import algorithm
 
-    kanji_list = [algorithm.read_kanji_char(char, source) for char in args.kanji]
+        algorithm.set_logging_level(logging.WARNING)
+        source = algorithm.read_excel(args.file, use_cache)
+        if use_cache:
+            lookup_index.store(args.file, source.df_kanji)
+        found, missing = algorithm.read_kanji_chars(chars, source)
+
+    if missing:
+        if not use_stdin:
+            raise IndexError("kanji not found: {}".format(missing[0]))
+        print("not found: {}".format(" ".join(missing)), file=sys.stderr)
+    kanji_list = [found[char] for char in chars if char in found]
 
     fmt = getattr(args, "format", "text")
-    if fmt == "json":
-        print(_format_lookup_json(kanji_list))
-    elif fmt == "csv":
-        print(_format_lookup_csv(kanji_list), end="")
-    else:
-        for kanji in kanji_list:
-            print(f"Character:   {kanji.char}")
-            print(f"Keyword:     {kanji.keyword}")
-            print(f"On'yomi:     {kanji.on_reading_str}")
-            print(f"Kun'yomi:    {kanji.kun_reading}")
-            print(f"Components:  {kanji.components_str}")
-            print(f"SRL:         {kanji.srl}")
-            print(f"Type:        {kanji.type}")
-            print(f"Frequency:   {kanji.freq}")
-            print(f"Group:       {kanji.group}")
-            print("-----------------")
+    with _open_output(args) as out:
+        if fmt == "json":
+            writers.write_lookup_json(kanji_list, out, _json_indent(args))
+        elif fmt == "ndjson":
+            writers.write_lookup_ndjson(kanji_list, out)
+        elif fmt == "csv":
+            writers.write_lookup_csv(kanji_list, out)
+        else:
+            for kanji in kanji_list:
+                print(f"Character:   {kanji.char}", file=out)
+                print(f"Keyword:     {kanji.keyword}", file=out)
+                print(f"On'yomi:     {kanji.on_reading_str}", file=out)
+                print(f"Kun'yomi:    {kanji.kun_reading}", file=out)
+                print(f"Components:  {kanji.components_str}", file=out)
+                print(f"SRL:         {kanji.srl}", file=out)
+                print(f"Type:        {kanji.type}", file=out)
+                print(f"Frequency:   {kanji.freq}", file=out)
+                print(f"Group:       {kanji.group}", file=out)
+                print("-----------------", file=out)
 
 
 def run_freq(args):
-    from operator import attrgetter
-    from disjoint_set import DisjointSet
     import freq_algorithm
 
     freq_algorithm.set_logging_level(getattr(logging, args.log_level))
@@ -126,21 +230,11 @@ def run_freq(args):
     list_kanji = freq_algorithm.read_kanji_dataframe(df)
 
     result = []
+    index = freq_algorithm.build_index(list_kanji)
     for kanji in list_kanji:
-        freq_algorithm.categorize_kanji(kanji, result, list_kanji)
-
-    ds = DisjointSet()
-    for k in result:
-        ds.union(k.char, k.ref)
+        freq_algorithm.categorize_kanji(kanji, result, list_kanji, index)
 
-    # Collect ranked kanji from groups
-    ranked = []
-    for group in ds.itersets(with_canonical_elements=False):
-        group_kanji = sorted(
-            [k for k in list_kanji if k.char in group],
-            key=attrgetter('freq')
-        )
-        ranked.extend(group_kanji)
+    ranked = [k for group in freq_algorithm.rank_groups(list_kanji, result) for k in group]
 
     fmt = getattr(args, "format", "text")
     if fmt == "json":
@@ -160,8 +254,69 @@ def run_freq(args):
             print(f"{i + 1}: {k.char}")
 
 
+def _annotation_table(args):
+    """char -> Annotation from the stored categorization, running the pipeline on a miss."""
+    import annotate
+    import result_store
+
+    categorization = result_store.load(args.file) if _use_cache(args) else None
+    if categorization is None:
+        import algorithm
+
+        # Keep the rules' diagnostics out of the annotation stream
+        with redirect_stdout(sys.stderr):
+            categorization, _ = algorithm.run_pipeline(args.file, use_cache=_use_cache(args),
+                                                       use_result_store=True)
+    return annotate.build_table(categorization)
+
+
+def _print_coverage(coverage, out):
+    summary = coverage.to_dict()
+    print("kanji tokens: {}  annotated: {} ({:.1%})  unknown: {}".format(
+        summary["kanji_tokens"], summary["annotated_tokens"], summary["coverage"], summary["unknown_tokens"]),
+        file=out)
+    for group, counts in summary["groups"].items():
+        print("{:>8} {:>5}  {}".format(counts["tokens"], counts["distinct"], group), file=out)
+
+
+def run_annotate(args):
+    import annotate
+
+    table = _annotation_table(args)
+    coverage = annotate.Coverage()
+    if args.text in (None, "-"):
+        text = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    else:
+        text = open(args.text, encoding="utf-8", errors="replace")
+    with text:
+        tokens = annotate.annotate_lines(text, table, coverage)
+        if args.coverage_only:
+            for _ in tokens:
+                pass
+        else:
+            fmt = getattr(args, "format", "text")
+            with _open_output(args) as out:
+                if fmt == "json":
+                    writers.write_annotations_json(tokens, out, _json_indent(args))
+                elif fmt == "ndjson":
+                    writers.write_annotations_ndjson(tokens, out)
+                elif fmt == "csv":
+                    writers.write_annotations_csv(tokens, out)
+                else:
+                    writers.write_annotations_text(tokens, out)
+
+    if args.coverage:
+        with open(args.coverage, "w", encoding="utf-8") as f:
+            json.dump(coverage.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    else:
+        _print_coverage(coverage, sys.stdout if args.coverage_only else sys.stderr)
+
+
 def run_anki(args):
-    categorization, _ = algorithm.run_pipeline(args.file)
+    import algorithm
+
+    categorization, _ = algorithm.run_pipeline(args.file, use_cache=_use_cache(args), use_result_store=True)
 
     from anki_export import export_categorization
     path = export_categorization(categorization, args.output, args.deck_name)
@@ -169,6 +324,40 @@ def run_anki(args):
     print(f"Exported {total} kanji to {path}")
 
 
+def run_cache(args):
+    import cache
+
+    if args.action == "clear":
+        print(f"Removed {cache.clear()} cache entries from {cache.cache_dir()}")
+    else:
+        print(cache.cache_dir())
+
+
+def run_db(args):
+    import algorithm
+    import kanji_db
+
+    if args.action == "path":
+        print(_db_path(args))
+        return
+    categorization, source = algorithm.run_pipeline(args.file, use_cache=_use_cache(args), use_result_store=True)
+    path = kanji_db.build(args.file, source, categorization, _db_path(args))
+    total = sum(len(v) for v in categorization.result.values())
+    print(f"Wrote {len(source.df_kanji)} kanji and {total} categorized to {path}")
+
+
+def _configure_output(args):
+    import core
+
+    core.configure_logging()
+    if getattr(args, "trace", None):
+        import tracing
+        tracing.enable(tracing.JsonlSink(args.trace))
+    elif getattr(args, "log_level", None) == "DEBUG":
+        import tracing
+        tracing.enable(tracing.LogSink(core.logger))
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog="kanji-mbo",
@@ -187,9 +376,35 @@ def main():
     )
     parser.add_argument(
         "--format",
-        choices=["text", "json", "csv"],
+        choices=["text", "json", "ndjson", "csv"],
         default="text",
-        help="output format (default: text)"
+        help="output format (default: text); ndjson writes one kanji per line"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="with --format json, write compact JSON without indentation"
+    )
+    parser.add_argument(
+        "--output",
+        dest="output_path",
+        metavar="FILE",
+        help="write categorize/lookup output to FILE instead of stdout"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a JSON-lines trace of every rule decision to FILE (-l DEBUG logs it instead)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always re-parse the Excel file instead of using the parsed-workbook cache"
+    )
+    parser.add_argument(
+        "--db",
+        metavar="PATH",
+        help="SQLite database written by `db build` (default: in the cache directory)"
     )
 
     subparsers = parser.add_subparsers(dest="command", help="available commands")
@@ -206,14 +421,41 @@ def main():
         action="store_true",
         help="show subgroup breakdown instead of flat list"
     )
+    cat_parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="evaluate kanji in N worker processes (default: 1, serial)"
+    )
+    cat_parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="incremental mode: re-evaluate only kanji affected by edits since the snapshot at PATH"
+    )
+    cat_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-rule hit counts, latencies and index scans to stderr"
+    )
+    cat_parser.add_argument(
+        "--profile-json",
+        metavar="FILE",
+        help="write the per-rule profile, with latency histograms, as JSON to FILE"
+    )
 
     # lookup command
     lookup_parser = subparsers.add_parser("lookup", help="look up kanji data")
     lookup_parser.add_argument(
         "kanji",
-        nargs="+",
+        nargs="*",
         help="kanji characters to look up"
     )
+    lookup_parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="also look up every kanji in text read from stdin; chars not found are listed on stderr"
+    )
 
     # freq command (frequency-based grouping pipeline)
     freq_parser = subparsers.add_parser("freq", help="frequency-based kanji grouping")
@@ -224,6 +466,24 @@ def main():
         help="path to the frequency Excel data file"
     )
 
+    # annotate command (MBO group per kanji in a text corpus)
+    annotate_parser = subparsers.add_parser("annotate", help="annotate each kanji in a UTF-8 text with its MBO group")
+    annotate_parser.add_argument(
+        "text",
+        nargs="?",
+        help="text file to annotate, read line by line (default: stdin)"
+    )
+    annotate_parser.add_argument(
+        "--coverage",
+        metavar="FILE",
+        help="write per-group coverage counts as JSON to FILE instead of a summary on stderr"
+    )
+    annotate_parser.add_argument(
+        "--coverage-only",
+        action="store_true",
+        help="skip the per-kanji annotations and only report coverage"
+    )
+
     # anki command (export to Anki deck)
     anki_parser = subparsers.add_parser("anki", help="export categorization to Anki .apkg deck")
     anki_parser.add_argument(
@@ -237,7 +497,28 @@ def main():
         help="Anki deck name (default: Kanji MBO)"
     )
 
+    # cache command (parsed-workbook cache maintenance)
+    cache_parser = subparsers.add_parser("cache", help="manage the parsed-workbook cache")
+    cache_parser.add_argument(
+        "action",
+        choices=["clear", "path"],
+        help="clear: delete all cache entries; path: print the cache directory"
+    )
+
+    # db command (SQLite database for indexed lookup and search)
+    db_parser = subparsers.add_parser("db", help="build the SQLite kanji database")
+    db_parser.add_argument(
+        "action",
+        choices=["build", "path"],
+        help="build: write the database for --file; path: print where it is written"
+    )
+
     args = parser.parse_args()
+    if args.command == "lookup" and not args.kanji and not args.stdin:
+        lookup_parser.error("give kanji to look up or --stdin")
+    if args.command == "categorize" and (args.profile or args.profile_json) and args.jobs > 1:
+        cat_parser.error("--profile needs --jobs 1: worker processes are not profiled")
+    _configure_output(args)
 
     if args.command == "categorize":
         run_categorize(args)
@@ -245,8 +526,14 @@ def main():
         run_lookup(args)
     elif args.command == "freq":
         run_freq(args)
+    elif args.command == "annotate":
+        run_annotate(args)
     elif args.command == "anki":
         run_anki(args)
+    elif args.command == "db":
+        run_db(args)
+    elif args.command == "cache":
+        run_cache(args)
     else:
         parser.print_help()
         sys.exit(1)
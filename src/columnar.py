@@ -0,0 +1,74 @@
+"""Dictionary-encoded df_kanji columns with CSR row lookups.
+
+Chars and components are encoded against one shared vocabulary, so comparing
+a component column with a kanji char is an integer comparison. Each lookup
+("rows whose component2 is X") is stored in compressed sparse row form: the
+rows of key code ``k`` are ``indices[indptr[k]:indptr[k + 1]]``, ascending.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy
+import pandas
+
+EMPTY_ROWS = numpy.empty(0, dtype=numpy.intp)
+
+
+class RowIndex:
+    """Read-only mapping from a string key to the ascending df_kanji rows holding it."""
+
+    __slots__ = ("codes", "indptr", "indices")
+
+    def __init__(self, codes: Dict[str, int], indptr: numpy.ndarray, indices: numpy.ndarray):
+        self.codes = codes
+        self.indptr = indptr
+        self.indices = indices
+
+    def rows(self, code: int) -> numpy.ndarray:
+        if code < 0 or code + 1 >= len(self.indptr):
+            return EMPTY_ROWS
+        return self.indices[self.indptr[code]:self.indptr[code + 1]]
+
+    def get(self, key: str, default=None):
+        code = self.codes.get(key)
+        if code is None:
+            return default
+        rows = self.rows(code)
+        return rows if len(rows) else default
+
+    def __getitem__(self, key: str) -> numpy.ndarray:
+        rows = self.get(key)
+        if rows is None:
+            raise KeyError(key)
+        return rows
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return int(numpy.count_nonzero(numpy.diff(self.indptr)))
+
+
+def encode(columns: Sequence[List[str]]) -> Tuple[Dict[str, int], numpy.ndarray]:
+    """Encode equally long string columns against one vocabulary.
+
+    Returns the vocabulary (string -> code) and a ``(len(columns), n_rows)``
+    code matrix.
+    """
+    n_rows = len(columns[0]) if columns else 0
+    values = [value for column in columns for value in column]
+    codes, uniques = pandas.factorize(pandas.Series(values, dtype=object), sort=False)
+    vocabulary = {value: code for code, value in enumerate(uniques.tolist())}
+    return vocabulary, codes.astype(numpy.intp).reshape(len(columns), n_rows)
+
+
+def build_row_index(vocabulary: Dict[str, int], codes: numpy.ndarray) -> RowIndex:
+    """Group rows by the codes in ``codes`` (one row of codes per column), counting each row once per key."""
+    n_columns, n_rows = codes.shape
+    rows = numpy.tile(numpy.arange(n_rows, dtype=numpy.intp), n_columns)
+    # Sorting by (key, row) both groups the keys and keeps each key's rows ascending
+    pairs = numpy.unique(codes.ravel() * max(n_rows, 1) + rows)
+    keys, rows = numpy.divmod(pairs, max(n_rows, 1))
+    indptr = numpy.zeros(len(vocabulary) + 1, dtype=numpy.intp)
+    numpy.cumsum(numpy.bincount(keys, minlength=len(vocabulary)), out=indptr[1:])
+    return RowIndex(vocabulary, indptr, rows.astype(numpy.intp))
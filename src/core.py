@@ -1,12 +1,19 @@
+from __future__ import annotations
+
 import logging
-from typing import Optional, List, Callable, TypeVar
+from typing import TYPE_CHECKING, Optional, List, Callable, TypeVar
 
-import pandas
+if TYPE_CHECKING:
+    import pandas
 
 T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(format='%(asctime)s %(levelname)-4s %(message)s', datefmt='%m/%d %H:%M:%S')
+
+
+def configure_logging():
+    """Install the console log format; called by entry points, not on import."""
+    logging.basicConfig(format='%(asctime)s %(levelname)-4s %(message)s', datefmt='%m/%d %H:%M:%S')
 
 
 def set_logging_level(state):
@@ -21,7 +28,8 @@ def is_empty_string(value: str) -> Optional[str]:
 
 
 def read_kanji_dataframe(dataframe: pandas.DataFrame, read_fn: Callable) -> list:
-    return [read_fn(dataframe.iloc[i]) for i in range(len(dataframe.index))]
+    """Apply ``read_fn`` to every row, passed as a plain column->value dict rather than a Series."""
+    return [read_fn(row) for row in dataframe.to_dict("records")]
 
 
 def find_kanji_on_reading(vr_cluster_kanji: List[T], kanji: T,
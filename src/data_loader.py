@@ -1,42 +1,161 @@
 """Data loading module — reads Excel files and converts rows to domain objects."""
 
-from typing import List
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
 
+import numpy
 import pandas
 
-from model import Source, Kanji, ExcelColumn
+import cache
+from columnar import encode, build_row_index
+from model import Source, SourceIndex, Kanji, TagSet, ExcelColumn
 
+# Workbook sheets in Source order; read_parquet expects one <sheet>.parquet file per sheet
+PARQUET_SHEETS = ["MAIN", "keyword.list", "stem.list", "special.list"]
 
-def read_kanji(row: pandas.Series) -> Kanji:
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _make_kanji(char, component1, component2, component3, component4, component5, on_reading,
+                kun_reading, keyword, srl, type, freq, tags, group) -> Kanji:
+    # Components, readings, types and groups repeat across thousands of rows, so share one string each
+    char = _intern(char)
     return Kanji(
-        ref=row[ExcelColumn.char],
-        char=row[ExcelColumn.char],
-        component1=row[ExcelColumn.component1],
-        component2=row[ExcelColumn.component2],
-        component3=row[ExcelColumn.component3],
-        component4=row[ExcelColumn.component4],
-        component5=row[ExcelColumn.component5],
-        on_reading=row[ExcelColumn.on_reading].split(ExcelColumn.on_reading_delimiter),
-        kun_reading=row[ExcelColumn.kun_reading],
-        keyword=row[ExcelColumn.keyword],
-        srl=int(row[ExcelColumn.srl]),
-        type=row[ExcelColumn.type],
-        freq=int(row[ExcelColumn.freq]),
-        tags=list(row[ExcelColumn.tags]),
-        group=row[ExcelColumn.group],
+        ref=char,
+        char=char,
+        component1=_intern(component1),
+        component2=_intern(component2),
+        component3=_intern(component3),
+        component4=_intern(component4),
+        component5=_intern(component5),
+        on_reading=[sys.intern(r) for r in on_reading.split(ExcelColumn.on_reading_delimiter)],
+        kun_reading=_intern(kun_reading),
+        keyword=keyword,
+        srl=int(srl),
+        type=_intern(type),
+        freq=int(freq),
+        tags=TagSet(tags),
+        group=_intern(group),
     )
 
 
+def read_kanji(row: pandas.Series) -> Kanji:
+    return _make_kanji(*(row[col] for col in ExcelColumn.list_columns))
+
+
 def read_kanji_dataframe(dataframe: pandas.DataFrame) -> List[Kanji]:
-    return [read_kanji(dataframe.iloc[i]) for i in range(len(dataframe.index))]
+    """Build a fresh Kanji per row in one columnar pass, without a Series per row."""
+    columns = [dataframe[col].tolist() for col in ExcelColumn.list_columns]
+    return [_make_kanji(*values) for values in zip(*columns)]
+
+
+def read_source_kanji(rows: List[int], source: Source) -> List[Kanji]:
+    """Return shared Kanji for the given df_kanji rows, materializing the whole frame once.
+
+    The returned objects are reused across calls and must be treated as read-only.
+    """
+    index = get_source_index(source)
+    if index.kanji is None:
+        index.kanji = read_kanji_dataframe(source.df_kanji)
+    return [index.kanji[i] for i in rows]
 
 
 def read_kanji_char(char: str, source: Source) -> Kanji:
-    row = source.df_kanji[source.df_kanji[ExcelColumn.char] == char].iloc[0]
-    return read_kanji(row)
+    rows = get_source_index(source).char_rows.get(char)
+    if rows is None:
+        raise IndexError("kanji not found: {}".format(char))
+    return read_kanji(source.df_kanji.iloc[rows[0]])
+
+
+def read_kanji_chars(chars: Iterable[str], source: Source) -> Tuple[Dict[str, Kanji], List[str]]:
+    """Resolve many chars at once, like ``read_kanji_char`` on each.
+
+    Returns ``(found, missing)``: a fresh Kanji per distinct found char and
+    the distinct chars with no row, both in first-requested order. The rows
+    are read in a single columnar pass.
+    """
+    char_rows = get_source_index(source).char_rows
+    positions, missing = {}, []
+    for char in dict.fromkeys(chars):
+        rows = char_rows.get(char)
+        if rows is None:
+            missing.append(char)
+        else:
+            positions[char] = rows[0]
+    kanji_list = read_kanji_dataframe(source.df_kanji.take(list(positions.values())))
+    return dict(zip(positions, kanji_list)), missing
+
+
+def _first_occurrence(keys, values) -> Dict[str, str]:
+    res = {}
+    for key, value in zip(keys, values):
+        res.setdefault(key, value)
+    return res
+
 
+def _row_positions(*columns) -> Dict[str, List[int]]:
+    res = defaultdict(list)
+    for i, values in enumerate(zip(*columns)):
+        for value in dict.fromkeys(values):
+            res[value].append(i)
+    return dict(res)
 
-def read_excel(filename: str) -> Source:
+
+def build_source_index(source: Source) -> SourceIndex:
+    df_kanji = source.df_kanji
+    chars = df_kanji[ExcelColumn.char].tolist()
+    codes, matrix = encode([chars] + [df_kanji[col].tolist() for col in (
+        ExcelColumn.component1, ExcelColumn.component2, ExcelColumn.component3)])
+
+    stem_columns = [ExcelColumn.stem_component1, ExcelColumn.stem_component2,
+                    ExcelColumn.stem_component3, ExcelColumn.stem_component4,
+                    ExcelColumn.stem_component5, ExcelColumn.stem_component6]
+    stem_groups = source.df_stem[ExcelColumn.group].tolist()
+    stem_rows = _row_positions(*(source.df_stem[col].tolist() for col in stem_columns))
+
+    return SourceIndex(
+        chars=chars,
+        keyword_group=_first_occurrence(source.df_keyword[ExcelColumn.keyword].tolist(),
+                                        source.df_keyword[ExcelColumn.group].tolist()),
+        stem_group=_first_occurrence(source.df_stem[ExcelColumn.stem_kanji].tolist(), stem_groups),
+        stem_variation_groups={component: [stem_groups[i] for i in rows]
+                               for component, rows in stem_rows.items()},
+        special=set(source.df_special[ExcelColumn.kanji].tolist()),
+        codes=codes,
+        char_codes=matrix[0],
+        srl=numpy.array([int(srl) for srl in df_kanji[ExcelColumn.srl].tolist()], dtype=numpy.int64),
+        char_rows=build_row_index(codes, matrix[:1]),
+        component2_rows=build_row_index(codes, matrix[2:3]),
+        component_rows=build_row_index(codes, matrix[1:]),
+    )
+
+
+def get_source_index(source: Source) -> SourceIndex:
+    """Return the lookup index of a source, building it on first use."""
+    if source.index is None:
+        source.index = build_source_index(source)
+    return source.index
+
+
+def read_excel(filename: str, use_cache: bool = True) -> Source:
+    """Read a workbook into a Source, reusing the parsed-workbook cache when possible."""
+    use_cache = use_cache and cache.cache_enabled()
+    frames = cache.load(filename, "source") if use_cache else None
+    if frames is None:
+        frames = _parse_excel(filename)
+        if use_cache:
+            cache.store(filename, "source", frames)
+
+    source = Source(*frames)
+    source.index = build_source_index(source)
+    return source
+
+
+def _parse_excel(filename: str) -> tuple:
     df_kanji = pandas.read_excel(filename, sheet_name="MAIN")
     df_kanji.columns = ExcelColumn.list_columns
     df_kanji.fillna('', inplace=True)
@@ -49,4 +168,21 @@ def read_excel(filename: str) -> Source:
     df_special = pandas.read_excel(filename, sheet_name="special.list")
     df_special.fillna('', inplace=True)
 
-    return Source(df_kanji, df_keyword, df_stem, df_special)
+    return df_kanji, df_keyword, df_stem, df_special
+
+
+def read_parquet(directory: str) -> Source:
+    """Read a Source from one Parquet file per sheet, as written by ``synthetic.py --parquet``.
+
+    Needs the optional ``pyarrow`` dependency. Parquet keeps column types, so
+    it loads in a fraction of the time openpyxl takes on a large workbook.
+    """
+    frames = [pandas.read_parquet(os.path.join(directory, sheet + ".parquet")) for sheet in PARQUET_SHEETS]
+    df_kanji, df_keyword, df_stem, df_special = frames
+    df_kanji.columns = ExcelColumn.list_columns
+    for frame in (df_kanji, df_stem, df_special):
+        frame.fillna('', inplace=True)
+
+    source = Source(df_kanji, df_keyword, df_stem, df_special)
+    source.index = build_source_index(source)
+    return source
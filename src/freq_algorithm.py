@@ -4,11 +4,16 @@ Groups kanji by shared component2 and on'yomi, using frequency rank
 instead of SRL for ordering. Simpler than the main categorization pipeline.
 """
 
+import sys
+from collections import defaultdict
 from dataclasses import dataclass, replace
-from typing import List
+from operator import attrgetter
+from typing import Dict, List, Optional
 
 import pandas
 
+import tracing
+from union_find import UnionFind
 from core import (
     is_empty_string, set_logging_level, logger,
     find_kanji_on_reading as _find_kanji_on_reading,
@@ -20,6 +25,9 @@ from core import (
 
 @dataclass
 class FreqKanji:
+    __slots__ = ("ref", "char", "component1", "component2", "component3",
+                 "onyomi", "kunyomi", "keyword", "freq")
+
     ref: str
     char: str
     component1: str
@@ -55,22 +63,32 @@ class FreqExcelColumn:
 
 # --- Data loading ---
 
-def read_kanji(row: pandas.Series) -> FreqKanji:
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _make_kanji(char, component1, component2, component3, onyomi, kunyomi, keyword, freq) -> FreqKanji:
+    char = _intern(char)
     return FreqKanji(
-        char=row[FreqExcelColumn.kanji],
-        ref=row[FreqExcelColumn.kanji],
-        component1=row[FreqExcelColumn.component1],
-        component2=row[FreqExcelColumn.component2],
-        component3=row[FreqExcelColumn.component3],
-        onyomi=row[FreqExcelColumn.onyomi].split(FreqExcelColumn.onyomi_delimiter),
-        kunyomi=row[FreqExcelColumn.kunyomi],
-        keyword=row[FreqExcelColumn.keyword],
-        freq=int(row[FreqExcelColumn.freq]),
+        char=char,
+        ref=char,
+        component1=_intern(component1),
+        component2=_intern(component2),
+        component3=_intern(component3),
+        onyomi=[sys.intern(o) for o in onyomi.split(FreqExcelColumn.onyomi_delimiter)],
+        kunyomi=_intern(kunyomi),
+        keyword=keyword,
+        freq=int(freq),
     )
 
 
+def read_kanji(row: pandas.Series) -> FreqKanji:
+    return _make_kanji(*(row[col] for col in FreqExcelColumn.list_columns))
+
+
 def read_kanji_dataframe(dataframe: pandas.DataFrame) -> List[FreqKanji]:
-    return [read_kanji(dataframe.iloc[i]) for i in range(len(dataframe.index))]
+    columns = [dataframe[col].tolist() for col in FreqExcelColumn.list_columns]
+    return [_make_kanji(*values) for values in zip(*columns)]
 
 
 def read_kanji_char(kanji: str, source: FreqSource) -> FreqKanji:
@@ -99,37 +117,84 @@ def find_kanji_on_reading(vr_cluster_kanji: List[FreqKanji], kanji: FreqKanji) -
     return _find_kanji_on_reading(vr_cluster_kanji, kanji, lambda k: k.onyomi)
 
 
-def categorize_kanji(kanji: FreqKanji, result: List[FreqKanji], list_kanji: List[FreqKanji]):
-    components = []
-    for k in list_kanji:
-        if (kanji.component2 == k.component2 and kanji.component2 != '') or \
-                (kanji.char == k.component2 and kanji.char != '') or \
-                (kanji.component2 == k.char and kanji.component2 != ''):
-            components.append(k)
-
-    components_str = ', '.join(c.char for c in components)
-
-    logger.info(f"categorize: {kanji.char} | components: {len(components)} | {components_str}")
+@dataclass
+class FreqIndex:
+    """Inverted indexes over a kanji list, holding ascending list positions."""
+    component2: Dict[str, List[int]]
+    char: Dict[str, List[int]]
+    onyomi: Dict[str, frozenset]
+
+
+def build_index(list_kanji: List[FreqKanji]) -> FreqIndex:
+    component2, char, onyomi = defaultdict(list), defaultdict(list), defaultdict(set)
+    for i, k in enumerate(list_kanji):
+        if k.component2 != '':
+            component2[k.component2].append(i)
+        if k.char != '':
+            char[k.char].append(i)
+        for reading in k.onyomi:
+            if reading != '':
+                onyomi[reading].add(i)
+    return FreqIndex(dict(component2), dict(char), {r: frozenset(rows) for r, rows in onyomi.items()})
+
+
+def find_components(kanji: FreqKanji, index: FreqIndex) -> List[int]:
+    """Positions of kanji sharing component2 with ``kanji``, having it as component2, or being its component2."""
+    rows = set()
+    if kanji.component2 != '':
+        rows.update(index.component2.get(kanji.component2, ()))
+        rows.update(index.char.get(kanji.component2, ()))
+    if kanji.char != '':
+        rows.update(index.component2.get(kanji.char, ()))
+    return sorted(rows)
+
+
+def categorize_kanji(kanji: FreqKanji, result: List[FreqKanji], list_kanji: List[FreqKanji],
+                     index: Optional[FreqIndex] = None):
+    """Append ``kanji`` to ``result``, referencing the most frequent component sharing an on'yomi.
+
+    ``index`` must be built from ``list_kanji``; pass it when categorizing a
+    whole list so it is built once.
+    """
+    if index is None:
+        index = build_index(list_kanji)
+    components = find_components(kanji, index)
+
+    if tracing.enabled:
+        tracing.event("freq_components", char=kanji.char, components=lambda: [list_kanji[i].char for i in components])
 
     if len(components) == 0:
         result.append(kanji)
     else:
-        onyomi_list = []
-        for k_onyomi in kanji.onyomi:
-            for component in components:
-                for c_onyomi in component.onyomi:
-                    if k_onyomi == c_onyomi and k_onyomi != '':
-                        onyomi_list.append(component)
-
+        # Matches are ordered by the kanji's reading first, then list position
         seen_onyomi = set()
         new_onyomi_list = []
-        for obj in onyomi_list:
-            if obj.char not in seen_onyomi:
-                new_onyomi_list.append(obj)
-                seen_onyomi.add(obj.char)
+        for k_onyomi in kanji.onyomi:
+            readings_rows = index.onyomi.get(k_onyomi) if k_onyomi != '' else None
+            if not readings_rows:
+                continue
+            for i in components:
+                if i in readings_rows and list_kanji[i].char not in seen_onyomi:
+                    new_onyomi_list.append(list_kanji[i])
+                    seen_onyomi.add(list_kanji[i].char)
 
         if len(new_onyomi_list) != 0:
             new_kanji = replace(kanji, ref=min(new_onyomi_list, key=lambda o: o.freq).char)
             result.append(new_kanji)
         else:
             result.append(kanji)
+
+
+def rank_groups(list_kanji: List[FreqKanji], result: List[FreqKanji]) -> List[List[FreqKanji]]:
+    """Merge kanji linked by ``result`` refs into groups, each sorted by frequency rank.
+
+    Groups are ordered by their first member in ``list_kanji``, and kanji
+    with equal frequency keep their ``list_kanji`` order.
+    """
+    uf = UnionFind()
+    uf.union_many((k.char, k.ref) for k in result)
+
+    buckets = {}
+    for k in list_kanji:
+        buckets.setdefault(uf.find(k.char), []).append(k)
+    return [sorted(group, key=attrgetter('freq')) for group in buckets.values()]
@@ -1,13 +1,40 @@
-"""Generate a static HTML site in docs/ from Excel kanji data."""
-
+"""Generate a static HTML site in docs/ from Excel kanji data.
+
+Each workbook page inlines only a manifest of its groups (name, kanji
+count, shard file). The kanji of each group live in a JSON shard under
+``docs/data/<page>/``, named after a hash of its content so it can be
+cached forever, and the page fetches a shard when its group is opened.
+The page's size and first paint no longer grow with the workbook.
+
+Search runs on an inverted index prebuilt next to the shards and shipped
+gzipped: exact char and component lookups, and prefix lookups of keyword
+words and kana readings in sorted term lists. The page decompresses it
+with ``DecompressionStream`` on the first search, and each query then
+costs a few binary searches plus the size of its results.
+
+The page fetches its assets, so serve docs/ over HTTP (``python -m
+http.server -d docs``) to browse it locally.
+
+Builds are incremental: ``docs/data/build.json`` records what each page
+was built from, and only pages whose workbook, algorithm version or
+template version changed are rebuilt, in parallel processes.
+"""
+
+import argparse
+import gzip
+import hashlib
 import json
 import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from html import escape
 
 sys.path.insert(0, os.path.dirname(__file__))
 
 import algorithm
+import cache
+import result_store
 
 
 def build_groups_data(categorization):
@@ -32,9 +59,121 @@ def build_groups_data(categorization):
     return groups
 
 
-def generate_html(groups, title, filename):
-    total_kanji = sum(len(v) for v in groups.values())
-    groups_json = json.dumps(groups, ensure_ascii=False)
+# Shards store each kanji as an array in this field order, instead of repeating the keys
+SHARD_FIELDS = ["char", "ref", "keyword", "on_reading", "kun_reading", "components", "srl", "type", "freq", "group"]
+
+
+_WORD = re.compile(r"[^\W_]+")
+_KATAKANA = re.compile("[\u30a1-\u30f6]")
+# Okurigana separator and the ～ of suffix readings
+_READING_MARKS = re.compile("[\u30fb\uff5e]")
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _asset_name(prefix, data):
+    return prefix + hashlib.sha256(data).hexdigest()[:16]
+
+
+def normalize_reading(reading):
+    """Hiragana without okurigana marks, so セイ, せい and ひと・つ match as the page's search types them."""
+    return _READING_MARKS.sub("", _KATAKANA.sub(lambda m: chr(ord(m.group()) - 0x60), reading.lower()))
+
+
+def _postings(terms):
+    """``{term: ids}`` as ``[[term, ids], ...]`` sorted the way JavaScript compares strings (UTF-16)."""
+    return [[term, terms[term]] for term in sorted(terms, key=lambda t: t.encode("utf-16-be"))]
+
+
+def build_search_index(groups):
+    """The page's search index over ``groups``.
+
+    ``kanji`` holds one ``[char, keyword, on, kun, components, srl, group id]``
+    row per kanji in page order, and every list of ids points into it.
+    ``groups`` gives each group's id range. ``chars`` and ``components`` map
+    exact chars to ids. ``words`` (lowercased keyword words) and ``readings``
+    (normalized on'yomi and kun'yomi) are sorted for prefix lookups.
+    """
+    kanji, group_ranges = [], []
+    chars, components, words, readings = {}, {}, {}, {}
+
+    def add(index, term, i):
+        ids = index.setdefault(term, [])
+        if not ids or ids[-1] != i:
+            ids.append(i)
+
+    for group_id, (name, kanji_list) in enumerate(groups.items()):
+        group_ranges.append([name, len(kanji), len(kanji) + len(kanji_list)])
+        for k in kanji_list:
+            i = len(kanji)
+            kanji.append([k["char"], k["keyword"], k["on_reading"], k["kun_reading"], k["components"], k["srl"],
+                          group_id])
+            add(chars, k["char"], i)
+            if k["ref"] != k["char"]:
+                add(chars, k["ref"], i)
+            for component in k["components"].split():
+                add(components, component, i)
+            for word in _WORD.findall(k["keyword"].lower()):
+                add(words, word, i)
+            for reading in re.split("[、 ]", k["on_reading"] + "、" + k["kun_reading"]):
+                reading = normalize_reading(reading)
+                if reading:
+                    add(readings, reading, i)
+    return {"kanji": kanji, "groups": group_ranges, "chars": chars, "components": components,
+            "words": _postings(words), "readings": _postings(readings)}
+
+
+def build_site_data(groups, base):
+    """Split ``groups`` into content-addressed assets: one JSON shard per non-empty group and the search index.
+
+    Returns ``(manifest, assets)``: the manifest the page inlines, with asset
+    URLs relative to ``base``, and ``{file name: bytes}``.
+    """
+    entries, assets = [], {}
+    for name, kanji_list in groups.items():
+        shard = None
+        if kanji_list:
+            data = _dumps([[k[field] for field in SHARD_FIELDS] for k in kanji_list]).encode("utf-8")
+            shard = _asset_name("", data) + ".json"
+            assets[shard] = data
+        entries.append({"name": name, "count": len(kanji_list), "shard": shard})
+
+    # mtime=0 keeps the bytes, and so the name, stable across builds
+    data = gzip.compress(_dumps(build_search_index(groups)).encode("utf-8"), mtime=0)
+    search = _asset_name("search.", data) + ".json.gz"
+    assets[search] = data
+    return {"base": base, "fields": SHARD_FIELDS, "groups": entries, "search": search}, assets
+
+
+def write_assets(directory, assets):
+    """Write the assets missing from ``directory`` and delete the ones no longer listed.
+
+    An asset's name is its content hash, so one already on disk is never
+    rewritten. Returns the number of assets written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for name, data in assets.items():
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            continue
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        written += 1
+    for name in os.listdir(directory):
+        if name.endswith((".json", ".json.gz")) and name not in assets:
+            os.remove(os.path.join(directory, name))
+    return written
+
+
+def generate_html(manifest, title, filename):
+    total_kanji = sum(group["count"] for group in manifest["groups"])
+    # "</" would close the script element early
+    manifest_json = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
     title_esc = escape(title)
 
     return f"""<!DOCTYPE html>
@@ -105,7 +244,7 @@ body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans
   <a class="back" href="index.html">&larr; Index</a>
   <button class="menu-btn" onclick="toggleSidebar()">Groups</button>
   <h1>\u6f22 {title_esc}</h1>
-  <div class="stats">{len(groups)} groups &middot; {total_kanji} kanji &middot; {escape(filename)}</div>
+  <div class="stats">{len(manifest["groups"])} groups &middot; {total_kanji} kanji &middot; {escape(filename)}</div>
 </div>
 <div class="container">
   <div class="sidebar" id="sidebar">
@@ -127,13 +266,86 @@ body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans
   </div>
 </div>
 <script>
-const DATA = {groups_json};
-const groupNames = Object.keys(DATA);
+const MANIFEST = {manifest_json};
+const GROUPS = {{}};
+MANIFEST.groups.forEach(g => GROUPS[g.name] = g);
+const groupNames = MANIFEST.groups.map(g => g.name);
 let activeGroup = null;
 
-// Build flat search index for speed
-const ALL = [];
-groupNames.forEach(g => DATA[g].forEach(k => ALL.push({{...k, groupName: g}})));
+// Shard file -> promise of its kanji, fetched on first use
+const shards = new Map();
+
+function loadGroup(name) {{
+  const g = GROUPS[name];
+  if (!g || !g.shard) return Promise.resolve([]);
+  let kanji = shards.get(g.shard);
+  if (!kanji) {{
+    kanji = fetch(MANIFEST.base + g.shard)
+      .then(r => {{ if (!r.ok) throw new Error(r.status + ' ' + r.statusText); return r.json(); }})
+      .then(rows => rows.map(row => {{
+        const k = {{}};
+        MANIFEST.fields.forEach((f, i) => k[f] = row[i]);
+        return k;
+      }}));
+    // Let a failed fetch be retried
+    kanji.catch(() => shards.delete(g.shard));
+    shards.set(g.shard, kanji);
+  }}
+  return kanji;
+}}
+
+// The search index, fetched and decompressed on the first search only
+let searchIndex = null;
+
+function loadSearch() {{
+  if (!searchIndex) {{
+    searchIndex = fetch(MANIFEST.base + MANIFEST.search)
+      .then(r => {{ if (!r.ok) throw new Error(r.status + ' ' + r.statusText); return r.arrayBuffer(); }})
+      .then(buffer => {{
+        const bytes = new Uint8Array(buffer);
+        // The server may have sent it with Content-Encoding: gzip, already undone by the browser
+        if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) return new Response(bytes).json();
+        if (typeof DecompressionStream === 'undefined') throw new Error('this browser cannot decompress it');
+        return new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'))).json();
+      }});
+    searchIndex.catch(() => {{ searchIndex = null; }});
+  }}
+  return searchIndex;
+}}
+
+// Adds to out the ids of every term starting with prefix; terms are sorted [term, ids] pairs
+function prefixIds(terms, prefix, out) {{
+  let lo = 0, hi = terms.length;
+  while (lo < hi) {{
+    const mid = (lo + hi) >> 1;
+    if (terms[mid][0] < prefix) lo = mid + 1; else hi = mid;
+  }}
+  for (let i = lo; i < terms.length && terms[i][0].startsWith(prefix); i++) terms[i][1].forEach(id => out.add(id));
+  return out;
+}}
+
+// Readings are indexed in hiragana without okurigana marks, as normalize_reading() does
+function kana(s) {{
+  return s.replace(/[ァ-ヶ]/g, c => String.fromCharCode(c.charCodeAt(0) - 0x60)).replace(/[・～]/g, '');
+}}
+
+function findKanji(index, raw) {{
+  const q = raw.toLowerCase();
+  const ids = new Set([...(index.chars[raw] || []), ...(index.components[raw] || [])]);
+  const reading = kana(q);
+  if (reading) prefixIds(index.readings, reading, ids);
+  // Every word of the query must start a word of the keyword
+  let matched = null;
+  (q.match(/[\\p{{L}}\\p{{N}}]+/gu) || []).forEach(word => {{
+    const hits = prefixIds(index.words, word, new Set());
+    matched = matched ? new Set([...matched].filter(id => hits.has(id))) : hits;
+  }});
+  if (matched) matched.forEach(id => ids.add(id));
+  index.groups.forEach(([name, start, end]) => {{
+    if (name.toLowerCase().includes(q)) for (let i = start; i < end; i++) ids.add(i);
+  }});
+  return [...ids].sort((a, b) => a - b);
+}}
 
 function toggleSidebar() {{
   document.getElementById('sidebar').classList.toggle('open');
@@ -145,19 +357,29 @@ function renderSidebar(filter) {{
   list.innerHTML = groupNames
     .filter(g => !f || g.toLowerCase().includes(f))
     .map(g => `<div class="group-item ${{g === activeGroup ? 'active' : ''}}" onclick="selectGroup('${{g.replace(/'/g, "\\\\'")}}')">
-      ${{esc(g)}} <span class="count">${{DATA[g].length}}</span></div>`).join('');
+      ${{esc(g)}} <span class="count">${{GROUPS[g].count}}</span></div>`).join('');
 }}
 
-function selectGroup(name) {{
+async function selectGroup(name) {{
   activeGroup = name;
   renderSidebar(document.getElementById('groupFilter').value);
   document.getElementById('sidebar').classList.remove('open');
   switchTab('groups');
-  const kanji = DATA[name];
-  if (!kanji || kanji.length === 0) {{
-    document.getElementById('groupContent').innerHTML = '<div class="empty">Empty group</div>';
+  const content = document.getElementById('groupContent');
+  if (!GROUPS[name] || GROUPS[name].count === 0) {{
+    content.innerHTML = '<div class="empty">Empty group</div>';
+    return;
+  }}
+  content.innerHTML = '<div class="empty">Loading...</div>';
+  let kanji;
+  try {{
+    kanji = await loadGroup(name);
+  }} catch (e) {{
+    if (activeGroup === name) content.innerHTML = '<div class="empty">Could not load group: ' + esc(e.message) + '</div>';
     return;
   }}
+  // Another group was opened while this one loaded
+  if (activeGroup !== name) return;
   let html = `<div class="group-title">${{esc(name)}} <span class="count">(${{kanji.length}} kanji)</span></div><div class="kanji-grid">`;
   kanji.forEach(k => {{
     html += `<div class="kanji-card">
@@ -175,7 +397,7 @@ function selectGroup(name) {{
     </div>`;
   }});
   html += '</div>';
-  document.getElementById('groupContent').innerHTML = html;
+  content.innerHTML = html;
 }}
 
 function filterGroups() {{
@@ -191,31 +413,33 @@ function switchTab(tab) {{
   if (tab === 'search') document.getElementById('searchInput').focus();
 }}
 
-function doSearch() {{
+async function doSearch() {{
   const raw = document.getElementById('searchInput').value.trim();
   const el = document.getElementById('searchResults');
   if (!raw) {{ el.innerHTML = '<div class="empty">Type to search (e.g. \u9752, blue, \u30bb\u30a4)</div>'; return; }}
-  const q = raw.toLowerCase();
-  const results = ALL.filter(k =>
-    k.char === raw ||
-    k.ref === raw ||
-    k.keyword.toLowerCase().includes(q) ||
-    k.on_reading.toLowerCase().includes(q) ||
-    k.kun_reading.toLowerCase().includes(q) ||
-    k.components.includes(raw) ||
-    k.groupName.toLowerCase().includes(q)
-  );
+  let index;
+  try {{
+    index = await loadSearch();
+  }} catch (e) {{
+    el.innerHTML = '<div class="empty">Could not load the search index: ' + esc(e.message) + '</div>';
+    return;
+  }}
+  // A later keystroke has started its own search
+  if (document.getElementById('searchInput').value.trim() !== raw) return;
+  const results = findKanji(index, raw);
   if (results.length === 0) {{ el.innerHTML = '<div class="empty">No results for "' + esc(raw) + '"</div>'; return; }}
-  el.innerHTML = results.slice(0, 300).map(k =>
-    `<div class="search-result" onclick="selectGroup('${{k.groupName.replace(/'/g, "\\\\'")}}')">
-      <div class="sr-char">${{esc(k.char)}}</div>
+  el.innerHTML = results.slice(0, 300).map(id => {{
+    const [char, keyword, onReading, kunReading, components, srl, group] = index.kanji[id];
+    const groupName = index.groups[group][0];
+    return `<div class="search-result" onclick="selectGroup('${{groupName.replace(/'/g, "\\\\'")}}')">
+      <div class="sr-char">${{esc(char)}}</div>
       <div class="sr-info">
-        <span class="sr-keyword">${{esc(k.keyword)}}</span>
-        <div class="sr-detail">On: ${{esc(k.on_reading)}} &middot; Kun: ${{esc(k.kun_reading)}}</div>
-        <div class="sr-meta">Group: ${{esc(k.groupName)}} &middot; Components: ${{esc(k.components)}} &middot; SRL: ${{k.srl}}</div>
+        <span class="sr-keyword">${{esc(keyword)}}</span>
+        <div class="sr-detail">On: ${{esc(onReading)}} &middot; Kun: ${{esc(kunReading)}}</div>
+        <div class="sr-meta">Group: ${{esc(groupName)}} &middot; Components: ${{esc(components)}} &middot; SRL: ${{srl}}</div>
       </div>
-    </div>`
-  ).join('') + (results.length > 300 ? `<div class="empty">${{results.length - 300}} more...</div>` : '');
+    </div>`;
+  }}).join('') + (results.length > 300 ? `<div class="empty">${{results.length - 300}} more...</div>` : '');
 }}
 
 function esc(s) {{ const d = document.createElement('div'); d.textContent = s || ''; return d.innerHTML; }}
@@ -295,52 +519,155 @@ th {{ background: #1e2130; color: #e8eaf0; }}
     print(f"  -> changelog.html")
 
 
-def main():
-    docs_dir = os.path.join(os.path.dirname(__file__), "..", "docs")
-    os.makedirs(docs_dir, exist_ok=True)
-
-    excel_dir = os.path.join(os.path.dirname(__file__), "..", "excel")
-
-    files = [
-        ("1500 KANJI COMPONENTS - ver. 1.3.xlsx", "Kanji MBO — 1500 Kanji"),
-        ("2250 KANJI COMPONENTS - ver. 1.0.xlsx", "Kanji MBO — 2250 Kanji"),
-    ]
-
-    generated = []
+# Bump whenever a change to the page, shard, search index or changelog templates alters the output
+TEMPLATE_VERSION = 1
+
+BUILD_MANIFEST = "build.json"
+
+WORKBOOKS = [
+    ("1500 KANJI COMPONENTS - ver. 1.3.xlsx", "Kanji MBO — 1500 Kanji"),
+    ("2250 KANJI COMPONENTS - ver. 1.0.xlsx", "Kanji MBO — 2250 Kanji"),
+]
+
+
+def page_name(filename):
+    safe_name = filename.replace(" ", "_").replace(".", "_").replace("-", "_").lower()
+    return safe_name.rsplit("_xlsx", 1)[0]
+
+
+def load_build_manifest(docs_dir):
+    """The ``docs/data/build.json`` of the last build, or an empty one if missing or unreadable."""
+    try:
+        with open(os.path.join(docs_dir, "data", BUILD_MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"pages": {}, "changelog": None}
+    manifest.setdefault("pages", {})
+    manifest.setdefault("changelog", None)
+    return manifest
+
+
+def _write_text(path, text):
+    """Atomically write ``text`` to ``path`` unless it already holds it; True if written."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+
+def build_page(docs_dir, filepath, title, digest):
+    """Run the pipeline on one workbook and write its page and assets.
+
+    Returns the page's build manifest entry. Runs in a worker process when
+    several workbooks are stale.
+    """
+    categorization, source = algorithm.run_pipeline(filepath, use_result_store=True)
+    groups = build_groups_data(categorization)
+    name = page_name(os.path.basename(filepath))
+    manifest, assets = build_site_data(groups, f"data/{name}/")
+    write_assets(os.path.join(docs_dir, "data", name), assets)
+    _write_text(os.path.join(docs_dir, name + ".html"), generate_html(manifest, title, os.path.basename(filepath)))
+    return {
+        "workbook": digest,
+        "algorithm_version": result_store.ALGORITHM_VERSION,
+        "template_version": TEMPLATE_VERSION,
+        "title": title,
+        "groups": len(groups),
+        "kanji": sum(len(v) for v in groups.values()),
+        "assets": sorted(assets),
+    }
+
+
+def _page_current(entry, docs_dir, name, title, digest):
+    if (entry is None
+            or entry.get("workbook") != digest
+            or entry.get("algorithm_version") != result_store.ALGORITHM_VERSION
+            or entry.get("template_version") != TEMPLATE_VERSION
+            or entry.get("title") != title
+            or entry.get("assets") is None):
+        return False
+    # The page only works if its shards and search index are still there
+    paths = [os.path.join(docs_dir, name + ".html")]
+    paths += [os.path.join(docs_dir, "data", name, asset) for asset in entry["assets"]]
+    return all(os.path.exists(path) for path in paths)
+
+
+def build_site(docs_dir, excel_dir, files=WORKBOOKS, changelog_md=None, jobs=None, force=False):
+    """Build the site into ``docs_dir``, rebuilding only what changed since the last build.
+
+    A page is rebuilt when its workbook's content hash,
+    ``result_store.ALGORITHM_VERSION`` or ``TEMPLATE_VERSION`` differs from
+    its entry in ``docs/data/build.json``, or when the page or one of the
+    assets that entry lists is missing; the stale workbooks run in up to
+    ``jobs`` processes. The changelog is re-rendered only when
+    ``changelog_md`` changed. Returns the names of the files rebuilt.
+    """
+    os.makedirs(os.path.join(docs_dir, "data"), exist_ok=True)
+    previous = load_build_manifest(docs_dir)
+    build = {"pages": {}, "changelog": None}
+    stale = []
     for filename, title in files:
         filepath = os.path.join(excel_dir, filename)
         if not os.path.exists(filepath):
             print(f"Skipping {filename} (not found)")
             continue
+        name = page_name(filename)
+        html_name = name + ".html"
+        digest = cache.file_digest(filepath)
+        entry = previous["pages"].get(html_name)
+        if not force and _page_current(entry, docs_dir, name, title, digest):
+            print(f"  -- {html_name} (up to date)")
+            build["pages"][html_name] = entry
+        else:
+            stale.append((html_name, filepath, title, digest))
+            build["pages"][html_name] = None
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(stale)))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(build_page, docs_dir, filepath, title, digest)
+                       for _, filepath, title, digest in stale]
+            entries = [future.result() for future in futures]
+    else:
+        entries = [build_page(docs_dir, filepath, title, digest) for _, filepath, title, digest in stale]
+    for (html_name, _, _, _), entry in zip(stale, entries):
+        print(f"  -> {html_name} ({entry['groups']} groups, {entry['kanji']} kanji)")
+        build["pages"][html_name] = entry
+    rebuilt = [html_name for html_name, _, _, _ in stale]
+
+    if changelog_md and os.path.exists(changelog_md):
+        build["changelog"] = {"source": cache.file_digest(changelog_md), "template_version": TEMPLATE_VERSION}
+        if force or build["changelog"] != previous["changelog"] \
+                or not os.path.exists(os.path.join(docs_dir, "changelog.html")):
+            generate_changelog(changelog_md, docs_dir)
+            rebuilt.append("changelog.html")
+
+    pages = [(html_name, entry["title"], entry["groups"], entry["kanji"])
+             for html_name, entry in build["pages"].items()]
+    if _write_text(os.path.join(docs_dir, "index.html"), generate_index(pages)):
+        print(f"  -> index.html")
+        rebuilt.append("index.html")
+    _write_text(os.path.join(docs_dir, "data", BUILD_MANIFEST), json.dumps(build, ensure_ascii=False, indent=1))
+    return rebuilt
+
 
-        print(f"Processing {filename}...")
-        categorization, source = algorithm.run_pipeline(filepath)
-        groups = build_groups_data(categorization)
-
-        safe_name = filename.replace(" ", "_").replace(".", "_").replace("-", "_").lower()
-        html_name = safe_name.rsplit("_xlsx", 1)[0] + ".html"
-        html_path = os.path.join(docs_dir, html_name)
-
-        html = generate_html(groups, title, filename)
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html)
-
-        total = sum(len(v) for v in groups.values())
-        print(f"  -> {html_name} ({len(groups)} groups, {total} kanji)")
-        generated.append((html_name, title, len(groups), total))
-
-    # Generate changelog page from CHANGELOG.md
-    changelog_md = os.path.join(os.path.dirname(__file__), "..", "CHANGELOG.md")
-    if os.path.exists(changelog_md):
-        generate_changelog(changelog_md, docs_dir)
-
-    # Generate index page
-    index_html = generate_index(generated)
-    index_path = os.path.join(docs_dir, "index.html")
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write(index_html)
-    print(f"  -> index.html")
-    print("Done!")
+def main():
+    parser = argparse.ArgumentParser(description="Build the docs site pages from the workbooks in excel/")
+    parser.add_argument("--force", action="store_true", help="rebuild every page, even when up to date")
+    parser.add_argument("--jobs", "-j", type=int, help="worker processes for stale workbooks (default: CPUs)")
+    args = parser.parse_args()
+
+    root = os.path.join(os.path.dirname(__file__), "..")
+    rebuilt = build_site(os.path.join(root, "docs"), os.path.join(root, "excel"),
+                         changelog_md=os.path.join(root, "CHANGELOG.md"), jobs=args.jobs, force=args.force)
+    print(f"Done! ({len(rebuilt)} files rebuilt)")
 
 
 def generate_index(pages):
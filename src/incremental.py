@@ -0,0 +1,133 @@
+"""Incremental re-categorization against a snapshot of the previous run.
+
+Rule evaluation is pure (``algorithm.decide``), so a run is recorded as one
+Decision per kanji. After a workbook edit only the kanji whose lookups can see
+an edited row are re-evaluated; all decisions are then applied in source order,
+which reproduces the queue flushes and the union-find resolution of a full run.
+A snapshot taken by another ``result_store.ALGORITHM_VERSION`` is not reused.
+"""
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import result_store
+from model import Source, Categorization, Decision, Kanji, ExcelColumn
+from data_loader import read_kanji_dataframe
+from core import logger
+
+SNAPSHOT_VERSION = 2
+
+
+@dataclass
+class Snapshot:
+    tables: str
+    order: List[str]
+    rows: Dict[str, tuple]
+    decisions: Dict[str, Decision]
+    version: int = SNAPSHOT_VERSION
+    algorithm_version: Optional[int] = None
+
+
+@dataclass
+class IncrementalStats:
+    total: int = 0
+    recomputed: Set[str] = field(default_factory=set)
+
+
+def _tables_digest(source: Source) -> str:
+    digest = hashlib.sha1()
+    for df in (source.df_keyword, source.df_stem, source.df_special):
+        digest.update(pickle.dumps((list(df.columns), df.values.tolist())))
+    return digest.hexdigest()
+
+
+def _exposed_keys(row: tuple) -> Set[tuple]:
+    """Lookup keys under which a df_kanji row can be found by the rules."""
+    char, component1, component2, component3 = row[:4]
+    keys = {("char", char), ("component2", component2)}
+    keys.update(("component", c) for c in (component1, component2, component3))
+    return {key for key in keys if key[1] != ""}
+
+
+def _lookup_keys(kanji: Kanji) -> List[tuple]:
+    """Lookup keys the rules query for a kanji (rules 3, 4 and 6)."""
+    return [("component2", kanji.char), ("char", kanji.component2), ("component2", kanji.component2),
+            ("component", kanji.char), ("char", kanji.component1)]
+
+
+def _dirty_chars(snapshot: Optional[Snapshot], tables: str, order: List[str],
+                 rows: Dict[str, tuple], kanji_list: List[Kanji]) -> Optional[Set[str]]:
+    """Chars whose outcome may differ from the snapshot, or None if everything must be recomputed."""
+    if snapshot is None or snapshot.version != SNAPSHOT_VERSION or snapshot.tables != tables:
+        return None
+    if snapshot.algorithm_version != result_store.ALGORITHM_VERSION:
+        return None
+    if len(rows) != len(order):
+        return None
+    # Tie-breaks follow row order, so moved rows invalidate everything
+    kept_new = [c for c in order if c in snapshot.rows]
+    kept_old = [c for c in snapshot.order if c in rows]
+    if kept_new != kept_old:
+        return None
+
+    changed = {c for c in rows if snapshot.rows.get(c) != rows[c]}
+    changed.update(c for c in snapshot.rows if c not in rows)
+
+    touched = set()
+    for char in changed:
+        for row in (snapshot.rows.get(char), rows.get(char)):
+            if row is not None:
+                touched |= _exposed_keys(row)
+
+    dirty = {c for c in changed if c in rows}
+    for kanji in kanji_list:
+        if any(key in touched for key in _lookup_keys(kanji)):
+            dirty.add(kanji.char)
+    return dirty
+
+
+def categorize_incremental(source: Source, snapshot: Optional[Snapshot] = None,
+                           stats: Optional[IncrementalStats] = None) -> Tuple[Categorization, Snapshot]:
+    """Categorize ``source``, re-evaluating only kanji affected by changes since ``snapshot``."""
+    tables = _tables_digest(source)
+    order = source.df_kanji[ExcelColumn.char].tolist()
+    rows = dict(zip(order, source.df_kanji[ExcelColumn.list_columns].itertuples(index=False, name=None)))
+    kanji_list = read_kanji_dataframe(source.df_kanji)
+
+    dirty = _dirty_chars(snapshot, tables, order, rows, kanji_list)
+    if dirty is None:
+        dirty = set(rows)
+    import algorithm
+
+    decisions = [algorithm.decide(kanji, source) if kanji.char in dirty else snapshot.decisions[kanji.char]
+                 for kanji in kanji_list]
+    logger.info("incremental: re-evaluated %d of %d kanji", len(dirty), len(kanji_list))
+    if stats is not None:
+        stats.total = len(kanji_list)
+        stats.recomputed = dirty
+
+    categorization = algorithm.apply_decisions(source, kanji_list, decisions)
+    return categorization, Snapshot(tables, order, rows, dict(zip(order, decisions)),
+                                    algorithm_version=result_store.ALGORITHM_VERSION)
+
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning("ignoring unreadable snapshot %s: %s", path, e)
+        return None
+    return snapshot if isinstance(snapshot, Snapshot) else None
+
+
+def save_snapshot(snapshot: Snapshot, path: str):
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
@@ -0,0 +1,237 @@
+"""SQLite database of a workbook and its categorization.
+
+``kanji-mbo db build`` materializes both into one file (by default in the
+cache directory, next to the parsed workbook) so lookup and search are
+index probes instead of scans over pandas frames:
+
+- ``kanji``: one row per workbook row, in workbook order, indexed on char,
+  keyword and the workbook's GROUP column
+- ``onyomi`` / ``component``: normalized on'yomi readings and components
+- ``result_group`` / ``result``: the categorization; each kanji's group,
+  position in it, and the ref, type and tags the rules gave it
+- ``keyword_fts``: FTS5 trigram index over keywords, for substring search
+- ``meta``: schema and algorithm versions plus the workbook header the
+  database was built from, so a database for an edited workbook is stale
+
+Querying only needs the standard library and ``model``.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+import cache
+import result_store
+from model import Categorization, Kanji
+
+if TYPE_CHECKING:
+    from model import Source
+
+SCHEMA_VERSION = 1
+KIND = "db"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE kanji (
+    id INTEGER PRIMARY KEY,
+    char TEXT NOT NULL,
+    component1 TEXT NOT NULL, component2 TEXT NOT NULL, component3 TEXT NOT NULL,
+    component4 TEXT NOT NULL, component5 TEXT NOT NULL,
+    on_reading TEXT NOT NULL,
+    kun_reading TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    srl INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    freq INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    "group" TEXT NOT NULL
+);
+CREATE INDEX kanji_char ON kanji (char);
+CREATE INDEX kanji_keyword ON kanji (keyword COLLATE NOCASE);
+CREATE INDEX kanji_group ON kanji ("group");
+CREATE TABLE onyomi (kanji_id INTEGER NOT NULL, position INTEGER NOT NULL, reading TEXT NOT NULL);
+CREATE INDEX onyomi_reading ON onyomi (reading);
+CREATE TABLE component (kanji_id INTEGER NOT NULL, position INTEGER NOT NULL, component TEXT NOT NULL);
+CREATE INDEX component_component ON component (component);
+CREATE TABLE result_group (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE result (
+    group_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    kanji_id INTEGER NOT NULL,
+    ref TEXT NOT NULL,
+    type TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    PRIMARY KEY (group_id, position)
+) WITHOUT ROWID;
+CREATE INDEX result_kanji ON result (kanji_id);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE keyword_fts USING fts5(keyword, content='kanji', content_rowid='id', tokenize='trigram');
+INSERT INTO keyword_fts (rowid, keyword) SELECT id, keyword FROM kanji;
+"""
+
+# Kanji fields after ``ref``; a result row overrides the workbook's type and tags
+_KANJI_COLUMNS = ('k.char, k.component1, k.component2, k.component3, k.component4, k.component5, '
+                  'k.on_reading, k.kun_reading, k.keyword, k.srl, {type}, k.freq, {tags}, k."group"')
+
+_LOOKUP_MANY_SQL = ("SELECT k.char, " + _KANJI_COLUMNS.format(type="k.type", tags="k.tags")
+                    + " FROM kanji k WHERE k.id IN (SELECT MIN(id) FROM kanji"
+                      " WHERE char IN (SELECT value FROM json_each(?)) GROUP BY char)")
+
+
+def default_path(filename: str) -> str:
+    return cache.entry_path(filename, KIND, "sqlite")
+
+
+def build(filename: str, source: "Source", categorization: Categorization, path: Optional[str] = None) -> str:
+    """Write the database for ``filename`` to ``path`` (default: ``default_path``) and return the path."""
+    from data_loader import read_kanji_dataframe
+
+    path = path or default_path(filename)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+        kanji_rows, onyomi_rows, component_rows, first_id = [], [], [], {}
+        for i, k in enumerate(read_kanji_dataframe(source.df_kanji)):
+            first_id.setdefault(k.char, i)
+            kanji_rows.append((i, k.char, k.component1, k.component2, k.component3, k.component4,
+                               k.component5, json.dumps(k.on_reading, ensure_ascii=False), k.kun_reading,
+                               k.keyword, k.srl, k.type, k.freq, _dump_tags(k.tags), k.group))
+            onyomi_rows.extend((i, p, r) for p, r in enumerate(k.on_reading) if r)
+            components = (k.component1, k.component2, k.component3, k.component4, k.component5)
+            component_rows.extend((i, p, c) for p, c in enumerate(components) if c)
+        conn.executemany("INSERT INTO kanji VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", kanji_rows)
+        conn.executemany("INSERT INTO onyomi VALUES (?, ?, ?)", onyomi_rows)
+        conn.executemany("INSERT INTO component VALUES (?, ?, ?)", component_rows)
+
+        result_rows = []
+        for group_id, (name, group) in enumerate(categorization.result.items()):
+            conn.execute("INSERT INTO result_group VALUES (?, ?)", (group_id, name))
+            result_rows.extend((group_id, p, first_id[k.char], k.ref, k.type, _dump_tags(k.tags))
+                               for p, k in enumerate(group))
+        conn.executemany("INSERT INTO result VALUES (?, ?, ?, ?, ?, ?)", result_rows)
+
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            fts = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 has no trigram tokenizer; search falls back to LIKE
+            fts = False
+        meta = {"schema_version": SCHEMA_VERSION, "algorithm_version": result_store.ALGORITHM_VERSION,
+                "fts": fts, "workbook": cache.workbook_header(filename)}
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def connect(path: str, filename: Optional[str] = None) -> Optional[sqlite3.Connection]:
+    """Open the database at ``path`` read-only, or return None if it is missing or stale.
+
+    With ``filename``, the database must also have been built from the
+    current contents of that workbook.
+    """
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect("file:{}?mode=ro".format(path), uri=True, check_same_thread=False)
+    try:
+        meta = _meta(conn)
+        current = (meta.get("schema_version") == SCHEMA_VERSION
+                   and meta.get("algorithm_version") == result_store.ALGORITHM_VERSION
+                   and (filename is None or cache.header_matches(meta.get("workbook", {}), filename)))
+    except (sqlite3.DatabaseError, OSError):
+        current = False
+    if not current:
+        conn.close()
+        return None
+    return conn
+
+
+def ensure(filename: str, source: "Source", categorization: Categorization, path: Optional[str] = None) -> str:
+    """Return the path of a current database for ``filename``, building it if needed."""
+    path = path or default_path(filename)
+    conn = connect(path, filename)
+    if conn is None:
+        return build(filename, source, categorization, path)
+    conn.close()
+    return path
+
+
+def open_current(filename: str, source: "Source", categorization: Categorization,
+                 path: Optional[str] = None) -> sqlite3.Connection:
+    """Open a current database for ``filename`` read-only, building it if needed.
+
+    Raises RuntimeError if the database is still stale once built, e.g.
+    because the workbook changed in between, rather than returning None.
+    """
+    path = ensure(filename, source, categorization, path)
+    conn = connect(path, filename)
+    if conn is None:
+        raise RuntimeError("kanji database {} is stale for {}".format(path, filename))
+    return conn
+
+
+def lookup(conn: sqlite3.Connection, chars: List[str]) -> List[Kanji]:
+    """Workbook data for each char (its first row), like ``read_kanji_char``."""
+    found, missing = lookup_many(conn, chars)
+    if missing:
+        raise IndexError("kanji not found: {}".format(missing[0]))
+    return [found[char] for char in chars]
+
+
+def lookup_many(conn: sqlite3.Connection, chars: Iterable[str]) -> Tuple[Dict[str, Kanji], List[str]]:
+    """``(found, missing)`` for the distinct chars in one query, like ``data_loader.read_kanji_chars``."""
+    chars = list(dict.fromkeys(chars))
+    rows = {row[1]: row for row in conn.execute(_LOOKUP_MANY_SQL, (json.dumps(chars),))}
+    found = {char: _make_kanji(rows[char]) for char in chars if char in rows}
+    return found, [char for char in chars if char not in rows]
+
+
+def search(conn: sqlite3.Connection, query: str) -> List[Tuple[str, Kanji]]:
+    """Categorized kanji whose keyword contains ``query`` (ignoring case), that
+    have ``query`` as an on'yomi reading, or that are ``query`` itself.
+
+    Returns ``(group, kanji)`` pairs in categorization order.
+    """
+    if len(query) >= 3 and _meta(conn).get("fts"):
+        keyword_ids = "SELECT rowid FROM keyword_fts WHERE keyword_fts MATCH ?"
+        keyword_arg = '"{}"'.format(query.replace('"', '""'))
+    else:
+        keyword_ids = "SELECT id FROM kanji WHERE keyword LIKE ? ESCAPE '\\'"
+        keyword_arg = "%{}%".format(query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"))
+    rows = conn.execute(
+        "SELECT g.name, r.ref, " + _KANJI_COLUMNS.format(type="r.type", tags="r.tags")
+        + " FROM result r JOIN result_group g ON g.id = r.group_id JOIN kanji k ON k.id = r.kanji_id"
+        " WHERE r.kanji_id IN (" + keyword_ids
+        + " UNION SELECT kanji_id FROM onyomi WHERE reading = ?"
+          " UNION SELECT id FROM kanji WHERE char = ?)"
+        " ORDER BY r.group_id, r.position", (keyword_arg, query, query)).fetchall()
+    return [(row[0], _make_kanji(row[1:])) for row in rows]
+
+
+def _meta(conn: sqlite3.Connection) -> Dict:
+    return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+
+
+def _dump_tags(tags) -> str:
+    return json.dumps(list(tags), ensure_ascii=False)
+
+
+def _make_kanji(row) -> Kanji:
+    (ref, char, component1, component2, component3, component4, component5,
+     on_reading, kun_reading, keyword, srl, type, freq, tags, group) = row
+    return Kanji(ref=ref, char=char, component1=component1, component2=component2, component3=component3,
+                 component4=component4, component5=component5, on_reading=json.loads(on_reading),
+                 kun_reading=kun_reading, keyword=keyword, srl=srl, type=type, freq=freq,
+                 tags=json.loads(tags), group=group)
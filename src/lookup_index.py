@@ -0,0 +1,58 @@
+"""Prebuilt on-disk index for ``kanji-mbo lookup``.
+
+The index is a char -> Kanji mapping stored in the parsed-workbook cache
+(kind ``lookup``) and validated against the workbook like any other entry.
+Loading it only needs the standard library and ``model``, so repeated
+lookups from scripts never import pandas or parse the workbook.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+import cache
+from model import Kanji
+
+if TYPE_CHECKING:
+    import pandas
+
+KIND = "lookup"
+
+
+def build(df_kanji: "pandas.DataFrame") -> Dict[str, Kanji]:
+    from data_loader import read_kanji_dataframe
+
+    index = {}
+    for kanji in read_kanji_dataframe(df_kanji):
+        # read_kanji_char returns the first row holding a char
+        index.setdefault(kanji.char, kanji)
+    return index
+
+
+def load(filename: str) -> Optional[Dict[str, Kanji]]:
+    """Return the lookup index for ``filename``, or None if it is missing or stale."""
+    if not cache.cache_enabled():
+        return None
+    return cache.load(filename, KIND)
+
+
+def store(filename: str, df_kanji: "pandas.DataFrame"):
+    if cache.cache_enabled():
+        cache.store(filename, KIND, build(df_kanji))
+
+
+def find_many(index: Dict[str, Kanji], chars: Iterable[str]) -> Tuple[Dict[str, Kanji], List[str]]:
+    """``(found, missing)`` for the distinct chars, like ``data_loader.read_kanji_chars``."""
+    found, missing = {}, []
+    for char in dict.fromkeys(chars):
+        kanji = index.get(char)
+        if kanji is None:
+            missing.append(char)
+        else:
+            found[char] = kanji
+    return found, missing
+
+
+def find(index: Dict[str, Kanji], chars: List[str]) -> List[Kanji]:
+    found, missing = find_many(index, chars)
+    if missing:
+        raise IndexError("kanji not found: {}".format(missing[0]))
+    return [found[char] for char in chars]
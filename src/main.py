@@ -1,7 +1,9 @@
 import logging
 
 import algorithm
+from core import configure_logging
 
+configure_logging()
 algorithm.set_logging_level(logging.INFO)
 # algorithm.set_logging_level(logging.WARNING)
 source = algorithm.read_excel("../excel/1500 KANJI COMPONENTS - ver. 1.3.xlsx")
@@ -1,8 +1,16 @@
-from collections import defaultdict
+from __future__ import annotations
+
+import sys
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    # Annotation-only: the model must stay importable without pandas for the fast lookup path
+    import numpy
+    import pandas
 
-import pandas
-from typing import Dict, List
+    from columnar import RowIndex
 
 
 @dataclass
@@ -11,8 +19,53 @@ class Stem:
     priority: int
 
 
+class TagSet:
+    """Tag names in source order, as a tuple of interned strings.
+
+    Supports the list operations the pipeline uses on ``Kanji.tags``
+    (``append``, ``in``, iteration, ``len``). Iteration keeps the order tags
+    were read or appended, duplicates included, so writers serialise them as
+    the workbook lists them, and it compares equal to a list with the same
+    tags in the same order. Most kanji have no tags and share the empty tuple.
+    """
+    __slots__ = ("names",)
+
+    def __init__(self, tags=()):
+        self.names = ()
+        for tag in tags:
+            self.append(tag)
+
+    def append(self, tag: str):
+        self.names += (sys.intern(tag),)
+
+    def __contains__(self, tag) -> bool:
+        return tag in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TagSet):
+            return self.names == other.names
+        if isinstance(other, (list, tuple)):
+            return list(self.names) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self.names))
+
+    def __reduce__(self):
+        return TagSet, (self.names,)
+
+
 @dataclass
 class Kanji:
+    __slots__ = ("ref", "char", "component1", "component2", "component3", "component4", "component5",
+                 "on_reading", "kun_reading", "keyword", "srl", "type", "freq", "tags", "group")
+
     ref: str
     char: str
     component1: str
@@ -26,9 +79,13 @@ class Kanji:
     srl: int
     type: str
     freq: int
-    tags: List[str]
+    tags: TagSet
     group: str
 
+    def __post_init__(self):
+        if not isinstance(self.tags, TagSet):
+            self.tags = TagSet(self.tags)
+
     @property
     def components_str(self) -> str:
         return " ".join(filter(None, [self.component1, self.component2,
@@ -40,18 +97,74 @@ class Kanji:
         return "\u3001".join(self.on_reading)
 
 
+@dataclass
+class SourceIndex:
+    """Hash-map and CSR lookups over a Source, replacing per-kanji DataFrame scans.
+
+    Chars and components of ``Source.df_kanji`` share the integer vocabulary
+    ``codes``. Row indexes return positional rows into ``df_kanji`` in
+    ascending order, so ``df_kanji.iloc[rows]`` matches the equivalent
+    boolean mask.
+    """
+    chars: List[str]
+    keyword_group: Dict[str, str]
+    stem_group: Dict[str, str]
+    stem_variation_groups: Dict[str, List[str]]
+    special: Set[str]
+    codes: Dict[str, int]
+    char_codes: numpy.ndarray
+    srl: numpy.ndarray
+    char_rows: RowIndex
+    component2_rows: RowIndex
+    component_rows: RowIndex
+    kanji: Optional[List[Kanji]] = None
+
+
 @dataclass
 class Source:
     df_kanji: pandas.DataFrame
     df_keyword: pandas.DataFrame
     df_stem: pandas.DataFrame
     df_special: pandas.DataFrame
+    index: Optional[SourceIndex] = field(default=None, repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class Decision:
+    """Immutable outcome of the rule chain for one kanji.
+
+    ``type`` is None when the rule keeps the kanji's own type. A decision
+    queues the kanji behind ``ref``, appends it to ``group`` (prepending when
+    ``is_first``), or neither for rows the rules cannot place.
+    """
+    char: str
+    rule: str
+    type: Optional[str] = None
+    group: Optional[str] = None
+    is_first: bool = False
+    ref: Optional[str] = None
+    crown: bool = False
+
+
+class KanjiGroup(deque):
+    """Ordered kanji group with O(1) prepend (``appendleft``) and ``append``.
+
+    Supports list-style slicing, which returns a plain list.
+    """
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return list(self)[item]
+        return deque.__getitem__(self, item)
+
+    def __repr__(self) -> str:
+        return "KanjiGroup({!r})".format(list(self))
 
 
 @dataclass
 class Categorization:
-    result: Dict[str, List[Kanji]] = field(default_factory=lambda: defaultdict(list))
-    queue: Dict[str, List[Kanji]] = field(default_factory=lambda: defaultdict(list))
+    result: Dict[str, KanjiGroup] = field(default_factory=lambda: defaultdict(KanjiGroup))
+    queue: Dict[str, KanjiGroup] = field(default_factory=lambda: defaultdict(KanjiGroup))
 
 
 class Constants:
@@ -69,6 +182,18 @@ class Constants:
     priority = "PRIORITY"
 
 
+class Rule:
+    keyword = "1"
+    stem = "2"
+    special = "special"
+    crown = "3"
+    onyomi = "4"
+    stem_variation = "5"
+    visual = "6"
+    other = "7"
+    missing = "missing"
+
+
 class ExcelColumn:
     kanji = "KANJI"
     key = "KEY"
@@ -0,0 +1,52 @@
+"""Process-pool categorization.
+
+Rule evaluation only reads the Source, so workers evaluate kanji
+independently; the parent then applies the returned decisions in the original
+order, which keeps the result identical to the serial path.
+"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import List, Optional, Tuple
+
+from model import Source, Decision, Kanji
+from data_loader import read_source_kanji
+
+_source: Optional[Source] = None
+
+
+def _init_worker(source: Source):
+    global _source
+    _source = source
+
+
+def _evaluate_chunk(kanji_list: List[Kanji]) -> List[Tuple[Decision, str]]:
+    import algorithm
+
+    results = []
+    for kanji in kanji_list:
+        # Rules print diagnostics; capture them so the parent can emit them in order
+        out = io.StringIO()
+        with redirect_stdout(out):
+            decision = algorithm.decide(kanji, _source)
+        results.append((decision, out.getvalue()))
+    return results
+
+
+def evaluate_parallel(source: Source, kanji_list: List[Kanji], jobs: int,
+                      chunks_per_job: int = 4) -> List[Tuple[Decision, str]]:
+    """Evaluate each kanji in a pool of ``jobs`` processes.
+
+    Returns one ``(decision, printed output)`` pair per kanji, in input order.
+    """
+    # Build the index and shared cluster rows once so forked workers inherit them
+    read_source_kanji([], source)
+    size = max(1, -(-len(kanji_list) // (jobs * chunks_per_job)))
+    chunks = [kanji_list[i:i + size] for i in range(0, len(kanji_list), size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(source,)) as pool:
+        for chunk_results in pool.map(_evaluate_chunk, chunks):
+            results.extend(chunk_results)
+    return results
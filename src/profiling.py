@@ -0,0 +1,166 @@
+"""Per-rule counters and latency histograms for the rule engine, off by default.
+
+Like ``tracing``, call sites guard every hook with the module-level switch,
+so a disabled profile costs one attribute lookup::
+
+    if profiling.enabled:
+        profiling.visit(Rule.onyomi)
+
+While enabled, ``algorithm.decide`` times each kanji and files the result
+under the rule that placed it. For every rule it records:
+
+- hits and the rules visited on the way (``3>4>5`` for a kanji rule 3
+  passed to rule 4, which passed it to rule 5)
+- a latency histogram, in power-of-two microsecond buckets
+- index lookups and the candidate rows they returned. These scans are
+  the part that grows with the workbook.
+
+``phase`` times the stages around the rules, such as reading the workbook
+and resolving the queue.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+enabled = False
+_profile: Optional["Profile"] = None
+
+_PERCENTILES = (50, 95, 99)
+
+
+class RuleStats:
+    def __init__(self):
+        self.latencies: List[int] = []
+        self.lookups = 0
+        self.rows = 0
+
+    def histogram(self) -> Dict[str, int]:
+        """Hit counts by latency, keyed by bucket upper bound in microseconds (``<=1``, ``<=2``, ``<=4`` ...)."""
+        buckets = Counter(max(0, (ns - 1) // 1000).bit_length() for ns in self.latencies)
+        return {"<={}".format(2 ** b): buckets[b] for b in range(max(buckets) + 1)} if buckets else {}
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies)
+        hits = len(latencies)
+        res = {
+            "hits": hits,
+            "total_ms": round(sum(latencies) / 1e6, 3),
+            "mean_us": round(sum(latencies) / hits / 1e3, 2) if hits else 0.0,
+            "max_us": round(latencies[-1] / 1e3, 2) if hits else 0.0,
+        }
+        for p in _PERCENTILES:
+            res["p{}_us".format(p)] = round(latencies[min(hits - 1, hits * p // 100)] / 1e3, 2) if hits else 0.0
+        res["lookups"] = self.lookups
+        res["rows"] = self.rows
+        res["histogram_us"] = self.histogram()
+        return res
+
+
+class Profile:
+    def __init__(self):
+        self.rules: Dict[str, RuleStats] = {}
+        self.paths: Counter = Counter()
+        self.phases: Dict[str, float] = {}
+        self._path: List[str] = []
+        self._lookups = 0
+        self._rows = 0
+
+    def begin(self):
+        self._path = []
+        self._lookups = 0
+        self._rows = 0
+
+    def visit(self, rule: str):
+        self._path.append(rule)
+
+    def scan(self, rows: int):
+        self._lookups += 1
+        self._rows += rows
+
+    def end(self, rule: str, elapsed_ns: int):
+        stats = self.rules.get(rule)
+        if stats is None:
+            stats = self.rules[rule] = RuleStats()
+        stats.latencies.append(elapsed_ns)
+        stats.lookups += self._lookups
+        stats.rows += self._rows
+        self.paths[">".join(self._path) or rule] += 1
+
+    @property
+    def kanji(self) -> int:
+        return sum(len(stats.latencies) for stats in self.rules.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "kanji": self.kanji,
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "rules": {rule: self.rules[rule].to_dict() for rule in sorted(self.rules)},
+            "paths": dict(self.paths.most_common()),
+        }
+
+    def format_table(self, paths: int = 10) -> str:
+        """The summary ``categorize --profile`` prints: phases, one row per rule, then the commonest paths."""
+        lines = ["phase          ms"]
+        lines += ["{:<12} {:>9.1f}".format(name, seconds * 1000) for name, seconds in self.phases.items()]
+        total = self.kanji
+        lines.append("")
+        lines.append("{:<8} {:>6} {:>6} {:>9} {:>8} {:>8} {:>8} {:>9} {:>8} {:>10}".format(
+            "rule", "kanji", "share", "total ms", "mean us", "p50 us", "p99 us", "max us", "lookups", "rows/kanji"))
+        for rule in sorted(self.rules):
+            stats = self.rules[rule].to_dict()
+            lines.append("{:<8} {:>6} {:>5.1f}% {:>9.1f} {:>8.1f} {:>8.1f} {:>8.1f} {:>9.1f} {:>8} {:>10.1f}".format(
+                rule, stats["hits"], 100 * stats["hits"] / total, stats["total_ms"], stats["mean_us"],
+                stats["p50_us"], stats["p99_us"], stats["max_us"], stats["lookups"],
+                stats["rows"] / stats["hits"]))
+        lines.append("")
+        lines.append("{:<24} {:>6}".format("path", "kanji"))
+        lines += ["{:<24} {:>6}".format(path, count) for path, count in self.paths.most_common(paths)]
+        return "\n".join(lines)
+
+
+def enable() -> Profile:
+    """Start a fresh profile and return it; it keeps collecting until ``disable``."""
+    global enabled, _profile
+    _profile = Profile()
+    enabled = True
+    return _profile
+
+
+def disable():
+    global enabled, _profile
+    enabled = False
+    _profile = None
+
+
+def visit(rule: str):
+    _profile.visit(rule)
+
+
+def scan(rows: int):
+    _profile.scan(rows)
+
+
+def decide(evaluate: Callable, kanji, source):
+    """Run ``evaluate(kanji, source)`` and file its time under the rule of the returned decision."""
+    profile = _profile
+    profile.begin()
+    start = time.perf_counter_ns()
+    decision = evaluate(kanji, source)
+    profile.end(decision.rule, time.perf_counter_ns() - start)
+    return decision
+
+
+@contextmanager
+def phase(name: str):
+    """Add the wall time of the block to phase ``name``; a no-op while disabled."""
+    if not enabled:
+        yield
+        return
+    profile = _profile
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases[name] = profile.phases.get(name, 0.0) + time.perf_counter() - start
@@ -0,0 +1,32 @@
+"""Persisted categorization results.
+
+A finished Categorization is stored in the parsed-workbook cache (kind
+``result``), so it is tied to the workbook's content hash like every other
+entry. The payload also records ``ALGORITHM_VERSION``; a result computed
+by a different version of the rules is treated as a miss.
+"""
+
+from typing import Optional
+
+import cache
+from model import Categorization
+
+KIND = "result"
+
+# Bump whenever a change to the rules or to queue resolution alters the output
+ALGORITHM_VERSION = 1
+
+
+def load(filename: str) -> Optional[Categorization]:
+    """Return the stored result for ``filename``, or None if missing, stale or from another version."""
+    if not cache.cache_enabled():
+        return None
+    payload = cache.load(filename, KIND)
+    if not isinstance(payload, dict) or payload.get("algorithm_version") != ALGORITHM_VERSION:
+        return None
+    return payload["categorization"]
+
+
+def store(filename: str, categorization: Categorization):
+    if cache.cache_enabled():
+        cache.store(filename, KIND, {"algorithm_version": ALGORITHM_VERSION, "categorization": categorization})
@@ -0,0 +1,290 @@
+"""Generate synthetic MBO workbooks of any size for scale and stress testing.
+
+The generator learns from a shipped workbook. Each synthetic row follows a
+template row taken from about the same relative position in the original,
+so the original's progression from simple to compound kanji is kept. From
+its template a row takes:
+
+- its component layout: which slots are empty, which hold a radical or
+  a stem.list variation (reused as is) and which hold a kanji. Kanji
+  slots are filled with earlier synthetic kanji, each used about as often
+  as its template's kanji is a component in the original, so basic kanji
+  and popular phonetic components form clusters as in the real data
+- whether it shares an on'yomi with its COMPONENTS2 kanji. If it does, it
+  inherits that reading; otherwise it draws readings from the original's
+  reading frequencies
+- SRL, TYPE, subgroup, tags, kun'yomi and scaled frequency, plus the
+  keyword when that keyword is in keyword.list, so rule 1 fires at the
+  same rate
+
+keyword.list is kept as is. stem.list and special.list grow in proportion
+to the row count.
+
+    python src/synthetic.py --rows 6000 --output synthetic-6000.xlsx
+        [--from WORKBOOK] [--seed N] [--freq-output FILE] [--parquet DIR]
+
+``--parquet`` needs the optional ``pyarrow`` dependency and writes one file
+per sheet, which ``data_loader.read_parquet`` loads without openpyxl.
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pandas
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from data_loader import read_excel, PARQUET_SHEETS
+from freq_algorithm import FreqExcelColumn
+from model import Source, ExcelColumn
+
+DEFAULT_WORKBOOK = os.path.join(os.path.dirname(__file__), "..", "excel", "2250 KANJI COMPONENTS - ver. 1.0.xlsx")
+
+_COMPONENT_COLUMNS = [ExcelColumn.component1, ExcelColumn.component2, ExcelColumn.component3,
+                      ExcelColumn.component4, ExcelColumn.component5]
+_STEM_COLUMNS = [ExcelColumn.stem_component1, ExcelColumn.stem_component2, ExcelColumn.stem_component3,
+                 ExcelColumn.stem_component4, ExcelColumn.stem_component5, ExcelColumn.stem_component6]
+
+# CJK unified ideographs (URO, extensions A, B-F, G), then the supplementary private use planes
+_CHAR_RANGES = [(0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x2A6DF), (0x2A700, 0x2EBEF),
+                (0x30000, 0x3134F), (0xF0000, 0xFFFFD), (0x100000, 0x10FFFD)]
+
+# How far (in original rows) a template may be drawn from the proportional position
+_TEMPLATE_WINDOW = 50
+
+
+@dataclass(frozen=True)
+class Template:
+    """The parts of an original row a synthetic row copies.
+
+    ``components`` holds one entry per component slot: ``""`` when empty,
+    None for a kanji, or the radical itself. ``uses`` counts the kanji
+    slots of the original that hold this row's kanji.
+    """
+    components: Tuple[Optional[str], ...]
+    uses: int
+    readings: int
+    shares_reading: bool
+    srl: int
+    type: str
+    keyword: Optional[str]
+    kun_reading: str
+    freq: float
+    tags: str
+    group: str
+
+
+@dataclass
+class Profile:
+    templates: List[Template]
+    readings: List[str]
+    radicals: List[str]
+    df_keyword: pandas.DataFrame
+    df_stem: pandas.DataFrame
+    df_special: pandas.DataFrame
+
+
+def learn_profile(source: Source) -> Profile:
+    df = source.df_kanji
+    chars = set(df[ExcelColumn.char].tolist())
+    list_keywords = set(source.df_keyword[ExcelColumn.keyword].tolist())
+    readings_of = {char: set(on.split(ExcelColumn.on_reading_delimiter))
+                   for char, on in zip(df[ExcelColumn.char].tolist(), df[ExcelColumn.on_reading].tolist())}
+
+    # Stem variations stay literal, even those that are kanji rows of the original, so rule 5 keeps firing
+    variations = {value for col in _STEM_COLUMNS for value in source.df_stem[col].tolist() if value}
+
+    rows = [dict(zip(ExcelColumn.list_columns, values))
+            for values in zip(*(df[col].tolist() for col in ExcelColumn.list_columns))]
+    layouts = [tuple(None if value in chars and value not in variations else value
+                     for value in (record[col] for col in _COMPONENT_COLUMNS)) for record in rows]
+    uses = Counter(record[col] for record, layout in zip(rows, layouts)
+                   for col, slot in zip(_COMPONENT_COLUMNS, layout) if slot is None)
+
+    templates, readings, radicals = [], [], []
+    for record, components in zip(rows, layouts):
+        radicals.extend(value for value in components if value)
+        own = [r for r in record[ExcelColumn.on_reading].split(ExcelColumn.on_reading_delimiter) if r]
+        readings.extend(own)
+        component2 = record[ExcelColumn.component2]
+        templates.append(Template(
+            components=components,
+            uses=uses[record[ExcelColumn.char]],
+            readings=len(own),
+            shares_reading=component2 in chars and bool(readings_of[component2] & set(own)),
+            srl=int(record[ExcelColumn.srl]),
+            type=record[ExcelColumn.type],
+            keyword=record[ExcelColumn.keyword] if record[ExcelColumn.keyword] in list_keywords else None,
+            kun_reading=record[ExcelColumn.kun_reading],
+            freq=float(record[ExcelColumn.freq]),
+            tags=record[ExcelColumn.tags],
+            group=record[ExcelColumn.group],
+        ))
+    return Profile(templates, readings, radicals + sorted(variations), source.df_keyword.copy(),
+                   source.df_stem.copy(), source.df_special.copy())
+
+
+def _char_pool(exclude):
+    for start, end in _CHAR_RANGES:
+        for code in range(start, end + 1):
+            char = chr(code)
+            if char not in exclude:
+                yield char
+
+
+def generate(rows: int, profile: Profile, seed: int = 0) -> Source:
+    """A synthetic Source with ``rows`` kanji rows, reproducible for a given ``seed``."""
+    rng = random.Random(seed)
+    templates = profile.templates
+    pool = _char_pool(set(profile.radicals))
+    scale = rows / len(templates)
+
+    chars: List[str] = []
+    readings_of = {}
+    # Each kanji once per use its template's kanji has as a component, drawn without replacement
+    pending: List[str] = []
+    records = []
+    for i in range(rows):
+        position = int((i + rng.random()) * len(templates) / rows)
+        position += rng.randint(-_TEMPLATE_WINDOW, _TEMPLATE_WINDOW)
+        template = templates[min(max(position, 0), len(templates) - 1)]
+        try:
+            char = next(pool)
+        except StopIteration:
+            raise ValueError("cannot generate more than {} distinct kanji".format(len(chars))) from None
+
+        components = []
+        for slot in template.components:
+            if slot is not None:
+                components.append(slot)
+            elif pending:
+                # Swap-remove a random pending use
+                j = rng.randrange(len(pending))
+                pending[j], pending[-1] = pending[-1], pending[j]
+                components.append(pending.pop())
+            else:
+                components.append(rng.choice(chars or profile.radicals))
+
+        own = []
+        component2 = components[1]
+        if template.shares_reading and component2 in readings_of and readings_of[component2]:
+            own.append(readings_of[component2][0])
+        while len(own) < template.readings:
+            reading = rng.choice(profile.readings)
+            if reading not in own:
+                own.append(reading)
+
+        chars.append(char)
+        pending.extend([char] * template.uses)
+        readings_of[char] = own
+        records.append([char] + components + [
+            ExcelColumn.on_reading_delimiter.join(own), template.kun_reading,
+            template.keyword or "keyword {}".format(i + 1), template.srl, template.type,
+            round(template.freq * scale, 6), template.tags, template.group])
+    df_kanji = pandas.DataFrame(records, columns=ExcelColumn.list_columns)
+
+    return Source(df_kanji, profile.df_keyword.copy(), _generate_stems(df_kanji, profile, scale, rng),
+                  _generate_specials(df_kanji, profile, scale, rng))
+
+
+def _generate_stems(df_kanji: pandas.DataFrame, profile: Profile, scale: float, rng: random.Random):
+    stems = profile.df_stem
+    count = max(1, round(len(stems) * scale))
+    types = df_kanji[ExcelColumn.type].tolist()
+    chars = df_kanji[ExcelColumn.char].tolist()
+    stem_chars = [char for char, type in zip(chars, types) if type == "STEM"]
+    others = [char for char, type in zip(chars, types) if type != "STEM"]
+    rng.shuffle(others)
+    stem_chars = (stem_chars + others)[:count]
+
+    records = []
+    for i, char in enumerate(stem_chars):
+        original = stems.iloc[i % len(stems)]
+        # Each original variation is attached once, as in the original stem.list
+        variations = [original[col] if i < len(stems) else "" for col in _STEM_COLUMNS]
+        records.append([char] + variations + [original[ExcelColumn.group]])
+    return pandas.DataFrame(records, columns=[ExcelColumn.stem_kanji] + _STEM_COLUMNS + [ExcelColumn.group])
+
+
+def _generate_specials(df_kanji: pandas.DataFrame, profile: Profile, scale: float, rng: random.Random):
+    count = min(round(len(profile.df_special) * scale), len(df_kanji) // 2)
+    chars = df_kanji[ExcelColumn.char].tolist()
+    keywords = dict(zip(chars, df_kanji[ExcelColumn.keyword].tolist()))
+    picked = rng.sample(chars, 2 * count)
+    records = [[kanji, keywords[kanji], key] for kanji, key in zip(picked[::2], picked[1::2])]
+    return pandas.DataFrame(records, columns=[ExcelColumn.kanji, ExcelColumn.keyword, ExcelColumn.key])
+
+
+def freq_frame(source: Source) -> pandas.DataFrame:
+    """The kanji rows in the frequency pipeline's MAIN sheet layout."""
+    df = source.df_kanji
+    columns = [ExcelColumn.char, ExcelColumn.component1, ExcelColumn.component2, ExcelColumn.component3,
+               ExcelColumn.on_reading, ExcelColumn.kun_reading, ExcelColumn.keyword, ExcelColumn.freq]
+    return pandas.DataFrame({name: df[col].tolist() for name, col in zip(FreqExcelColumn.list_columns, columns)})
+
+
+def _frames(source: Source):
+    return zip(PARQUET_SHEETS, (source.df_kanji, source.df_keyword, source.df_stem, source.df_special))
+
+
+def write_workbook(source: Source, path: str):
+    with pandas.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet, frame in _frames(source):
+            frame.to_excel(writer, sheet_name=sheet, index=False)
+
+
+def write_freq_workbook(source: Source, path: str):
+    with pandas.ExcelWriter(path, engine="openpyxl") as writer:
+        freq_frame(source).to_excel(writer, sheet_name="MAIN", index=False)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install 'kanji-mbo[parquet]'") from None
+
+
+def write_parquet(source: Source, directory: str):
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    for sheet, frame in _frames(source):
+        frame.to_parquet(os.path.join(directory, sheet + ".parquet"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic MBO workbook learned from a real one")
+    parser.add_argument("--rows", "-n", type=int, required=True, help="number of kanji rows")
+    parser.add_argument("--from", dest="workbook", default=DEFAULT_WORKBOOK,
+                        help="workbook to learn the distributions from (default: the 2250 workbook)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="write the MBO workbook (.xlsx) to this path")
+    parser.add_argument("--freq-output", help="also write a freq-format workbook to this path")
+    parser.add_argument("--parquet", metavar="DIR", help="also write each sheet as Parquet into DIR")
+    args = parser.parse_args()
+    if not (args.output or args.freq_output or args.parquet):
+        parser.error("give at least one of --output, --freq-output, --parquet")
+    if args.parquet:
+        try:
+            _require_pyarrow()
+        except ImportError as e:
+            parser.error(str(e))
+
+    source = generate(args.rows, learn_profile(read_excel(args.workbook)), args.seed)
+    if args.output:
+        write_workbook(source, args.output)
+    if args.freq_output:
+        write_freq_workbook(source, args.freq_output)
+    if args.parquet:
+        write_parquet(source, args.parquet)
+    stems, specials = len(source.df_stem), len(source.df_special)
+    print(f"Generated {args.rows} kanji, {stems} stems, {specials} specials")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Structured trace of rule-engine decisions, off by default.
+
+Call sites guard every event with the module-level switch, so a disabled
+trace costs one attribute lookup and never builds its arguments::
+
+    if tracing.enabled:
+        tracing.event("rule", char=kanji.char, rule="4")
+
+Field values may also be zero-argument callables; they are only called when
+the event is written. Events go to a sink: ``JsonlSink`` appends one JSON
+object per line to a file for offline analysis, ``LogSink`` renders them
+through the ``core`` logger at DEBUG level.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+
+enabled = False
+_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+class JsonlSink:
+    """Append events as JSON lines to ``path`` (truncated when opened).
+
+    Each event is a single ``os.write`` on an ``O_APPEND`` descriptor, so
+    worker processes forked from the parent can share the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+
+    def __call__(self, record: Dict[str, Any]):
+        os.write(self._fd, (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class LogSink:
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def __call__(self, record: Dict[str, Any]):
+        fields = " ".join("{}={}".format(k, v) for k, v in record.items() if k != "event")
+        self.logger.debug("%s %s", record["event"], fields)
+
+    def close(self):
+        pass
+
+
+def enable(sink: Callable[[Dict[str, Any]], None]):
+    global enabled, _sink
+    disable()
+    _sink = sink
+    enabled = True
+
+
+def disable():
+    global enabled, _sink
+    enabled = False
+    if _sink is not None:
+        close = getattr(_sink, "close", None)
+        if close is not None:
+            close()
+    _sink = None
+
+
+def event(name: str, **fields):
+    """Write one event. Callers check ``enabled`` first; this re-checks for safety."""
+    if not enabled:
+        return
+    record = {"event": name}
+    for key, value in fields.items():
+        record[key] = value() if callable(value) else value
+    _sink(record)
@@ -0,0 +1,102 @@
+"""Union-find over hashable keys, stored as arrays indexed by dense integer ids.
+
+Replaces the ``disjoint_set`` package. Each key is hashed once, when it is
+first seen; after that ``find`` and ``union`` work on list indexes with
+union by rank and path compression.
+
+Besides its structural root, every component carries a canonical label,
+which is what ``find`` returns. ``union(x, y)`` labels the merged component
+with the label of ``y``'s component, matching ``disjoint_set.DisjointSet``,
+so callers that use the label as a group key see the same result.
+"""
+
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+
+class UnionFind(Generic[T]):
+    __slots__ = ("_ids", "_keys", "_parent", "_rank", "_label")
+
+    def __init__(self, keys: Iterable[T] = ()):
+        self._ids: Dict[T, int] = {}
+        self._keys: List[T] = []
+        self._parent: List[int] = []
+        self._rank: List[int] = []
+        self._label: List[int] = []
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: T) -> bool:
+        return key in self._ids
+
+    def add(self, key: T) -> int:
+        """Return the id of ``key``, adding it as a singleton component if it is new."""
+        i = self._ids.get(key)
+        if i is None:
+            i = len(self._keys)
+            self._ids[key] = i
+            self._keys.append(key)
+            self._parent.append(i)
+            self._rank.append(0)
+            self._label.append(i)
+        return i
+
+    def _root(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            # Path halving: point every other node on the path at its grandparent
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def find(self, key: T) -> T:
+        """Return the canonical label of ``key``'s component; unknown keys are their own label."""
+        i = self._ids.get(key)
+        if i is None:
+            return key
+        return self._keys[self._label[self._root(i)]]
+
+    def _union(self, i: int, j: int):
+        root_i, root_j = self._root(i), self._root(j)
+        if root_i == root_j:
+            return
+        label = self._label[root_j]
+        if self._rank[root_i] < self._rank[root_j]:
+            root_i, root_j = root_j, root_i
+        elif self._rank[root_i] == self._rank[root_j]:
+            self._rank[root_i] += 1
+        self._parent[root_j] = root_i
+        self._label[root_i] = label
+
+    def union(self, x: T, y: T):
+        """Merge the components of ``x`` and ``y``, keeping the label of ``y``'s component."""
+        i = self.add(x)
+        self._union(i, self.add(y))
+
+    def union_many(self, pairs: Iterable[Tuple[T, T]]):
+        """``union`` each ``(x, y)`` pair in order."""
+        ids, add, union = self._ids, self.add, self._union
+        for x, y in pairs:
+            i = ids.get(x)
+            if i is None:
+                i = add(x)
+            j = ids.get(y)
+            if j is None:
+                j = add(y)
+            union(i, j)
+
+    def components(self) -> Iterator[Tuple[T, List[T]]]:
+        """Yield ``(label, members)`` per component.
+
+        Components are ordered by their first-added member and members keep
+        the order in which they were added.
+        """
+        members: Dict[int, List[T]] = {}
+        for i, key in enumerate(self._keys):
+            members.setdefault(self._root(i), []).append(key)
+        for root, keys in members.items():
+            yield self._keys[self._label[root]], keys
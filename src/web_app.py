@@ -11,13 +11,29 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 import streamlit as st
 import algorithm
+import cache
+import kanji_db
+import result_store
 
 DEFAULT_FILE = os.path.join(os.path.dirname(__file__), "..", "excel", "1500 KANJI COMPONENTS - ver. 1.3.xlsx")
 
 
-@st.cache(allow_output_mutation=True, suppress_st_warning=True)
-def load_data(filepath):
-    return algorithm.run_pipeline(filepath)
+@st.cache_resource
+def load_data(filepath, digest, algorithm_version):
+    """Pipeline result for one content version of the workbook; ``digest`` and ``algorithm_version`` key the cache."""
+    return algorithm.run_pipeline(filepath, use_result_store=True)
+
+
+@st.cache_resource
+def open_db(filepath, digest, algorithm_version):
+    """Read-only connection to the SQLite database behind the Search and Lookup tabs.
+
+    One connection is shared by every rerun and session until the workbook or
+    the algorithm changes. ``kanji_db.open_current`` rebuilds a stale database
+    and raises rather than return None, so a failed open is not cached.
+    """
+    categorization, source = load_data(filepath, digest, algorithm_version)
+    return kanji_db.open_current(filepath, source, categorization)
 
 
 def main():
@@ -27,7 +43,9 @@ def main():
     filepath = st.sidebar.text_input("Excel file path", value=DEFAULT_FILE)
 
     try:
-        categorization, source = load_data(filepath)
+        key = (filepath, cache.file_digest(filepath), result_store.ALGORITHM_VERSION)
+        categorization, _ = load_data(*key)
+        db = open_db(*key)
     except Exception as e:
         st.error(f"Failed to load data: {e}")
         return
@@ -60,13 +78,7 @@ def main():
     with tab_search:
         query = st.text_input("Search by keyword or on'yomi reading")
         if query:
-            results = []
-            for group_name, kanji_list in categorization.result.items():
-                for k in kanji_list:
-                    if (query.lower() in k.keyword.lower()
-                            or query in k.on_reading
-                            or query == k.char):
-                        results.append((group_name, k))
+            results = kanji_db.search(db, query)
             st.write(f"Found {len(results)} results")
             for group_name, k in results:
                 st.write(f"**{k.char}** \u2014 {k.keyword} | On: {k.on_reading_str} | Group: {group_name}")
@@ -74,10 +86,13 @@ def main():
     with tab_lookup:
         chars = st.text_input("Enter kanji characters (space-separated)")
         if chars:
+            found, _ = kanji_db.lookup_many(db, chars.split())
             for char in chars.split():
-                try:
-                    k = algorithm.read_kanji_char(char, source)
-                    st.markdown(f"""
+                k = found.get(char)
+                if k is None:
+                    st.warning(f"Kanji '{char}' not found in data")
+                    continue
+                st.markdown(f"""
 | Field | Value |
 |-------|-------|
 | Character | {k.char} |
@@ -90,8 +105,6 @@ def main():
 | Frequency | {k.freq} |
 | Group | {k.group} |
 """)
-                except (IndexError, KeyError):
-                    st.warning(f"Kanji '{char}' not found in data")
 
 
 if __name__ == "__main__":
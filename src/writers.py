@@ -0,0 +1,173 @@
+"""Streaming JSON, NDJSON and CSV writers for categorize, lookup and annotate output.
+
+Records are written one kanji at a time to any text stream, so exporting a
+large categorization never holds the whole document in memory. Indented
+JSON is byte-identical to ``json.dumps(..., ensure_ascii=False, indent=2)``
+of the equivalent nested structure.
+"""
+
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, TYPE_CHECKING
+
+from model import Categorization, Kanji
+
+if TYPE_CHECKING:
+    from annotate import Annotation
+
+# (line, column, char, annotation) from ``annotate.annotate_lines``
+AnnotatedToken = Tuple[int, int, str, "Annotation"]
+
+CATEGORIZE_CSV_HEADER = ["group", "char", "ref", "keyword", "on_reading", "srl", "type", "freq"]
+ANNOTATE_CSV_HEADER = ["line", "column", "char", "group", "ref", "type", "srl", "freq"]
+LOOKUP_CSV_HEADER = ["char", "keyword", "on_reading", "kun_reading", "components", "srl", "type", "freq", "group"]
+
+_COMPACT = (",", ":")
+
+
+def kanji_record(kanji: Kanji) -> Dict:
+    """Plain dict of a kanji's fields, in ``dataclasses.asdict`` order, without the deep copy."""
+    return {
+        "ref": kanji.ref,
+        "char": kanji.char,
+        "component1": kanji.component1,
+        "component2": kanji.component2,
+        "component3": kanji.component3,
+        "component4": kanji.component4,
+        "component5": kanji.component5,
+        "on_reading": kanji.on_reading_str,
+        "kun_reading": kanji.kun_reading,
+        "keyword": kanji.keyword,
+        "srl": kanji.srl,
+        "type": kanji.type,
+        "freq": kanji.freq,
+        "tags": list(kanji.tags),
+        "group": kanji.group,
+        "components": kanji.components_str,
+    }
+
+
+def sorted_groups(categorization: Categorization) -> Iterator[Tuple[str, List[Kanji]]]:
+    """Result groups by name, each sorted by ref descending (the CLI output order)."""
+    for key in sorted(categorization.result):
+        yield key, sorted(categorization.result[key], key=lambda x: x.ref, reverse=True)
+
+
+def _dumps(value, indent: Optional[int]) -> str:
+    if indent is None:
+        return json.dumps(value, ensure_ascii=False, separators=_COMPACT)
+    return json.dumps(value, ensure_ascii=False, indent=indent)
+
+
+def _write_json_array(out: TextIO, records: Iterable[Dict], indent: Optional[int], level: int):
+    """Write a JSON array of records nested ``level`` deep, one record at a time."""
+    first = True
+    if indent is None:
+        out.write("[")
+        for record in records:
+            if not first:
+                out.write(",")
+            out.write(_dumps(record, None))
+            first = False
+        out.write("]")
+        return
+
+    inner = " " * (indent * (level + 1))
+    for record in records:
+        out.write("[\n" if first else ",\n")
+        out.write(inner + _dumps(record, indent).replace("\n", "\n" + inner))
+        first = False
+    out.write("[]" if first else "\n" + " " * (indent * level) + "]")
+
+
+def write_categorize_json(categorization: Categorization, out: TextIO, indent: Optional[int] = 2):
+    """Write ``{group: [kanji, ...]}``; ``indent=None`` writes compact JSON."""
+    first = True
+    for key, group in sorted_groups(categorization):
+        if indent is None:
+            out.write("{" if first else ",")
+        else:
+            out.write("{\n" if first else ",\n")
+            out.write(" " * indent)
+        out.write(_dumps(key, indent) + (":" if indent is None else ": "))
+        _write_json_array(out, map(kanji_record, group), indent, 1)
+        first = False
+    if first:
+        out.write("{}")
+    else:
+        out.write("}" if indent is None else "\n}")
+    out.write("\n")
+
+
+def write_categorize_ndjson(categorization: Categorization, out: TextIO):
+    """Write one compact JSON object per kanji, with its result group under ``result_group``."""
+    for key, group in sorted_groups(categorization):
+        for kanji in group:
+            record = {"result_group": key}
+            record.update(kanji_record(kanji))
+            out.write(_dumps(record, None) + "\n")
+
+
+def write_categorize_csv(categorization: Categorization, out: TextIO):
+    writer = csv.writer(out)
+    writer.writerow(CATEGORIZE_CSV_HEADER)
+    for key, group in sorted_groups(categorization):
+        for k in group:
+            writer.writerow([key, k.char, k.ref, k.keyword, k.on_reading_str, k.srl, k.type, k.freq])
+
+
+def write_lookup_json(kanji_list: Iterable[Kanji], out: TextIO, indent: Optional[int] = 2):
+    _write_json_array(out, map(kanji_record, kanji_list), indent, 0)
+    out.write("\n")
+
+
+def write_lookup_ndjson(kanji_list: Iterable[Kanji], out: TextIO):
+    for kanji in kanji_list:
+        out.write(_dumps(kanji_record(kanji), None) + "\n")
+
+
+def write_lookup_csv(kanji_list: Iterable[Kanji], out: TextIO):
+    writer = csv.writer(out)
+    writer.writerow(LOOKUP_CSV_HEADER)
+    for k in kanji_list:
+        writer.writerow([k.char, k.keyword, k.on_reading_str, k.kun_reading,
+                         k.components_str, k.srl, k.type, k.freq, k.group])
+
+
+def annotation_record(token: AnnotatedToken) -> Dict:
+    line, column, char, a = token
+    return {"line": line, "column": column, "char": char, "group": a.group, "ref": a.ref,
+            "type": a.type, "srl": a.srl, "freq": a.freq}
+
+
+def write_annotations_text(tokens: Iterable[AnnotatedToken], out: TextIO):
+    # A corpus repeats the same few thousand kanji, so each one's fields are formatted once
+    tails = {}
+    for line, column, char, a in tokens:
+        tail = tails.get(char)
+        if tail is None:
+            tail = tails[char] = "\t{}\t{}\t{}\t{}\t{}\t{}\n".format(char, a.group, a.ref, a.type, a.srl, a.freq)
+        out.write("{}:{}{}".format(line, column, tail))
+
+
+def write_annotations_json(tokens: Iterable[AnnotatedToken], out: TextIO, indent: Optional[int] = 2):
+    _write_json_array(out, map(annotation_record, tokens), indent, 0)
+    out.write("\n")
+
+
+def write_annotations_ndjson(tokens: Iterable[AnnotatedToken], out: TextIO):
+    tails = {}
+    for line, column, char, a in tokens:
+        tail = tails.get(char)
+        if tail is None:
+            # The record minus its leading line and column keys
+            record = _dumps(annotation_record((0, 0, char, a)), None)
+            tail = tails[char] = record[record.index(',"char"'):] + "\n"
+        out.write('{{"line":{},"column":{}{}'.format(line, column, tail))
+
+
+def write_annotations_csv(tokens: Iterable[AnnotatedToken], out: TextIO):
+    writer = csv.writer(out)
+    writer.writerow(ANNOTATE_CSV_HEADER)
+    for line, column, char, a in tokens:
+        writer.writerow([line, column, char, a.group, a.ref, a.type, a.srl, a.freq])
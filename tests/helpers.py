@@ -0,0 +1,66 @@
+"""Source and workbook fixtures shared by the test modules."""
+
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+import pandas
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from model import Source, ExcelColumn
+import algorithm
+
+STEM_COLUMNS = [ExcelColumn.stem_kanji, ExcelColumn.stem_component1,
+                ExcelColumn.stem_component2, ExcelColumn.stem_component3,
+                ExcelColumn.stem_component4, ExcelColumn.stem_component5,
+                ExcelColumn.stem_component6, ExcelColumn.group]
+
+
+def make_kanji_row(char, comp1="", comp2="", comp3="", comp4="", comp5="", on_reading="", kun_reading="",
+                   keyword="", srl=3, type_val="VR", freq=500, tags="", group=""):
+    """One MAIN sheet row, in ``ExcelColumn.list_columns`` order."""
+    return [char, comp1, comp2, comp3, comp4, comp5,
+            on_reading, kun_reading, keyword, srl, type_val, freq, tags, group]
+
+
+def make_source(kanji_rows, keyword_rows=None, stem_rows=None, special_rows=None):
+    df_kanji = pandas.DataFrame(kanji_rows, columns=ExcelColumn.list_columns)
+    df_keyword = pandas.DataFrame(keyword_rows or [], columns=[ExcelColumn.keyword, ExcelColumn.group])
+    df_stem = pandas.DataFrame(stem_rows or [], columns=STEM_COLUMNS)
+    df_special = pandas.DataFrame(special_rows or [], columns=[ExcelColumn.kanji, ExcelColumn.key])
+    return Source(df_kanji, df_keyword, df_stem, df_special)
+
+
+def write_workbook(path, kanji_rows, keyword_rows=None, stem_rows=None, special_rows=None):
+    """Write the sheets of ``make_source(...)`` as an .xlsx workbook that ``read_excel`` accepts."""
+    source = make_source(kanji_rows, keyword_rows, stem_rows, special_rows)
+    with pandas.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet, frame in (("MAIN", source.df_kanji), ("keyword.list", source.df_keyword),
+                             ("stem.list", source.df_stem), ("special.list", source.df_special)):
+            frame.to_excel(writer, sheet_name=sheet, index=False)
+
+
+def categorize(source, resolve_queue=True):
+    """Decide and apply every kanji of ``source``, silencing the rules' prints.
+
+    Returns ``(categorization, decisions)``, with the queue resolved unless
+    ``resolve_queue`` is false.
+    """
+    categorization = algorithm.init_categorization(source)
+    decisions = []
+    with redirect_stdout(io.StringIO()):
+        for kanji in algorithm.read_kanji_dataframe(source.df_kanji):
+            decision = algorithm.decide(kanji, source)
+            algorithm.apply_decision(kanji, decision, categorization)
+            decisions.append(decision)
+        if resolve_queue:
+            algorithm.categorize_queue(categorization)
+    return categorization, decisions
+
+
+def dump(categorization):
+    """``(result, queue)`` as ``{group: [(char, ref, type, tags), ...]}``, for comparing categorizations."""
+    return tuple({g: [(k.char, k.ref, k.type, list(k.tags)) for k in v] for g, v in groups.items()}
+                 for groups in (categorization.result, categorization.queue))
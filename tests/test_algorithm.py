@@ -6,7 +6,7 @@ import pandas
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from model import Kanji, Source, Categorization, Constants, ExcelColumn, Stem
+from model import Kanji, KanjiGroup, Source, Categorization, Constants, Decision, ExcelColumn, Rule, Stem
 import algorithm
 
 
@@ -212,6 +212,24 @@ class TestReadKanjiChar(unittest.TestCase):
         with self.assertRaises(IndexError):
             algorithm.read_kanji_char("龍", source)
 
+    def test_read_kanji_chars_batch(self):
+        source = make_source(
+            kanji_rows=[
+                make_kanji_row("百", on_reading="ヒャク", keyword="hundred", srl=3, freq=100, group="1a"),
+                make_kanji_row("青", comp1="月", on_reading="セイ、ショウ", keyword="blue", srl=3, freq=1205, group="3a"),
+                make_kanji_row("赤", on_reading="セキ", keyword="red", srl=2, freq=900),
+            ],
+        )
+        found, missing = algorithm.read_kanji_chars(["赤", "龍", "百", "赤", "鬼"], source)
+        self.assertEqual(list(found), ["赤", "百"])
+        self.assertEqual(found["赤"], algorithm.read_kanji_char("赤", source))
+        self.assertEqual(found["百"], algorithm.read_kanji_char("百", source))
+        self.assertEqual(missing, ["龍", "鬼"])
+
+    def test_read_kanji_chars_empty(self):
+        source = make_source(kanji_rows=[make_kanji_row("百")])
+        self.assertEqual(algorithm.read_kanji_chars([], source), ({}, []))
+
 
 class TestReadKanjiDataframe(unittest.TestCase):
     def test_reads_all_rows(self):
@@ -232,6 +250,34 @@ class TestReadKanjiDataframe(unittest.TestCase):
         result = algorithm.read_kanji_dataframe(source.df_kanji)
         self.assertEqual(result, [])
 
+    def test_matches_row_by_row_read(self):
+        source = make_source(
+            kanji_rows=[
+                make_kanji_row("青", comp1="月", on_reading="セイ、ショウ", keyword="blue", srl=3, freq=1205),
+                make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", srl=2, freq=640),
+            ],
+        )
+        df = source.df_kanji
+        expected = [algorithm.read_kanji(df.iloc[i]) for i in range(len(df.index))]
+        self.assertEqual(algorithm.read_kanji_dataframe(df), expected)
+
+    def test_returns_fresh_objects(self):
+        source = make_source(kanji_rows=[make_kanji_row("百")])
+        first = algorithm.read_kanji_dataframe(source.df_kanji)
+        second = algorithm.read_kanji_dataframe(source.df_kanji)
+        self.assertIsNot(first[0], second[0])
+
+
+class TestReadSourceKanji(unittest.TestCase):
+    def test_reuses_objects_across_calls(self):
+        source = make_source(
+            kanji_rows=[make_kanji_row("青"), make_kanji_row("清", comp2="青")],
+        )
+        first = algorithm.read_source_kanji([1], source)
+        second = algorithm.read_source_kanji([0, 1], source)
+        self.assertEqual(first[0].char, "清")
+        self.assertIs(first[0], second[1])
+
 
 class TestFindKanjiOnReading(unittest.TestCase):
     def test_matching_on_reading(self):
@@ -370,6 +416,66 @@ class TestFindCluster123Components(unittest.TestCase):
         self.assertEqual(result.iloc[0][ExcelColumn.char], "清")
 
 
+class TestSourceIndex(unittest.TestCase):
+    def test_built_lazily_and_cached(self):
+        source = make_source(kanji_rows=[make_kanji_row("青")])
+        self.assertIsNone(source.index)
+        index = algorithm.get_source_index(source)
+        self.assertIs(algorithm.get_source_index(source), index)
+
+    def test_keyword_first_occurrence_wins(self):
+        source = make_source(
+            kanji_rows=[],
+            keyword_rows=[["blue", "03 colors"], ["blue", "79 other"]],
+        )
+        self.assertEqual(algorithm.get_source_index(source).keyword_group["blue"], "03 colors")
+
+    def test_component_rows_match_mask(self):
+        source = make_source(
+            kanji_rows=[
+                make_kanji_row("青", comp1="月"),
+                make_kanji_row("清", comp1="氵", comp2="青"),
+                make_kanji_row("靖", comp1="青", comp3="青"),
+            ],
+        )
+        index = algorithm.get_source_index(source)
+        self.assertEqual(index.component_rows["青"].tolist(), [1, 2])
+        self.assertEqual(index.component2_rows["青"].tolist(), [1])
+        self.assertEqual(index.char_rows["清"].tolist(), [1])
+        self.assertNotIn("水", index.component_rows)
+
+    def test_row_positions_exclude_self(self):
+        source = make_source(
+            kanji_rows=[
+                make_kanji_row("青", comp1="月"),
+                make_kanji_row("清", comp1="氵", comp2="青"),
+                make_kanji_row("晴", comp1="日", comp2="青"),
+            ],
+        )
+        index = algorithm.get_source_index(source)
+        rows = algorithm.find_row_positions(source, "清", index.component2_rows["青"], index.char_rows["青"])
+        self.assertEqual(rows.tolist(), [0, 2])
+
+    def test_max_srl_row_takes_first_of_ties(self):
+        source = make_source(
+            kanji_rows=[
+                make_kanji_row("晴", srl=2),
+                make_kanji_row("青", srl=5),
+                make_kanji_row("清", srl=5),
+            ],
+        )
+        rows = algorithm.find_row_positions(source, "", [0, 1, 2])
+        self.assertEqual(algorithm.find_max_srl_row(rows, source), 1)
+
+    def test_stem_variation_counts_rows_once(self):
+        source = make_source(
+            kanji_rows=[],
+            stem_rows=[["水", "氵", "氵", "", "", "", "", "08 Wednesday"]],
+        )
+        result = algorithm.find_stem_variations("氵", source, 3)
+        self.assertEqual(result.group, "08 Wednesday")
+
+
 class TestAppendCategorization(unittest.TestCase):
     def test_append_not_first(self):
         cat = Categorization(result={"group": []}, queue={})
@@ -393,6 +499,32 @@ class TestAppendCategorization(unittest.TestCase):
         self.assertEqual(len(cat.result["group"]), 2)
         self.assertNotIn("十", cat.queue)
 
+    def test_flush_order_matches_list_semantics(self):
+        a, b = make_kanji("汁", ref="十"), make_kanji("針", ref="十")
+        cat = Categorization(result={"group": [make_kanji("四")]}, queue={"十": [a, b]})
+        algorithm.append_categorization("group", make_kanji("十"), False, cat)
+        self.assertEqual([k.char for k in cat.result["group"]], ["針", "汁", "四", "十"])
+
+        a, b = make_kanji("汁", ref="十"), make_kanji("針", ref="十")
+        cat = Categorization(result={"group": [make_kanji("四")]}, queue={"十": [a, b]})
+        algorithm.append_categorization("group", make_kanji("十"), True, cat)
+        self.assertEqual([k.char for k in cat.result["group"]], ["十", "針", "汁", "四"])
+
+    def test_flush_skips_repeated_object(self):
+        queued = make_kanji("汁", ref="十")
+        cat = Categorization(result={"group": []}, queue={"十": [queued, queued]})
+        algorithm.append_categorization("group", make_kanji("十"), False, cat)
+        self.assertEqual(len(cat.result["group"]), 2)
+        self.assertIsInstance(cat.result["group"], KanjiGroup)
+
+    def test_flush_dedupes_equal_rows(self):
+        # A duplicated workbook row gives two equal Kanji objects; only the first is kept
+        first, copy, other = make_kanji("汁", ref="十"), make_kanji("汁", ref="十"), make_kanji("針", ref="十")
+        cat = Categorization(result={"group": []}, queue={"十": [first, other, copy]})
+        algorithm.append_categorization("group", make_kanji("十"), False, cat)
+        self.assertEqual([k.char for k in cat.result["group"]], ["針", "汁", "十"])
+        self.assertIs(cat.result["group"][1], first)
+
 
 class TestCategorizeKanjiRule1(unittest.TestCase):
     def test_keyword_mean_assigns_to_group(self):
@@ -462,6 +594,53 @@ class TestCategorizeSrl(unittest.TestCase):
         self.assertIn("青", cat.queue)
 
 
+class TestDecide(unittest.TestCase):
+    def setUp(self):
+        self.source = make_source(
+            kanji_rows=[
+                make_kanji_row("青", on_reading="セイ", srl=2),
+                make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", srl=1),
+                make_kanji_row("晴", comp1="日", comp2="青", on_reading="セイ", srl=3),
+            ],
+        )
+
+    def test_does_not_mutate_kanji(self):
+        k = make_kanji("青", srl=2, on_reading=["セイ"])
+        decision = algorithm.decide(k, self.source)
+        self.assertEqual(decision, Decision("青", Rule.crown, type=Constants.vr, ref="晴", crown=True))
+        self.assertEqual(k.type, Constants.mean)
+        self.assertEqual(list(k.tags), [])
+        self.assertEqual(k.ref, "青")
+
+    def test_crown_falls_through_to_later_rule(self):
+        # 青 outranks its components in SRL, so rule 3 hands over to rule 4 and on but keeps the crown
+        k = make_kanji("青", srl=5, on_reading=["セイ"])
+        decision = algorithm.decide(k, self.source)
+        self.assertTrue(decision.crown)
+        self.assertEqual(decision.rule, Rule.visual)
+        self.assertEqual(decision.type, Constants.visual)
+
+    def test_apply_decision(self):
+        cat = Categorization(result={}, queue={})
+        k = make_kanji("青", srl=2, on_reading=["セイ"])
+        algorithm.apply_decision(k, algorithm.decide(k, self.source), cat)
+        self.assertEqual(k.type, Constants.vr)
+        self.assertIn(Constants.crown_tag, k.tags)
+        self.assertIs(cat.queue["晴"][0], k)
+
+    def test_apply_decisions_matches_categorize_kanji(self):
+        serial = algorithm.init_categorization(self.source)
+        for k in algorithm.read_kanji_dataframe(self.source.df_kanji):
+            algorithm.categorize_kanji(k, serial, self.source)
+        algorithm.categorize_queue(serial)
+
+        kanji_list = algorithm.read_kanji_dataframe(self.source.df_kanji)
+        decisions = [algorithm.decide(k, self.source) for k in kanji_list]
+        cat = algorithm.apply_decisions(self.source, kanji_list, decisions)
+        dump = lambda c: {g: [(k.char, k.ref, k.type) for k in v] for g, v in c.result.items()}
+        self.assertEqual(dump(cat), dump(serial))
+
+
 class TestInitCategorization(unittest.TestCase):
     def test_creates_groups_from_keyword_and_stem(self):
         source = make_source(
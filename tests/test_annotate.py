@@ -0,0 +1,62 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import annotate
+from model import Kanji, Categorization
+
+
+def _make_kanji(char, ref=None, type_val="MEAN", srl=3, freq=500):
+    return Kanji(
+        ref=ref or char, char=char,
+        component1="", component2="", component3="", component4="", component5="",
+        on_reading=[""], kun_reading="", keyword="", srl=srl, type=type_val, freq=freq,
+        tags=[], group="",
+    )
+
+
+class TestAnnotate(unittest.TestCase):
+    def setUp(self):
+        self.cat = Categorization()
+        self.cat.result["03 colors"].extend([_make_kanji("青", srl=5), _make_kanji("清", ref="青", type_val="VR")])
+        self.cat.result["08 Wednesday"].append(_make_kanji("水", type_val="STEM", freq=175))
+        self.table = annotate.build_table(self.cat)
+
+    def test_build_table(self):
+        self.assertEqual(set(self.table), {"青", "清", "水"})
+        self.assertEqual(self.table["清"], annotate.Annotation("03 colors", "青", "VR", 3, 500))
+        self.assertEqual(self.table["水"].freq, 175)
+
+    def test_annotate_positions_and_coverage(self):
+        coverage = annotate.Coverage()
+        lines = ["青い水と清い水。\n", "ABC\n", "龍が青を見た\n"]
+        tokens = list(annotate.annotate_lines(lines, self.table, coverage))
+        self.assertEqual([(line, column, char) for line, column, char, _ in tokens],
+                         [(1, 1, "青"), (1, 3, "水"), (1, 5, "清"), (1, 7, "水"), (3, 3, "青")])
+        self.assertEqual(tokens[2][3].ref, "青")
+
+        summary = coverage.to_dict()
+        self.assertEqual(summary["kanji_tokens"], 7)
+        self.assertEqual(summary["annotated_tokens"], 5)
+        self.assertEqual(summary["unknown_tokens"], 2)
+        self.assertEqual(summary["unknown"], {"龍": 1, "見": 1})
+        self.assertEqual(summary["groups"], {"03 colors": {"tokens": 3, "distinct": 2},
+                                             "08 Wednesday": {"tokens": 2, "distinct": 1}})
+
+    def test_non_kanji_text_is_ignored(self):
+        coverage = annotate.Coverage()
+        tokens = list(annotate.annotate_lines(["ひらがな カタカナ 123 々。\n"], self.table, coverage))
+        self.assertEqual(tokens, [])
+        self.assertEqual(coverage.to_dict()["coverage"], 0.0)
+
+    def test_annotation_is_lazy(self):
+        coverage = annotate.Coverage()
+        tokens = annotate.annotate_lines(iter(["青\n", "水\n"]), self.table, coverage)
+        next(tokens)
+        self.assertEqual(coverage.tokens, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import cache
+import result_store
+from model import Categorization, Kanji
+
+
+class TestWorkbookCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = patch.dict(os.environ, {cache.CACHE_DIR_ENV: os.path.join(self.tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        self.workbook = os.path.join(self.tmp.name, "book.xlsx")
+        self._write(b"version 1")
+
+    def _write(self, content, mtime_ns=None):
+        with open(self.workbook, "wb") as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(self.workbook, ns=(mtime_ns, mtime_ns))
+
+    def test_miss_without_entry(self):
+        self.assertIsNone(cache.load(self.workbook, "source"))
+
+    def test_hit_after_store(self):
+        cache.store(self.workbook, "source", {"rows": [1, 2, 3]})
+        self.assertEqual(cache.load(self.workbook, "source"), {"rows": [1, 2, 3]})
+
+    def test_kinds_are_separate(self):
+        cache.store(self.workbook, "source", "a")
+        self.assertIsNone(cache.load(self.workbook, "other"))
+
+    def test_content_change_invalidates(self):
+        cache.store(self.workbook, "source", "old")
+        self._write(b"version 2", mtime_ns=1_000_000_000)
+        self.assertIsNone(cache.load(self.workbook, "source"))
+
+    def test_touch_without_change_still_hits(self):
+        cache.store(self.workbook, "source", "same")
+        os.utime(self.workbook, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(cache.load(self.workbook, "source"), "same")
+
+    def test_touch_rehashes_only_once(self):
+        cache.store(self.workbook, "source", "same")
+        os.utime(self.workbook, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(cache.load(self.workbook, "source"), "same")
+        with patch("cache.file_digest", side_effect=AssertionError("re-hashed")):
+            self.assertEqual(cache.load(self.workbook, "source"), "same")
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache.store(self.workbook, "source", "x")
+        with open(cache.entry_path(self.workbook, "source"), "wb") as f:
+            f.write(b"garbage")
+        self.assertIsNone(cache.load(self.workbook, "source"))
+
+    def test_clear_removes_entries(self):
+        cache.store(self.workbook, "source", "x")
+        self.assertEqual(cache.clear(), 1)
+        self.assertIsNone(cache.load(self.workbook, "source"))
+
+    def test_disabled_by_env(self):
+        with patch.dict(os.environ, {cache.NO_CACHE_ENV: "1"}):
+            self.assertFalse(cache.cache_enabled())
+
+
+def _make_kanji(char, ref=None, type="MEAN", tags=()):
+    return Kanji(
+        ref=ref or char, char=char,
+        component1="", component2="", component3="", component4="", component5="",
+        on_reading=[""], kun_reading="", keyword="", srl=3, type=type, freq=500,
+        tags=list(tags), group="",
+    )
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = patch.dict(os.environ, {cache.CACHE_DIR_ENV: os.path.join(self.tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        self.workbook = os.path.join(self.tmp.name, "book.xlsx")
+        with open(self.workbook, "wb") as f:
+            f.write(b"version 1")
+
+        self.cat = Categorization()
+        self.cat.result["1 keyword"].append(_make_kanji("青", tags=["crown"]))
+        self.cat.result["1 keyword"].appendleft(_make_kanji("清", ref="青", type="VISUAL"))
+        self.cat.queue["青"].append(self.cat.result["1 keyword"][0])
+
+    def test_miss_without_entry(self):
+        self.assertIsNone(result_store.load(self.workbook))
+
+    def test_round_trip_keeps_groups_and_order(self):
+        result_store.store(self.workbook, self.cat)
+        loaded = result_store.load(self.workbook)
+        self.assertEqual(list(loaded.result), ["1 keyword"])
+        self.assertEqual([(k.char, k.ref, k.type) for k in loaded.result["1 keyword"]],
+                         [("清", "青", "VISUAL"), ("青", "青", "MEAN")])
+        self.assertEqual(list(loaded.result["1 keyword"][1].tags), ["crown"])
+        # Queue entries still share identity with their result group entries
+        self.assertIs(loaded.queue["青"][0], loaded.result["1 keyword"][0])
+        # Loaded results keep the defaultdict behaviour of a fresh Categorization
+        loaded.result["new"].append(_make_kanji("晴"))
+
+    def test_algorithm_version_change_is_a_miss(self):
+        result_store.store(self.workbook, self.cat)
+        with patch.object(result_store, "ALGORITHM_VERSION", result_store.ALGORITHM_VERSION + 1):
+            self.assertIsNone(result_store.load(self.workbook))
+
+    def test_workbook_change_is_a_miss(self):
+        result_store.store(self.workbook, self.cat)
+        with open(self.workbook, "wb") as f:
+            f.write(b"version 22")
+        self.assertIsNone(result_store.load(self.workbook))
+
+    def test_disabled_cache_skips_store(self):
+        with patch.dict(os.environ, {cache.NO_CACHE_ENV: "1"}):
+            result_store.store(self.workbook, self.cat)
+        self.assertIsNone(result_store.load(self.workbook))
+
+
+if __name__ == "__main__":
+    unittest.main()
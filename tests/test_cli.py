@@ -169,5 +169,112 @@ class TestFormatFunctions(unittest.TestCase):
         self.assertEqual(d["components"], "月 土")
 
 
+class TestStdinKanji(unittest.TestCase):
+    def test_extracts_distinct_kanji_from_text(self):
+        text = StringIO("私は青い水を飲みました。ABC\n青 水、﨑\n")
+        self.assertEqual(cli._stdin_kanji(text), ["私", "青", "水", "飲", "﨑"])
+
+    def test_empty_input(self):
+        self.assertEqual(cli._stdin_kanji(StringIO("")), [])
+
+
+class TestCategorizeProfile(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from tests.helpers import make_kanji_row, write_workbook
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.workbook = os.path.join(self.tmp, "book.xlsx")
+        write_workbook(self.workbook, [
+            make_kanji_row("寺", on_reading="ジ", keyword="temple", srl=4, freq=100),
+            make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", keyword="time", srl=5, freq=200),
+            make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", keyword="hold", srl=2, freq=300),
+        ])
+        env = patch.dict(os.environ, {"KANJI_MBO_CACHE_DIR": os.path.join(self.tmp, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _run(self, *argv):
+        err = StringIO()
+        with patch('sys.argv', ['kanji-mbo', '--file', self.workbook, '--format', 'json'] + list(argv)), \
+                patch('sys.stdout', StringIO()) as out, patch('sys.stderr', err):
+            cli.main()
+        return out.getvalue(), err.getvalue()
+
+    def test_profile_table_and_json(self):
+        import json
+        import profiling
+
+        path = os.path.join(self.tmp, "profile.json")
+        out, err = self._run("categorize", "--profile", "--profile-json", path)
+        self.assertFalse(profiling.enabled)
+        # The categorization still goes to stdout, the table to stderr
+        groups = json.loads(out)
+        self.assertEqual({k["char"] for group in groups.values() for k in group}, {"寺", "時", "持"})
+        self.assertIn("rows/kanji", err)
+        with open(path, encoding="utf-8") as f:
+            profile = json.load(f)
+        self.assertEqual(profile["kanji"], 3)
+        self.assertEqual(sum(stats["hits"] for stats in profile["rules"].values()), 3)
+        self.assertEqual(list(profile["phases_ms"]), ["read_excel", "read_kanji", "rules", "queue"])
+
+    def test_profile_rejects_jobs(self):
+        with self.assertRaises(SystemExit):
+            self._run("categorize", "--profile", "--jobs", "2")
+
+
+class TestStartupImports(unittest.TestCase):
+    """The commands scripts call repeatedly must not import the heavy dependencies."""
+
+    CLI = os.path.join(os.path.dirname(__file__), '..', 'src', 'cli.py')
+    HEAVY = ("pandas", "numpy", "disjoint_set", "genanki", "openpyxl")
+
+    def _importtime(self, *argv, env=None):
+        import subprocess
+
+        proc = subprocess.run([sys.executable, "-X", "importtime", self.CLI] + list(argv),
+                              capture_output=True, text=True, env=env)
+        modules = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            modules.append(line.rsplit("|", 1)[1].strip())
+        return proc, modules
+
+    def _assert_light(self, modules):
+        heavy = [m for m in modules if m.split(".")[0] in self.HEAVY]
+        self.assertEqual(heavy, [])
+
+    def test_help(self):
+        proc, modules = self._importtime("--help")
+        self.assertEqual(proc.returncode, 0)
+        self._assert_light(modules)
+
+    def test_cached_lookup(self):
+        import tempfile
+        import pandas
+        import lookup_index
+        from model import ExcelColumn
+
+        with tempfile.TemporaryDirectory() as tmp:
+            workbook = os.path.join(tmp, "book.xlsx")
+            with open(workbook, "wb") as f:
+                f.write(b"workbook")
+            df_kanji = pandas.DataFrame(
+                [["青", "月", "", "", "", "", "セイ", "あお", "blue", 5, "MEAN", 100, "", ""]],
+                columns=ExcelColumn.list_columns)
+            env = dict(os.environ, KANJI_MBO_CACHE_DIR=os.path.join(tmp, "cache"))
+            env.pop("KANJI_MBO_NO_CACHE", None)
+            with patch.dict(os.environ, env, clear=True):
+                lookup_index.store(workbook, df_kanji)
+
+            proc, modules = self._importtime("--file", workbook, "lookup", "青", env=env)
+        self.assertEqual(proc.returncode, 0, proc.stderr[-500:])
+        self.assertIn("Keyword:     blue", proc.stdout)
+        self._assert_light(modules)
+
+
 if __name__ == "__main__":
     unittest.main()
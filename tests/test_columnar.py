@@ -0,0 +1,66 @@
+import sys
+import os
+import unittest
+
+import pandas
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar import encode, build_row_index
+from core import find_cluster_1_2_3_components
+
+
+class TestEncode(unittest.TestCase):
+    def test_shared_vocabulary(self):
+        vocabulary, codes = encode([["青", "清"], ["月", "青"]])
+        self.assertEqual(codes.shape, (2, 2))
+        self.assertEqual(codes[0][0], codes[1][1])
+        self.assertEqual(vocabulary["青"], codes[0][0])
+
+    def test_empty_columns(self):
+        vocabulary, codes = encode([[], []])
+        self.assertEqual(vocabulary, {})
+        self.assertEqual(codes.shape, (2, 0))
+
+
+class TestRowIndex(unittest.TestCase):
+    def setUp(self):
+        self.vocabulary, self.codes = encode([
+            ["青", "清", "靖", "晴"],
+            ["月", "氵", "青", "日"],
+            ["", "青", "", "青"],
+            ["", "", "青", ""],
+        ])
+        self.index = build_row_index(self.vocabulary, self.codes[1:])
+
+    def test_rows_ascending_and_counted_once(self):
+        self.assertEqual(self.index["青"].tolist(), [1, 2, 3])
+
+    def test_missing_key(self):
+        self.assertIsNone(self.index.get("水"))
+        self.assertEqual(self.index.get("水", []), [])
+        self.assertNotIn("水", self.index)
+        with self.assertRaises(KeyError):
+            self.index["水"]
+
+    def test_key_only_in_other_columns(self):
+        # 清 is in the vocabulary (char column) but no component row holds it
+        self.assertIsNone(self.index.get("清"))
+
+    def test_matches_pandas_mask(self):
+        df = pandas.DataFrame({
+            "CHAR": ["青", "清", "靖", "晴"],
+            "C1": ["月", "氵", "青", "日"],
+            "C2": ["", "青", "", "青"],
+            "C3": ["", "", "青", ""],
+        })
+        for component in ("青", "月", "日"):
+            for char in df["CHAR"]:
+                expected = find_cluster_1_2_3_components(component, char, df, "CHAR", "C1", "C2", "C3")
+                rows = self.index[component]
+                rows = rows[self.codes[0][rows] != self.vocabulary[char]]
+                self.assertEqual(rows.tolist(), [df.index.get_loc(i) for i in expected.index])
+
+
+if __name__ == "__main__":
+    unittest.main()
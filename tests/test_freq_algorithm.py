@@ -1,6 +1,7 @@
 import sys
 import os
 import unittest
+from dataclasses import replace
 
 import pandas
 
@@ -149,6 +150,76 @@ class TestCategorizeKanji(unittest.TestCase):
         self.assertEqual(result[0].ref, "一")
 
 
+    def test_freq_tie_keeps_first_reading_match(self):
+        # 持 matches through the kanji's first reading, 時 only through its second
+        k = make_kanji("寺", comp2="寺", onyomi=["ジ", "シ"], freq=650)
+        list_kanji = [
+            make_kanji("時", comp2="寺", onyomi=["シ"], freq=26),
+            make_kanji("持", comp2="寺", onyomi=["ジ"], freq=26),
+            k,
+        ]
+        result = []
+        algorithm.categorize_kanji(k, result, list_kanji)
+        self.assertEqual(result[0].ref, "持")
+
+    def test_shared_index(self):
+        list_kanji = [
+            make_kanji("時", comp2="寺", onyomi=["ジ"], freq=26),
+            make_kanji("持", comp2="寺", onyomi=["ジ"], freq=142),
+            make_kanji("寺", onyomi=["ジ"], freq=650),
+            make_kanji("人", onyomi=["ジン"], freq=1),
+        ]
+        index = algorithm.build_index(list_kanji)
+        result = []
+        for k in list_kanji:
+            algorithm.categorize_kanji(k, result, list_kanji, index)
+        self.assertEqual([k.ref for k in result], ["時", "時", "時", "人"])
+
+
+class TestFindComponents(unittest.TestCase):
+    def test_all_three_conditions_in_list_order(self):
+        list_kanji = [
+            make_kanji("清", comp2="青"),
+            make_kanji("青", comp2="月"),
+            make_kanji("晴", comp2="青"),
+            make_kanji("精", comp2="米"),
+        ]
+        index = algorithm.build_index(list_kanji)
+        self.assertEqual(algorithm.find_components(list_kanji[0], index), [0, 1, 2])
+        self.assertEqual(algorithm.find_components(list_kanji[1], index), [0, 1, 2])
+        self.assertEqual(algorithm.find_components(list_kanji[3], index), [3])
+
+    def test_empty_component2(self):
+        k = make_kanji("一")
+        self.assertEqual(algorithm.find_components(k, algorithm.build_index([k])), [])
+
+
+class TestRankGroups(unittest.TestCase):
+    def test_groups_sorted_by_freq(self):
+        list_kanji = [
+            make_kanji("持", freq=142),
+            make_kanji("人", freq=1),
+            make_kanji("時", freq=26),
+            make_kanji("寺", freq=650),
+        ]
+        result = [replace(list_kanji[0], ref="時"), list_kanji[1],
+                  list_kanji[2], replace(list_kanji[3], ref="持")]
+        groups = algorithm.rank_groups(list_kanji, result)
+        self.assertEqual([[k.char for k in g] for g in groups], [["時", "持", "寺"], ["人"]])
+
+    def test_group_order_follows_first_member(self):
+        list_kanji = [make_kanji("b", freq=1), make_kanji("a", freq=2), make_kanji("c", freq=3)]
+        result = [list_kanji[0], list_kanji[1], replace(list_kanji[2], ref="a")]
+        groups = algorithm.rank_groups(list_kanji, result)
+        self.assertEqual([[k.char for k in g] for g in groups], [["b"], ["a", "c"]])
+
+    def test_equal_freq_keeps_list_order(self):
+        list_kanji = [make_kanji("x", freq=5), make_kanji("y", freq=5)]
+        result = [list_kanji[0], replace(list_kanji[1], ref="x")]
+        groups = algorithm.rank_groups(list_kanji, result)
+        self.assertEqual([k.char for k in groups[0]], ["x", "y"])
+
+
 class TestFindCluster123Components(unittest.TestCase):
     def _make_source(self, rows):
         df = make_dataframe(rows)
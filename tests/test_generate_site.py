@@ -0,0 +1,257 @@
+import sys
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import generate_site
+from model import Kanji, Categorization
+from tests.helpers import make_kanji_row, write_workbook
+
+
+def _make_kanji(char, ref=None, keyword="", on_reading=None, kun_reading="", srl=3, type_val="MEAN", freq=500,
+                comp1="", comp2=""):
+    return Kanji(
+        ref=ref or char, char=char,
+        component1=comp1, component2=comp2, component3="", component4="", component5="",
+        on_reading=on_reading or [""], kun_reading=kun_reading, keyword=keyword, srl=srl, type=type_val,
+        freq=freq, tags=[], group="",
+    )
+
+
+def make_groups():
+    cat = Categorization()
+    cat.result["03 colors"] = [_make_kanji("青", keyword="blue", on_reading=["セイ", "ショウ"], kun_reading="あお、あお・い",
+                                           comp1="月"),
+                               _make_kanji("赤", keyword="red", on_reading=["セキ"])]
+    cat.result["寺"] = [_make_kanji("寺", keyword="temple", on_reading=["ジ"], srl=4),
+                       _make_kanji("時", ref="寺", keyword="time of day", on_reading=["ジ"], kun_reading="とき",
+                                   comp1="日", comp2="寺")]
+    cat.result["empty"] = []
+    return generate_site.build_groups_data(cat)
+
+
+def page_manifest(html):
+    line = next(line for line in html.splitlines() if line.startswith("const MANIFEST = "))
+    return json.loads(line[len("const MANIFEST = "):-1].replace("<\\/", "</"))
+
+
+class TestSiteData(unittest.TestCase):
+    def setUp(self):
+        self.groups = make_groups()
+        self.manifest, self.assets = generate_site.build_site_data(self.groups, "data/page/")
+
+    def test_manifest_lists_every_group(self):
+        self.assertEqual(self.manifest["base"], "data/page/")
+        self.assertEqual([(g["name"], g["count"]) for g in self.manifest["groups"]],
+                         [("03 colors", 2), ("empty", 0), ("寺", 2)])
+        self.assertIsNone(self.manifest["groups"][1]["shard"])
+
+    def test_assets_are_named_by_content_hash(self):
+        self.assertEqual(len(self.assets), 3)
+        for name, data in self.assets.items():
+            digest = hashlib.sha256(data).hexdigest()[:16]
+            self.assertIn(name, (digest + ".json", "search." + digest + ".json.gz"))
+        self.assertIn(self.manifest["search"], self.assets)
+        _, again = generate_site.build_site_data(make_groups(), "data/other/")
+        self.assertEqual(again, self.assets)
+
+    def test_shard_rows_decode_to_group_records(self):
+        fields = self.manifest["fields"]
+        for entry in self.manifest["groups"]:
+            if entry["shard"] is None:
+                continue
+            rows = json.loads(self.assets[entry["shard"]])
+            self.assertEqual([dict(zip(fields, row)) for row in rows], self.groups[entry["name"]])
+
+    def test_edit_changes_only_that_shard_and_the_index(self):
+        groups = make_groups()
+        groups["寺"][1]["keyword"] = "hour"
+        manifest, assets = generate_site.build_site_data(groups, "data/page/")
+        self.assertEqual(len(set(assets) & set(self.assets)), 1)
+        self.assertNotEqual(manifest["search"], self.manifest["search"])
+
+    def test_html_inlines_the_manifest_only(self):
+        html = generate_site.generate_html(self.manifest, "Title", "book.xlsx")
+        self.assertEqual(page_manifest(html), self.manifest)
+        self.assertNotIn("temple", html)
+        self.assertIn("3 groups &middot; 4 kanji", html)
+
+    def test_group_name_cannot_close_the_script(self):
+        groups = {"</script><b>x": self.groups["寺"]}
+        manifest, _ = generate_site.build_site_data(groups, "data/page/")
+        html = generate_site.generate_html(manifest, "Title", "book.xlsx")
+        self.assertEqual(html.count("</script>"), 1)
+        self.assertEqual(page_manifest(html)["groups"][0]["name"], "</script><b>x")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = generate_site.build_search_index(make_groups())
+
+    def chars(self, ids):
+        return [self.index["kanji"][i][0] for i in ids]
+
+    def terms(self, key):
+        return {term: self.chars(ids) for term, ids in self.index[key]}
+
+    def test_kanji_in_page_order(self):
+        self.assertEqual(self.chars(range(len(self.index["kanji"]))), ["青", "赤", "寺", "時"])
+        self.assertEqual(self.index["groups"], [["03 colors", 0, 2], ["empty", 2, 2], ["寺", 2, 4]])
+        self.assertEqual(self.index["kanji"][3], ["時", "time of day", "ジ", "とき", "日 寺", 3, 2])
+
+    def test_exact_lookups(self):
+        self.assertEqual(self.chars(self.index["chars"]["寺"]), ["寺", "時"])
+        self.assertEqual(self.chars(self.index["components"]["寺"]), ["時"])
+        self.assertEqual(self.chars(self.index["components"]["月"]), ["青"])
+
+    def test_keyword_words(self):
+        self.assertEqual(self.terms("words"), {"blue": ["青"], "day": ["時"], "of": ["時"], "red": ["赤"],
+                                               "temple": ["寺"], "time": ["時"]})
+
+    def test_readings_normalized_to_hiragana(self):
+        readings = self.terms("readings")
+        self.assertEqual(readings["せい"], ["青"])
+        self.assertEqual(readings["じ"], ["寺", "時"])
+        self.assertEqual(readings["あおい"], ["青"])
+        self.assertEqual(readings["あお"], ["青"])
+        self.assertEqual(generate_site.normalize_reading("ひと・つ、～ぶり"), "ひとつ、ぶり")
+
+    def test_terms_sorted_as_javascript_compares(self):
+        # JavaScript compares UTF-16 code units, so the surrogate pair of U+20B9F sorts before U+FF41
+        groups = {"g": [{**make_groups()["寺"][0], "keyword": "\uff41 \U00020b9f"}]}
+        words = generate_site.build_search_index(groups)["words"]
+        self.assertEqual([term for term, _ in words], ["\U00020b9f", "\uff41"])
+
+    def test_shipped_gzipped(self):
+        manifest, assets = generate_site.build_site_data(make_groups(), "data/page/")
+        self.assertTrue(manifest["search"].endswith(".json.gz"))
+        self.assertEqual(json.loads(gzip.decompress(assets[manifest["search"]])), self.index)
+
+
+class TestWriteAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, "data", "page")
+        _, self.assets = generate_site.build_site_data(make_groups(), "data/page/")
+
+    def test_writes_then_skips_existing(self):
+        self.assertEqual(generate_site.write_assets(self.directory, self.assets), 3)
+        for name, data in self.assets.items():
+            with open(os.path.join(self.directory, name), "rb") as f:
+                self.assertEqual(f.read(), data)
+        self.assertEqual(generate_site.write_assets(self.directory, self.assets), 0)
+
+    def test_removes_stale_assets(self):
+        generate_site.write_assets(self.directory, self.assets)
+        with open(os.path.join(self.directory, "notes.txt"), "w") as f:
+            f.write("kept")
+        keep = dict(list(self.assets.items())[:1])
+        generate_site.write_assets(self.directory, keep)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(list(keep) + ["notes.txt"]))
+
+
+ROWS = [make_kanji_row("寺", on_reading="ジ", keyword="temple", srl=4, freq=100),
+        make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", keyword="time", srl=5, freq=200),
+        make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", keyword="hold", srl=2, freq=300)]
+
+
+class TestBuildSite(unittest.TestCase):
+    FILES = [("a.xlsx", "Book A"), ("b.xlsx", "Book B")]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.excel = os.path.join(tmp.name, "excel")
+        self.docs = os.path.join(tmp.name, "docs")
+        os.makedirs(self.excel)
+        write_workbook(os.path.join(self.excel, "a.xlsx"), ROWS)
+        write_workbook(os.path.join(self.excel, "b.xlsx"), ROWS[:2])
+        self.changelog = os.path.join(tmp.name, "CHANGELOG.md")
+        with open(self.changelog, "w", encoding="utf-8") as f:
+            f.write("# Changelog\n")
+        for p in (patch.dict(os.environ, {"KANJI_MBO_CACHE_DIR": os.path.join(tmp.name, "cache")}),
+                  patch("sys.stdout", StringIO())):
+            p.start()
+            self.addCleanup(p.stop)
+        # CHANGELOG.md rendering needs the markdown package; record the calls instead
+        self.changelog_renders = []
+        p = patch.object(generate_site, "generate_changelog", self.render_changelog)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def render_changelog(self, md_path, docs_dir):
+        self.changelog_renders.append(md_path)
+        with open(os.path.join(docs_dir, "changelog.html"), "w", encoding="utf-8") as f:
+            f.write("changelog")
+
+    def build(self, **kwargs):
+        return generate_site.build_site(self.docs, self.excel, self.FILES, self.changelog, jobs=1, **kwargs)
+
+    def test_second_build_skips_everything(self):
+        self.assertEqual(self.build(), ["a.html", "b.html", "changelog.html", "index.html"])
+        with open(os.path.join(self.docs, "a.html"), encoding="utf-8") as f:
+            self.assertIn("2 groups &middot; 3 kanji", f.read())
+        with open(os.path.join(self.docs, "index.html"), encoding="utf-8") as f:
+            index = f.read()
+        self.assertIn("Book A", index)
+        self.assertIn("Book B", index)
+        self.assertEqual(self.build(), [])
+        self.assertEqual(len(self.changelog_renders), 1)
+
+    def test_edited_workbook_rebuilds_its_page_only(self):
+        self.build()
+        write_workbook(os.path.join(self.excel, "b.xlsx"), ROWS)
+        self.assertEqual(self.build(), ["b.html", "index.html"])
+        manifest = generate_site.load_build_manifest(self.docs)
+        self.assertEqual(manifest["pages"]["b.html"]["kanji"], 3)
+
+    def test_version_bump_rebuilds_every_page(self):
+        self.build()
+        with patch.object(generate_site.result_store, "ALGORITHM_VERSION",
+                          generate_site.result_store.ALGORITHM_VERSION + 1):
+            self.assertEqual(self.build(), ["a.html", "b.html"])
+        with patch.object(generate_site, "TEMPLATE_VERSION", generate_site.TEMPLATE_VERSION + 1):
+            self.assertEqual(self.build(), ["a.html", "b.html", "changelog.html"])
+
+    def test_deleted_page_and_force_rebuild(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "a.html"))
+        self.assertEqual(self.build(), ["a.html"])
+        self.assertEqual(self.build(force=True), ["a.html", "b.html", "changelog.html"])
+
+    def test_deleted_asset_rebuilds_its_page(self):
+        self.build()
+        data = os.path.join(self.docs, "data", "a")
+        for prefix in ("search.", ""):
+            asset = next(name for name in sorted(os.listdir(data)) if name.startswith(prefix))
+            os.remove(os.path.join(data, asset))
+            self.assertEqual(self.build(), ["a.html"])
+            self.assertTrue(os.path.exists(os.path.join(data, asset)))
+
+    def test_changelog_rendered_only_when_modified(self):
+        self.build()
+        with open(self.changelog, "a", encoding="utf-8") as f:
+            f.write("- new entry\n")
+        self.assertEqual(self.build(), ["changelog.html"])
+        self.assertEqual(len(self.changelog_renders), 2)
+
+    def test_parallel_build_matches_serial(self):
+        self.build()
+        with open(os.path.join(self.docs, "a.html"), encoding="utf-8") as f:
+            serial = f.read()
+        rebuilt = generate_site.build_site(self.docs, self.excel, self.FILES, jobs=2, force=True)
+        self.assertEqual(rebuilt, ["a.html", "b.html"])
+        with open(os.path.join(self.docs, "a.html"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
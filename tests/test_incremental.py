@@ -0,0 +1,93 @@
+import sys
+import os
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import incremental
+import result_store
+from tests.helpers import make_kanji_row, make_source, categorize, dump
+
+
+ROWS = [
+    make_kanji_row("水", on_reading="スイ", keyword="water", type_val="STEM"),
+    make_kanji_row("青", comp1="月", on_reading="セイ", keyword="blue", type_val="MEAN", srl=5),
+    make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", srl=2),
+    make_kanji_row("晴", comp1="日", comp2="青", on_reading="セイ", srl=3),
+    make_kanji_row("精", comp1="米", comp2="青", on_reading="セイ、ショウ", srl=1),
+    make_kanji_row("寺", on_reading="ジ", srl=4),
+    make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", srl=5),
+    make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", srl=2),
+    make_kanji_row("某", comp1="甘", comp2="木", on_reading="ボウ", srl=1),
+]
+STEMS = [["水", "氵", "", "", "", "", "", "08 Wednesday"]]
+KEYWORDS = [["blue", "03 colors"]]
+
+
+class TestIncrementalCategorization(unittest.TestCase):
+    def setUp(self):
+        self.source = make_source(ROWS, KEYWORDS, STEMS)
+        with redirect_stdout(io.StringIO()):
+            self.categorization, self.snapshot = incremental.categorize_incremental(self.source)
+
+    def _rerun(self, rows, keyword_rows=KEYWORDS):
+        source = make_source(rows, keyword_rows, STEMS)
+        stats = incremental.IncrementalStats()
+        with redirect_stdout(io.StringIO()):
+            categorization, _ = incremental.categorize_incremental(source, self.snapshot, stats)
+        self.assertEqual(dump(categorization), dump(categorize(source)[0]))
+        return stats
+
+    def test_cold_run_matches_full_run(self):
+        self.assertEqual(dump(self.categorization), dump(categorize(self.source)[0]))
+
+    def test_unchanged_source_recomputes_nothing(self):
+        stats = self._rerun(ROWS)
+        self.assertEqual(stats.recomputed, set())
+
+    def test_edited_reading_recomputes_cluster_only(self):
+        rows = [list(r) for r in ROWS]
+        rows[3][6] = "テン"
+        stats = self._rerun(rows)
+        self.assertIn("晴", stats.recomputed)
+        self.assertNotIn("時", stats.recomputed)
+        self.assertNotIn("某", stats.recomputed)
+
+    def test_edited_srl_of_cluster_head(self):
+        rows = [list(r) for r in ROWS]
+        rows[5][9] = 1
+        stats = self._rerun(rows)
+        self.assertTrue({"寺", "時", "持"} <= stats.recomputed)
+
+    def test_removed_row(self):
+        self._rerun([r for r in ROWS if r[0] != "時"])
+
+    def test_added_row(self):
+        self._rerun(ROWS + [make_kanji_row("詩", comp1="言", comp2="寺", on_reading="シ", srl=2)])
+
+    def test_table_change_recomputes_everything(self):
+        stats = self._rerun(ROWS, keyword_rows=[])
+        self.assertEqual(len(stats.recomputed), len(ROWS))
+
+    def test_algorithm_version_change_recomputes_everything(self):
+        self.assertEqual(self.snapshot.algorithm_version, result_store.ALGORITHM_VERSION)
+        with patch.object(result_store, "ALGORITHM_VERSION", result_store.ALGORITHM_VERSION + 1):
+            stats = self._rerun(ROWS)
+        self.assertEqual(len(stats.recomputed), len(ROWS))
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshot.pickle")
+            incremental.save_snapshot(self.snapshot, path)
+            self.assertEqual(incremental.load_snapshot(path), self.snapshot)
+
+    def test_missing_snapshot_loads_none(self):
+        self.assertIsNone(incremental.load_snapshot("/nonexistent/snapshot.pickle"))
+
+
+if __name__ == "__main__":
+    unittest.main()
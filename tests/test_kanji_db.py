@@ -0,0 +1,122 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import algorithm
+import kanji_db
+import result_store
+from tests.helpers import make_kanji_row, make_source, categorize
+
+
+ROWS = [
+    make_kanji_row("水", on_reading="スイ", keyword="water", type_val="STEM"),
+    make_kanji_row("青", comp1="月", on_reading="セイ", keyword="blue", type_val="MEAN", srl=5),
+    make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", keyword="pure", srl=2),
+    make_kanji_row("晴", comp1="日", comp2="青", on_reading="セイ", keyword="clear up", srl=3),
+    make_kanji_row("精", comp1="米", comp2="青", on_reading="セイ、ショウ", keyword="refined", srl=1),
+    make_kanji_row("寺", on_reading="ジ", keyword="Buddhist temple", srl=4),
+    make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", keyword="time", srl=5),
+    make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", keyword="hold", srl=2),
+]
+STEMS = [["水", "氵", "", "", "", "", "", "08 Wednesday"]]
+KEYWORDS = [["blue", "03 colors"]]
+
+
+def linear_search(categorization, query):
+    """The web app's search before it moved to the database."""
+    return [(group, k) for group, kanji_list in categorization.result.items() for k in kanji_list
+            if query.lower() in k.keyword.lower() or query in k.on_reading or query == k.char]
+
+
+class TestKanjiDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.workbook = os.path.join(self.tmp.name, "book.xlsx")
+        with open(self.workbook, "wb") as f:
+            f.write(b"version 1")
+        self.path = os.path.join(self.tmp.name, "kanji.sqlite")
+
+        self.source = make_source(ROWS, KEYWORDS, STEMS)
+        self.categorization, _ = categorize(self.source)
+
+        kanji_db.build(self.workbook, self.source, self.categorization, self.path)
+        self.conn = kanji_db.connect(self.path, self.workbook)
+        self.addCleanup(self.conn.close)
+
+    def test_lookup_matches_read_kanji_char(self):
+        chars = [row[0] for row in ROWS]
+        expected = [algorithm.read_kanji_char(char, self.source) for char in chars]
+        self.assertEqual(kanji_db.lookup(self.conn, chars), expected)
+
+    def test_lookup_missing_char_raises(self):
+        with self.assertRaises(IndexError):
+            kanji_db.lookup(self.conn, ["青", "X"])
+
+    def test_lookup_many_splits_found_and_missing(self):
+        found, missing = kanji_db.lookup_many(self.conn, ["時", "X", "青", "時", "Y"])
+        self.assertEqual(list(found), ["時", "青"])
+        self.assertEqual(found["青"], algorithm.read_kanji_char("青", self.source))
+        self.assertEqual(missing, ["X", "Y"])
+
+    def test_search_matches_linear_scan(self):
+        for query in ["blue", "BLUE", "le", "e", "temple", "セイ", "ジ", "寺", "%", "_", '"', "missing"]:
+            with self.subTest(query=query):
+                self.assertEqual(kanji_db.search(self.conn, query),
+                                 linear_search(self.categorization, query))
+
+    def test_search_returns_categorized_ref(self):
+        refs = {k.char: k.ref for _, k in kanji_db.search(self.conn, "セイ")}
+        expected = {k.char: k.ref for _, k in linear_search(self.categorization, "セイ")}
+        self.assertEqual(refs, expected)
+        self.assertIn("青", refs.values())
+
+    def test_edited_workbook_is_stale(self):
+        with open(self.workbook, "wb") as f:
+            f.write(b"version 22")
+        self.assertIsNone(kanji_db.connect(self.path, self.workbook))
+        # Without a workbook to check against, the database still opens
+        conn = kanji_db.connect(self.path)
+        self.assertIsNotNone(conn)
+        conn.close()
+
+    def test_algorithm_version_change_is_stale(self):
+        with patch.object(result_store, "ALGORITHM_VERSION", result_store.ALGORITHM_VERSION + 1):
+            self.assertIsNone(kanji_db.connect(self.path, self.workbook))
+
+    def test_missing_or_corrupt_database(self):
+        self.assertIsNone(kanji_db.connect(os.path.join(self.tmp.name, "none.sqlite")))
+        corrupt = os.path.join(self.tmp.name, "corrupt.sqlite")
+        with open(corrupt, "wb") as f:
+            f.write(b"not a database" * 100)
+        self.assertIsNone(kanji_db.connect(corrupt))
+
+    def test_ensure_rebuilds_only_when_stale(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        self.assertEqual(kanji_db.ensure(self.workbook, self.source, self.categorization, self.path), self.path)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+        with open(self.workbook, "wb") as f:
+            f.write(b"version 22")
+        kanji_db.ensure(self.workbook, self.source, self.categorization, self.path)
+        conn = kanji_db.connect(self.path, self.workbook)
+        self.assertIsNotNone(conn)
+        conn.close()
+
+    def test_open_current_raises_when_still_stale(self):
+        conn = kanji_db.open_current(self.workbook, self.source, self.categorization, self.path)
+        self.assertEqual(kanji_db.lookup(conn, ["青"])[0].keyword, "blue")
+        conn.close()
+
+        # The workbook changing between the build and the open leaves the database stale
+        with patch("cache.header_matches", return_value=False):
+            with self.assertRaises(RuntimeError):
+                kanji_db.open_current(self.workbook, self.source, self.categorization, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
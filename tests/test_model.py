@@ -4,7 +4,7 @@ import unittest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from model import Kanji, Source, Categorization, Constants, ExcelColumn, Stem
+from model import Kanji, Source, Categorization, Constants, ExcelColumn, Stem, TagSet
 
 
 class TestKanji(unittest.TestCase):
@@ -61,6 +61,45 @@ class TestKanji(unittest.TestCase):
         k.type = Constants.vr
         self.assertEqual(k.type, Constants.vr)
 
+    def test_kanji_has_no_instance_dict(self):
+        k = self._make_kanji()
+        self.assertFalse(hasattr(k, "__dict__"))
+
+    def test_kanji_tags_list_converted_to_tagset(self):
+        k = self._make_kanji()
+        self.assertIsInstance(k.tags, TagSet)
+        self.assertEqual(k.tags, [])
+
+
+class TestTagSet(unittest.TestCase):
+    def test_append_and_contains(self):
+        tags = TagSet()
+        tags.append(Constants.crown_tag)
+        self.assertIn(Constants.crown_tag, tags)
+        self.assertNotIn("OTHER_TAG", tags)
+        self.assertEqual(len(tags), 1)
+
+    def test_equals_list_in_order(self):
+        self.assertEqual(TagSet(["A", "B"]), ["A", "B"])
+        self.assertNotEqual(TagSet(["A", "B"]), ["B", "A"])
+        self.assertNotEqual(TagSet(["A"]), ["B"])
+
+    def test_iterates_in_source_order(self):
+        tags = TagSet(["x", "y", "x"])
+        self.assertEqual(list(tags), ["x", "y", "x"])
+        self.assertEqual(len(tags), 3)
+        tags.append("w")
+        self.assertEqual(list(tags), ["x", "y", "x", "w"])
+
+    def test_names_are_interned(self):
+        tag = "".join(["CRO", "WN"])
+        self.assertIs(TagSet([tag]).names[0], TagSet(["CROWN"]).names[0])
+
+    def test_pickle_round_trip(self):
+        import pickle
+        tags = TagSet([Constants.crown_tag])
+        self.assertEqual(pickle.loads(pickle.dumps(tags)), tags)
+
 
 class TestStem(unittest.TestCase):
     def test_stem_creation(self):
@@ -0,0 +1,33 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import algorithm
+import parallel
+from tests.helpers import make_kanji_row, make_source, categorize, dump
+
+
+class TestEvaluateParallel(unittest.TestCase):
+    def test_matches_serial_run(self):
+        source = make_source([
+            make_kanji_row("青", comp1="月", on_reading="セイ", keyword="blue", type_val="MEAN", srl=5),
+            make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", srl=2),
+            make_kanji_row("晴", comp1="日", comp2="青", on_reading="セイ", srl=3),
+            make_kanji_row("寺", on_reading="ジ", srl=4),
+            make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", srl=5),
+            make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", srl=2),
+            make_kanji_row("池", comp1="氵", comp2="也", on_reading="チ", srl=2),
+        ], keyword_rows=[["blue", "03 colors"]], stem_rows=[["水", "氵", "", "", "", "", "", "08 Wednesday"]])
+        serial, _ = categorize(source)
+
+        kanji_list = algorithm.read_kanji_dataframe(source.df_kanji)
+        results = parallel.evaluate_parallel(source, kanji_list, jobs=2, chunks_per_job=2)
+        self.assertEqual(len(results), len(kanji_list))
+        categorization = algorithm.apply_decisions(source, kanji_list, [decision for decision, _ in results])
+        self.assertEqual(dump(categorization), dump(serial))
+
+
+if __name__ == "__main__":
+    unittest.main()
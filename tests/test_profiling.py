@@ -0,0 +1,104 @@
+import sys
+import os
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import profiling
+import algorithm
+from model import Rule
+from tests.helpers import make_kanji_row, make_source, categorize
+
+
+ROWS = [
+    make_kanji_row("水", on_reading="スイ", keyword="water", type_val="STEM"),
+    make_kanji_row("青", comp1="月", on_reading="セイ", keyword="blue", type_val="MEAN", srl=5),
+    make_kanji_row("清", comp1="氵", comp2="青", on_reading="セイ", srl=2),
+    make_kanji_row("寺", on_reading="ジ", srl=4),
+    make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", srl=5),
+    make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", srl=2),
+    make_kanji_row("口", on_reading="コウ", srl=1),
+]
+STEMS = [["水", "氵", "", "", "", "", "", "08 Wednesday"]]
+KEYWORDS = [["blue", "03 colors"]]
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def _categorize(self, source):
+        categorization, decisions = categorize(source, resolve_queue=False)
+        with profiling.phase("queue"):
+            algorithm.categorize_queue(categorization)
+        return decisions
+
+    def test_disabled_by_default(self):
+        self.assertFalse(profiling.enabled)
+        with profiling.phase("read_excel"):
+            pass
+        self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        self.assertFalse(profiling.enabled)
+
+    def test_hits_follow_decisions(self):
+        profile = profiling.enable()
+        decisions = self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        expected = {}
+        for decision in decisions:
+            expected[decision.rule] = expected.get(decision.rule, 0) + 1
+        self.assertEqual({rule: len(stats.latencies) for rule, stats in profile.rules.items()}, expected)
+        self.assertEqual(profile.kanji, len(ROWS))
+        self.assertIn("queue", profile.phases)
+
+    def test_paths_record_rules_visited(self):
+        profile = profiling.enable()
+        self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        self.assertEqual(profile.paths[Rule.keyword], 1)
+        self.assertEqual(profile.paths[Rule.stem], 1)
+        # 寺 is the COMPONENTS2 of kanji sharing its reading
+        self.assertEqual(profile.paths[Rule.crown], 1)
+        # 時 outranks 寺 on SRL, so rule 4 passes it on until rule 6 places it visually
+        self.assertEqual(profile.paths["4>5>6"], 1)
+        # 口 has no components and no cluster, so it falls through to rule 7
+        self.assertEqual(profile.paths["4>5>6>7"], 1)
+        self.assertEqual(sum(profile.paths.values()), len(ROWS))
+
+    def test_scans_counted_per_rule(self):
+        profile = profiling.enable()
+        self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        # Rules 1 and 2 answer from dict lookups, rule 3 queries the component index
+        self.assertEqual(profile.rules[Rule.keyword].lookups, 0)
+        self.assertGreater(profile.rules[Rule.crown].lookups, 0)
+        self.assertGreater(profile.rules[Rule.crown].rows, 0)
+
+    def test_to_dict_and_table(self):
+        profile = profiling.enable()
+        self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        data = json.loads(json.dumps(profile.to_dict()))
+        self.assertEqual(data["kanji"], len(ROWS))
+        for rule, stats in data["rules"].items():
+            self.assertEqual(sum(stats["histogram_us"].values()), stats["hits"])
+            self.assertLessEqual(stats["p50_us"], stats["p99_us"])
+            self.assertLessEqual(stats["p99_us"], stats["max_us"])
+        table = profile.format_table()
+        self.assertIn("queue", table)
+        for rule in data["rules"]:
+            self.assertIn("\n{:<8}".format(rule), table)
+
+    def test_histogram_buckets(self):
+        stats = profiling.RuleStats()
+        stats.latencies = [500, 1000, 1500, 3000, 4500, 100_000]
+        self.assertEqual(stats.histogram(), {"<=1": 2, "<=2": 1, "<=4": 1, "<=8": 1, "<=16": 0, "<=32": 0,
+                                             "<=64": 0, "<=128": 1})
+
+    def test_enable_starts_fresh(self):
+        first = profiling.enable()
+        self._categorize(make_source(ROWS, KEYWORDS, STEMS))
+        second = profiling.enable()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.kanji, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
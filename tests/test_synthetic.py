@@ -0,0 +1,111 @@
+"""Tests for the synthetic workbook generator."""
+
+import sys
+import os
+import logging
+import tempfile
+import unittest
+
+import pandas
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import algorithm
+import freq_algorithm
+import synthetic
+from data_loader import read_excel
+from model import ExcelColumn, Rule
+from tests.helpers import categorize
+
+EXCEL_FILE = os.path.join(os.path.dirname(__file__), '..', 'excel', '2250 KANJI COMPONENTS - ver. 1.0.xlsx')
+SKIP_REASON = "Excel file not found"
+
+COMPONENTS = [ExcelColumn.component1, ExcelColumn.component2, ExcelColumn.component3,
+              ExcelColumn.component4, ExcelColumn.component5]
+
+
+@unittest.skipUnless(os.path.exists(EXCEL_FILE), SKIP_REASON)
+class TestSyntheticWorkbook(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        algorithm.set_logging_level(logging.WARNING)
+        cls.original = read_excel(EXCEL_FILE, use_cache=False)
+        cls.profile = synthetic.learn_profile(cls.original)
+        cls.source = synthetic.generate(3000, cls.profile, seed=7)
+
+    def test_same_seed_same_workbook(self):
+        again = synthetic.generate(3000, self.profile, seed=7)
+        pandas.testing.assert_frame_equal(again.df_kanji, self.source.df_kanji)
+        pandas.testing.assert_frame_equal(again.df_stem, self.source.df_stem)
+        pandas.testing.assert_frame_equal(again.df_special, self.source.df_special)
+        other = synthetic.generate(3000, self.profile, seed=8)
+        self.assertFalse(other.df_kanji.equals(self.source.df_kanji))
+
+    def test_chars_unique_and_not_components_of_the_original(self):
+        chars = self.source.df_kanji[ExcelColumn.char].tolist()
+        self.assertEqual(len(chars), 3000)
+        self.assertEqual(len(set(chars)), len(chars))
+        self.assertFalse(set(chars) & set(self.profile.radicals))
+
+    def test_kanji_components_come_from_earlier_rows(self):
+        seen = set()
+        chars = set(self.source.df_kanji[ExcelColumn.char])
+        for row in self.source.df_kanji[[ExcelColumn.char] + COMPONENTS].itertuples(index=False):
+            for component in row[1:]:
+                if component in chars:
+                    self.assertIn(component, seen)
+            seen.add(row[0])
+
+    def test_lists_reference_generated_kanji(self):
+        chars = set(self.source.df_kanji[ExcelColumn.char])
+        self.assertTrue(set(self.source.df_stem[ExcelColumn.stem_kanji]) <= chars)
+        self.assertTrue(set(self.source.df_special[ExcelColumn.kanji]) <= chars)
+        self.assertTrue(set(self.source.df_special[ExcelColumn.key]) <= chars)
+        # stem.list and special.list scale with the row count
+        scale = 3000 / len(self.original.df_kanji)
+        self.assertEqual(len(self.source.df_stem), round(len(self.original.df_stem) * scale))
+        self.assertEqual(len(self.source.df_special), round(len(self.original.df_special) * scale))
+
+    def test_column_distributions_follow_the_original(self):
+        for column in (ExcelColumn.srl, ExcelColumn.type):
+            with self.subTest(column=column):
+                expected = self.original.df_kanji[column].value_counts(normalize=True)
+                actual = self.source.df_kanji[column].value_counts(normalize=True)
+                for value, share in expected.items():
+                    self.assertAlmostEqual(actual.get(value, 0.0), share, delta=0.03)
+
+    def test_every_rule_fires(self):
+        categorization, decisions = categorize(self.source)
+        rules = {decision.rule for decision in decisions}
+        for rule in (Rule.keyword, Rule.stem, Rule.special, Rule.crown, Rule.onyomi,
+                     Rule.stem_variation, Rule.visual):
+            self.assertIn(rule, rules)
+        # As in the shipped workbooks, a handful of kanji may stay unplaced (queue cycles, missing rules)
+        placed = {k.char for kanji_list in categorization.result.values() for k in kanji_list}
+        self.assertGreater(len(placed), 0.99 * len(self.source.df_kanji))
+
+    def test_workbooks_round_trip(self):
+        source = synthetic.generate(500, self.profile, seed=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            workbook = os.path.join(tmp, "synthetic.xlsx")
+            synthetic.write_workbook(source, workbook)
+            read_back = read_excel(workbook, use_cache=False)
+            self.assertEqual(read_back.df_kanji[ExcelColumn.char].tolist(),
+                             source.df_kanji[ExcelColumn.char].tolist())
+            categorize(read_back)
+
+            freq_workbook = os.path.join(tmp, "synthetic-freq.xlsx")
+            synthetic.write_freq_workbook(source, freq_workbook)
+            list_kanji = freq_algorithm.read_kanji_dataframe(freq_algorithm.read_excel(freq_workbook))
+            self.assertEqual([k.char for k in list_kanji], source.df_kanji[ExcelColumn.char].tolist())
+
+    def test_small_workbooks(self):
+        for rows in (1, 2, 10):
+            with self.subTest(rows=rows):
+                source = synthetic.generate(rows, self.profile)
+                self.assertEqual(len(source.df_kanji), rows)
+                categorize(source)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import io
+import json
+import logging
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tracing
+import algorithm
+from tests.helpers import make_kanji_row, make_source
+
+
+class ListSink(list):
+    def __call__(self, record):
+        self.append(record)
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(tracing.enabled)
+
+    def test_disabled_event_is_dropped_and_lazy_args_not_called(self):
+        called = []
+        tracing.event("rule", char=lambda: called.append(1))
+        self.assertEqual(called, [])
+
+    def test_lazy_args_resolved_when_enabled(self):
+        sink = ListSink()
+        tracing.enable(sink)
+        tracing.event("rule", char="青", size=lambda: 3)
+        self.assertEqual(sink, [{"event": "rule", "char": "青", "size": 3}])
+
+    def test_jsonl_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            tracing.enable(tracing.JsonlSink(path))
+            tracing.event("rule", char="青", rule="4")
+            tracing.event("queue", keys=2)
+            tracing.disable()
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(records, [{"event": "rule", "char": "青", "rule": "4"},
+                                   {"event": "queue", "keys": 2}])
+
+    def test_log_sink(self):
+        logger = logging.getLogger("test_tracing")
+        with self.assertLogs(logger, level="DEBUG") as logs:
+            tracing.enable(tracing.LogSink(logger))
+            tracing.event("rule", char="青", rule="4")
+        self.assertEqual(logs.records[0].getMessage(), "rule char=青 rule=4")
+
+    def test_categorization_emits_one_decision_per_kanji(self):
+        source = make_source([
+            make_kanji_row("寺", on_reading="ジ", srl=4),
+            make_kanji_row("時", comp1="日", comp2="寺", on_reading="ジ", srl=5),
+            make_kanji_row("持", comp1="扌", comp2="寺", on_reading="ジ", srl=2),
+        ])
+
+        sink = ListSink()
+        tracing.enable(sink)
+        categorization = algorithm.init_categorization(source)
+        with redirect_stdout(io.StringIO()):
+            for kanji in algorithm.read_kanji_dataframe(source.df_kanji):
+                algorithm.categorize_kanji(kanji, categorization, source)
+        algorithm.categorize_queue(categorization)
+
+        decisions = [r for r in sink if r["event"] == "decision"]
+        self.assertEqual([r["char"] for r in decisions], ["寺", "時", "持"])
+        self.assertEqual(decisions[2]["ref"], "時")
+        self.assertEqual(sink[-1]["event"], "queue")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from union_find import UnionFind
+
+
+class TestUnionFind(unittest.TestCase):
+    def test_unknown_key_is_its_own_label(self):
+        uf = UnionFind()
+        self.assertEqual(uf.find("a"), "a")
+        self.assertNotIn("a", uf)
+
+    def test_label_follows_second_argument(self):
+        uf = UnionFind()
+        uf.union("a", "b")
+        self.assertEqual(uf.find("a"), "b")
+        uf.union("c", "a")
+        self.assertEqual(uf.find("c"), "b")
+        uf.union("b", "d")
+        self.assertEqual({uf.find(k) for k in "abcd"}, {"d"})
+
+    def test_label_independent_of_rank(self):
+        uf = UnionFind()
+        uf.union_many([("a", "b"), ("c", "b"), ("d", "b")])
+        # The larger tree is attached under the singleton's label
+        uf.union("b", "z")
+        self.assertEqual(uf.find("a"), "z")
+
+    def test_union_within_component_keeps_label(self):
+        uf = UnionFind()
+        uf.union_many([("a", "b"), ("c", "b")])
+        uf.union("b", "a")
+        self.assertEqual(uf.find("c"), "b")
+
+    def test_components_in_insertion_order(self):
+        uf = UnionFind(["x"])
+        uf.union_many([("a", "b"), ("c", "d"), ("b", "d")])
+        self.assertEqual(list(uf.components()), [("x", ["x"]), ("d", ["a", "b", "c", "d"])])
+        self.assertEqual(len(uf), 5)
+
+    def test_long_chain(self):
+        uf = UnionFind()
+        uf.union_many((i, i + 1) for i in range(10000))
+        self.assertEqual(uf.find(0), 10000)
+
+
+if __name__ == "__main__":
+    unittest.main()
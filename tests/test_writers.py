@@ -0,0 +1,150 @@
+import sys
+import os
+import csv
+import io
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import writers
+from annotate import Annotation
+from model import Kanji, Categorization, TagSet
+
+
+def _make_kanji(char, ref=None, keyword="", on_reading=None, srl=3, freq=500, group="",
+                comp1="", comp2=""):
+    return Kanji(
+        ref=ref or char, char=char,
+        component1=comp1, component2=comp2, component3="",
+        component4="", component5="",
+        on_reading=on_reading or [""], kun_reading="",
+        keyword=keyword, srl=srl, type="MEAN", freq=freq,
+        tags=["crown"] if srl > 4 else [], group=group,
+    )
+
+
+def _expected_record(k):
+    return {
+        "ref": k.ref, "char": k.char, "component1": k.component1, "component2": k.component2,
+        "component3": k.component3, "component4": k.component4, "component5": k.component5,
+        "on_reading": k.on_reading_str, "kun_reading": k.kun_reading, "keyword": k.keyword,
+        "srl": k.srl, "type": k.type, "freq": k.freq, "tags": list(k.tags), "group": k.group,
+        "components": k.components_str,
+    }
+
+
+class TestCategorizeWriters(unittest.TestCase):
+    def setUp(self):
+        self.cat = Categorization()
+        self.cat.result["b group"] = [
+            _make_kanji("青", keyword="blue", on_reading=["セイ", "ショウ"], srl=5, comp1="月"),
+            _make_kanji("清", ref="青", keyword="pure", on_reading=["セイ"]),
+        ]
+        self.cat.result["a empty"] = []
+        self.cat.result["c one"] = [_make_kanji("赤", keyword="red \"x\"")]
+        self.expected = {
+            key: [_expected_record(k) for k in sorted(group, key=lambda x: x.ref, reverse=True)]
+            for key, group in sorted(self.cat.result.items())
+        }
+
+    def _write(self, fn, *args):
+        buf = io.StringIO()
+        fn(self.cat, buf, *args)
+        return buf.getvalue()
+
+    def test_indented_json_matches_json_dumps(self):
+        self.assertEqual(self._write(writers.write_categorize_json),
+                         json.dumps(self.expected, ensure_ascii=False, indent=2) + "\n")
+
+    def test_compact_json(self):
+        output = self._write(writers.write_categorize_json, None)
+        self.assertEqual(output.count("\n"), 1)
+        self.assertEqual(json.loads(output), self.expected)
+
+    def test_empty_categorization(self):
+        buf = io.StringIO()
+        writers.write_categorize_json(Categorization(), buf)
+        self.assertEqual(buf.getvalue(), "{}\n")
+
+    def test_ndjson(self):
+        lines = self._write(writers.write_categorize_ndjson).splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([(r["result_group"], r["char"]) for r in records],
+                         [("b group", "青"), ("b group", "清"), ("c one", "赤")])
+
+    def test_csv(self):
+        lines = self._write(writers.write_categorize_csv).splitlines()
+        self.assertEqual(lines[0], ",".join(writers.CATEGORIZE_CSV_HEADER))
+        self.assertEqual(len(lines), 4)
+
+    def test_tags_keep_workbook_order(self):
+        k = _make_kanji("赤")
+        k.tags = TagSet(["zeta", "crown", "alpha"])
+        k.tags.append("crown")
+        self.cat.result["c one"] = [k]
+        records = [json.loads(line) for line in self._write(writers.write_categorize_ndjson).splitlines()]
+        self.assertEqual(records[-1]["tags"], ["zeta", "crown", "alpha", "crown"])
+
+
+class TestLookupWriters(unittest.TestCase):
+    def setUp(self):
+        self.kanji = [_make_kanji("青", on_reading=["セイ"]), _make_kanji("赤", srl=5)]
+
+    def test_json_matches_json_dumps(self):
+        buf = io.StringIO()
+        writers.write_lookup_json(self.kanji, buf)
+        expected = json.dumps([_expected_record(k) for k in self.kanji], ensure_ascii=False, indent=2)
+        self.assertEqual(buf.getvalue(), expected + "\n")
+
+    def test_json_accepts_a_generator(self):
+        buf = io.StringIO()
+        writers.write_lookup_json((k for k in self.kanji), buf, None)
+        self.assertEqual([r["char"] for r in json.loads(buf.getvalue())], ["青", "赤"])
+
+    def test_empty_json(self):
+        buf = io.StringIO()
+        writers.write_lookup_json([], buf)
+        self.assertEqual(buf.getvalue(), "[]\n")
+
+    def test_ndjson(self):
+        buf = io.StringIO()
+        writers.write_lookup_ndjson(self.kanji, buf)
+        self.assertEqual([json.loads(line)["char"] for line in buf.getvalue().splitlines()], ["青", "赤"])
+
+
+class TestAnnotationWriters(unittest.TestCase):
+    def setUp(self):
+        blue = Annotation('03 "colors"', "青", "MEAN", 5, 502)
+        self.tokens = [(1, 3, "青", blue), (1, 5, "清", Annotation("03 colors", "青", "VR", 2, 900)),
+                       (2, 1, "青", blue)]
+
+    def test_ndjson_matches_json_dumps(self):
+        buf = io.StringIO()
+        writers.write_annotations_ndjson(self.tokens, buf)
+        expected = "".join(json.dumps(writers.annotation_record(t), ensure_ascii=False, separators=(",", ":"))
+                           + "\n" for t in self.tokens)
+        self.assertEqual(buf.getvalue(), expected)
+
+    def test_json(self):
+        buf = io.StringIO()
+        writers.write_annotations_json(iter(self.tokens), buf)
+        records = json.loads(buf.getvalue())
+        self.assertEqual([(r["line"], r["column"], r["char"], r["ref"]) for r in records],
+                         [(1, 3, "青", "青"), (1, 5, "清", "青"), (2, 1, "青", "青")])
+
+    def test_text(self):
+        buf = io.StringIO()
+        writers.write_annotations_text(self.tokens, buf)
+        self.assertEqual(buf.getvalue().splitlines()[1], "1:5\t清\t03 colors\t青\tVR\t2\t900")
+
+    def test_csv(self):
+        buf = io.StringIO()
+        writers.write_annotations_csv(self.tokens, buf)
+        rows = list(csv.reader(io.StringIO(buf.getvalue())))
+        self.assertEqual(rows[0], writers.ANNOTATE_CSV_HEADER)
+        self.assertEqual(rows[3], ["2", "1", "青", '03 "colors"', "青", "MEAN", "5", "502"])
+
+
+if __name__ == "__main__":
+    unittest.main()